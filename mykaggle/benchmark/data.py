@@ -0,0 +1,93 @@
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+PLATFORMS = [
+    'PS2', 'DS', 'PS3', 'Wii', 'X360', 'PSP', 'PS', 'PC', 'GBA', 'XB', 'GC', '3DS', 'PSV', 'PS4', 'N64',
+    'XOne', 'SNES', 'SAT', 'WiiU', '2600', 'GB', 'NES', 'DC', 'GEN', 'NG', 'SCD', 'WS', '3DO', 'TG16', 'GG', 'PCFX',
+]
+GENRES = [
+    'Action', 'Sports', 'Misc', 'Role-Playing', 'Shooter', 'Adventure', 'Racing', 'Platform', 'Simulation',
+    'Fighting', 'Strategy', 'Puzzle',
+]
+RATINGS = ['E', 'T', 'M', 'E10+', 'EC', 'K-A', 'RP', 'AO']
+SALES_COLUMNS = ['NA_Sales', 'EU_Sales', 'JP_Sales', 'Other_Sales']
+SYLLABLES = ['ka', 'ri', 'mo', 'zel', 'da', 'su', 'per', 'go', 'lo', 'fi', 'na', 'tet', 'ris', 'po', 'ke', 'mon']
+
+
+def make_atmacup_data(n_rows: int, test_ratio: float = 0.5, seed: int = 1019) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    '''
+    atmaCup #8 の train / test と同じカラム構成の合成データを作る。
+    Name は Zipf 分布で選んだ単語を並べたものにして、シリーズものや複数 Platform での発売が出るようにしている。
+    train には notebook と同じく mod_*_Sales (log1p) と target も入れる。
+    :param n_rows: train と test を合わせた行数
+    :param test_ratio: test の行の割合
+    :param seed: 乱数のシード
+    '''
+    rng = np.random.RandomState(seed)
+    n_names = max(n_rows // 3, 1)
+    n_publishers = max(n_rows // 30, 2)
+    n_developers = max(n_rows // 10, 2)
+
+    words = np.array([_make_word(rng) for _ in range(max(n_rows // 20, 50))], dtype=object)
+    word_ids = np.minimum(rng.zipf(1.3, size=(n_names, 5)) - 1, len(words) - 1)
+    lengths = rng.randint(1, 6, size=n_names)
+    names = np.array([' '.join(words[ids[:n]]) for ids, n in zip(word_ids, lengths)], dtype=object)
+    digits = rng.rand(n_names) < 0.1
+    names[digits] = names[digits] + ' ' + rng.randint(2, 5, size=digits.sum()).astype(str).astype(object)
+
+    name_ids = np.minimum(rng.zipf(1.5, size=n_rows) - 1, n_names - 1)
+    publisher_ids = np.minimum(rng.zipf(1.4, size=n_names) - 1, n_publishers - 1)
+    developer_ids = np.minimum(rng.zipf(1.4, size=n_names) - 1, n_developers - 1)
+    df = pd.DataFrame({
+        'id': np.arange(n_rows),
+        'Name': _with_nan(rng, names[name_ids], 0.001),
+        'Platform': rng.choice(PLATFORMS, size=n_rows, p=_zipf_probs(len(PLATFORMS))),
+        'Year_of_Release': _with_nan(rng, rng.randint(1980, 2021, size=n_rows).astype(np.float64), 0.02),
+        'Genre': _with_nan(rng, np.array(GENRES, dtype=object)[rng.randint(len(GENRES), size=n_names)][name_ids],
+                           0.001),
+        'Publisher': _with_nan(rng, np.array([f'Publisher {i}' for i in publisher_ids], dtype=object)[name_ids],
+                               0.003),
+        'Developer': _with_nan(rng, np.array([f'Developer {i}' for i in developer_ids], dtype=object)[name_ids],
+                               0.4),
+        'Critic_Score': _with_nan(rng, rng.randint(13, 99, size=n_rows).astype(np.float64), 0.5),
+        'Critic_Count': _with_nan(rng, rng.randint(3, 114, size=n_rows).astype(np.float64), 0.5),
+        'User_Score': _user_scores(rng, n_rows),
+        'User_Count': _with_nan(rng, rng.randint(4, 10666, size=n_rows).astype(np.float64), 0.5),
+        'Rating': _with_nan(rng, rng.choice(RATINGS, size=n_rows).astype(object), 0.4),
+    })
+    for c in SALES_COLUMNS:
+        df[c] = np.round(rng.lognormal(1.0, 1.2, size=n_rows) * (rng.rand(n_rows) > 0.3))
+    df['Global_Sales'] = df.loc[:, SALES_COLUMNS].sum(axis=1) + 1
+
+    is_test = rng.rand(n_rows) < test_ratio
+    df_train = df.loc[~is_test].reset_index(drop=True)
+    df_test = df.loc[is_test].drop(SALES_COLUMNS + ['Global_Sales'], axis=1).reset_index(drop=True)
+    for c in SALES_COLUMNS + ['Global_Sales']:
+        df_train['mod_' + c] = np.log1p(df_train.loc[:, c])
+    df_train['target'] = df_train.loc[:, 'mod_Global_Sales']
+    return df_train, df_test
+
+
+def _make_word(rng: np.random.RandomState) -> str:
+    return ''.join(rng.choice(SYLLABLES, size=rng.randint(1, 4))).capitalize()
+
+
+def _zipf_probs(n: int) -> np.ndarray:
+    probs = 1 / np.arange(1, n + 1)
+    return probs / probs.sum()
+
+
+def _with_nan(rng: np.random.RandomState, values: np.ndarray, rate: float) -> np.ndarray:
+    values = values.copy()
+    if values.dtype.kind != 'f':
+        values = values.astype(object)
+    values[rng.rand(len(values)) < rate] = np.nan
+    return values
+
+
+def _user_scores(rng: np.random.RandomState, n_rows: int) -> np.ndarray:
+    scores = np.round(rng.uniform(0, 10, size=n_rows), 1).astype(str).astype(object)
+    scores[rng.rand(n_rows) < 0.15] = 'tbd'
+    scores[rng.rand(n_rows) < 0.4] = np.nan
+    return scores
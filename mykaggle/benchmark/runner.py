@@ -0,0 +1,215 @@
+'''
+mykaggle.feature の全特徴について、合成データで create() の時間とメモリを測るベンチマーク。
+
+  python -m mykaggle.benchmark.runner --sizes 10000 100000 --output ../log/benchmark
+
+特徴の train, test の phase ごとに spawn した別プロセスで実行するので、peak RSS は他の特徴や phase の影響を受けない。
+peak_rss_mb はデータの読み込みを含むワーカーの peak RSS, peak_rss_delta_mb は create() の間に増えた分。
+--trace-alloc をつけると、create() 中の tracemalloc の peak (traced_peak_mb) と、
+create() の前後の tracemalloc の snapshot の差から、create() で確保されたメモリブロックの数 (allocated_blocks) と
+その大きさ (allocated_mb) も記録する。返り値の特徴やキャッシュなど、create() の後も残るものを数える。
+create() の途中で確保して解放したブロックの数 (malloc の呼び出し回数) は、
+CPython が計装したビルドでしか数えられないので記録しない。途中で使ったメモリの量は traced_peak_mb で見る。
+結果は <output>.json と <output>.csv に書き出すので、コミット間で diff できる。
+'''
+from typing import Any, Dict, List, Optional, Type
+from pathlib import Path
+import argparse
+import importlib
+import inspect
+import json
+import multiprocessing
+import pkgutil
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from mykaggle.benchmark.data import make_atmacup_data
+from mykaggle.feature.base import Feature
+from mykaggle.lib.arrow_util import read_arrow, write_arrow
+from mykaggle.util.logger import get_logger
+
+FEATURE_PACKAGE = 'mykaggle.feature'
+FEATURE_DIR = Path(__file__).resolve().parents[1] / 'feature'
+RESULT_COLUMNS = [
+    'size', 'feature', 'module', 'phase', 'status', 'wall_sec', 'peak_rss_mb', 'peak_rss_delta_mb',
+    'traced_peak_mb', 'allocated_blocks', 'allocated_mb', 'n_rows', 'n_columns', 'error'
+]
+logger = get_logger(__name__)
+
+
+def find_features(modules: Optional[List[str]] = None) -> List[Type[Feature]]:
+    '''
+    mykaggle.feature 以下で定義されている Feature のサブクラスを全部返す。
+    :param modules: モジュール名 (e.g. 'ce') で絞る場合に指定する
+    '''
+    features = []
+    for module_info in sorted(pkgutil.iter_modules([str(FEATURE_DIR)]), key=lambda m: m.name):
+        if modules is not None and module_info.name not in modules:
+            continue
+        try:
+            module = importlib.import_module(f'{FEATURE_PACKAGE}.{module_info.name}')
+        except Exception:
+            logger.warning(f'failed to import {module_info.name}', exc_info=True)
+            continue
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+            if issubclass(obj, Feature) and obj.__module__ == module.__name__ and not inspect.isabstract(obj):
+                features.append(obj)
+    return features
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB, macOS は byte
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def _run_feature(
+    feature_class: Type[Feature],
+    phase: str,
+    train_path: str,
+    test_path: str,
+    trace_alloc: bool
+) -> Dict[str, Any]:
+    '''
+    ワーカープロセスで phase ('train' か 'test') の create() を実行して計測する。
+    '''
+    df_train = read_arrow(Path(train_path))
+    df_test = read_arrow(Path(test_path))
+    if phase == 'train':
+        others = {'main': df_train, 'another': df_test}
+    else:
+        others = {'main': df_test, 'another': df_train}
+    feature = feature_class(train=phase == 'train')  # type: ignore
+    base = others['main'].loc[:, ['id']]
+    result: Dict[str, Any] = {'phase': phase, 'status': 'ok', 'error': ''}
+    rss_before = _max_rss_mb()
+    if trace_alloc:
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    df_feature = None
+    try:
+        df_feature = feature.create(base, others)
+        result['n_rows'], result['n_columns'] = df_feature.shape
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f'{type(e).__name__}: {e}'
+        logger.debug(traceback.format_exc())
+    result['wall_sec'] = time.perf_counter() - start
+    if trace_alloc:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        result['traced_peak_mb'] = traced_peak / 1024 ** 2
+        # snapshot を取るのに確保したブロックは数えない
+        snapshot_after = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        diff = snapshot_after.compare_to(snapshot_before, 'filename')
+        result['allocated_blocks'] = sum(d.count_diff for d in diff)
+        result['allocated_mb'] = sum(d.size_diff for d in diff) / 1024 ** 2
+        tracemalloc.stop()
+    result['peak_rss_mb'] = _max_rss_mb()
+    result['peak_rss_delta_mb'] = result['peak_rss_mb'] - rss_before
+    del df_feature
+    return result
+
+
+def run_benchmark(
+    sizes: List[int],
+    modules: Optional[List[str]] = None,
+    trace_alloc: bool = False,
+    timeout: Optional[float] = None,
+    seed: int = 1019,
+    workdir: Optional[Path] = None
+) -> pd.DataFrame:
+    '''
+    サイズごとに合成データを作り、全特徴の create() を計測した結果を返す。
+    :param sizes: train と test を合わせた行数のリスト
+    :param modules: 計測する特徴のモジュール名、None なら全部
+    :param trace_alloc: tracemalloc でメモリ確保も計測するかどうか (遅くなる)
+    :param timeout: 1 特徴の 1 phase あたりの制限時間 (秒)
+    :param seed: 合成データのシード
+    :param workdir: 合成データを置くディレクトリ、None ならシステムの一時ディレクトリ
+    '''
+    features = find_features(modules)
+    context = multiprocessing.get_context('spawn')
+    records = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
+        for size in sizes:
+            df_train, df_test = make_atmacup_data(size, seed=seed)
+            train_path = str(write_arrow(df_train, Path(tmpdir) / f'train_{size}.arrow'))
+            test_path = str(write_arrow(df_test, Path(tmpdir) / f'test_{size}.arrow'))
+            for feature_class in features:
+                logger.info(f'benchmarking {feature_class.__name__} with {size} rows')
+                common = {'size': size, 'feature': feature_class.__name__, 'module': feature_class.__module__}
+                for phase in ['train', 'test']:
+                    # phase ごとに新しいプロセスにして、test の peak RSS に train の分が残らないようにする
+                    with context.Pool(1) as pool:
+                        job = pool.apply_async(_run_feature, (feature_class, phase, train_path, test_path, trace_alloc))
+                        try:
+                            result = job.get(timeout)
+                        except multiprocessing.TimeoutError:
+                            result = {'phase': phase, 'status': 'timeout', 'error': f'over {timeout} sec'}
+                        except Exception as e:
+                            result = {'phase': phase, 'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+                    records.append({**common, **result})
+    return pd.DataFrame(records).reindex(columns=RESULT_COLUMNS)
+
+
+def environment() -> Dict[str, str]:
+    '''
+    結果を比較するときに必要な実行環境の情報。
+    '''
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': str(multiprocessing.cpu_count()),
+    }
+
+
+def save_report(df_result: pd.DataFrame, output: Path) -> None:
+    '''
+    結果を output.json (実行環境つき) と output.csv に書き出す。
+    '''
+    output.parent.mkdir(parents=True, exist_ok=True)
+    df_result.to_csv(output.with_suffix('.csv'), index=False)
+    report = {
+        'environment': environment(),
+        'results': json.loads(df_result.to_json(orient='records')),
+    }
+    with open(output.with_suffix('.json'), 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='benchmark Feature.create() of mykaggle.feature')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--features', type=str, nargs='*', default=None, help='module names e.g. ce name_bow')
+    parser.add_argument('--output', type=Path, default=Path('../log/benchmark'))
+    parser.add_argument('--trace-alloc', action='store_true')
+    parser.add_argument('--timeout', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=1019)
+    args = parser.parse_args()
+
+    df_result = run_benchmark(args.sizes, args.features, args.trace_alloc, args.timeout, args.seed)
+    save_report(df_result, args.output)
+    print(df_result.loc[:, ['size', 'feature', 'phase', 'status', 'wall_sec', 'peak_rss_delta_mb']].to_string())
+
+
+if __name__ == '__main__':
+    main()
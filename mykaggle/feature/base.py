@@ -1,20 +1,124 @@
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+import hashlib
+import inspect
+import json
+import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from types import ModuleType
 
+from mykaggle.feature.builder import FeatureMatrixBuilder
+from mykaggle.lib.arrow_util import read_arrow
+from mykaggle.lib.name_index import NameIndex
+from mykaggle.lib.pandas_util import apply_dtype_policy, decide_dtypes, fingerprint
+from mykaggle.lib.vocabulary import build_vocabulary
 from mykaggle.util.logger import get_logger
 
 FEATURE_DIR = Path('../data/feature/')
+# キャッシュキーの計算に使う others のキー
+CACHE_KEY_OTHERS = ['main', 'another']
 logger = get_logger(__name__)
 
 
+def dependency_key(name: str, role: str) -> str:
+    '''
+    作成済みの依存特徴を others に入れるときのキー。
+    :param name: 依存特徴の名前
+    :param role: 'main' の行の特徴なら 'main', 'another' の行の特徴なら 'another'
+    '''
+    return f'{role}:{name}'
+
+
+def swap_others(others: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    main と another (依存特徴の main と another も) を入れ替えた others を返す。train の others から test の others を作る。
+    '''
+    swapped = dict(others)
+    for role, other_role in [('main', 'another'), ('another', 'main')]:
+        prefix = dependency_key('', role)
+        for k, v in others.items():
+            if k == role:
+                swapped[other_role] = v
+            elif k.startswith(prefix):
+                swapped[dependency_key(k[len(prefix):], other_role)] = v
+    return swapped
+
+
+def get_feature_pair(
+    feature_main: 'Feature',
+    feature_another: 'Feature',
+    base_main: pd.DataFrame,
+    base_another: pd.DataFrame,
+    others_main: Dict[str, Any],
+    others_another: Dict[str, Any],
+    use_cache: bool = False,
+    save_cache: bool = False
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    '''
+    train と test のように main と another を入れ替えた 2 つの特徴をまとめて作る。
+    dtype_policy があれば 2 つの出力の値をあわせて dtype を決めて両方に同じ dtype をかけるので、
+    category のコードや int の幅が train と test で揃う。キャッシュもその dtype で保存する。
+    :param feature_main: main の行の特徴 (train の特徴など)
+    :param feature_another: another の行の特徴、dtype_policy は feature_main と同じにしておく
+    '''
+    if feature_main.dtype_policy is None:
+        return (
+            feature_main.get_feature(base_main, others_main, use_cache, save_cache),
+            feature_another.get_feature(base_another, others_another, use_cache, save_cache)
+        )
+    features = [feature_main, feature_another]
+    bases = [base_main, base_another]
+    others = [others_main, others_another]
+    cache_keys = [f.cache_key(o) if use_cache or save_cache else None for f, o in zip(features, others)]
+    if use_cache:
+        cached = [f._load_cache(k) for f, k in zip(features, cache_keys)]
+        # 片方だけキャッシュがあっても、dtype を揃えるために両方作り直す
+        if cached[0] is not None and cached[1] is not None:
+            return cached[0], cached[1]
+    outputs = [f.create(b, o) for f, b, o in zip(features, bases, others)]
+    dtypes = decide_dtypes(outputs, feature_main.dtype_policy)
+    outputs = [apply_dtype_policy(output, feature_main.dtype_policy, dtypes) for output in outputs]
+    if save_cache:
+        for f, output, k in zip(features, outputs, cache_keys):
+            f._save(output, k)
+    return outputs[0], outputs[1]
+
+
+def _dependency_modules(module: Optional[ModuleType]) -> List[ModuleType]:
+    '''
+    module と、そのモジュール変数から (再帰的に) 参照している mykaggle のモジュールを名前順に返す。
+    '''
+    found: Dict[str, ModuleType] = {}
+    stack = [module] if module is not None else []
+    while len(stack) > 0:
+        current = stack.pop()
+        if current.__name__ in found:
+            continue
+        found[current.__name__] = current
+        for value in list(vars(current).values()):
+            if inspect.ismodule(value):
+                name = value.__name__
+            else:
+                name = getattr(value, '__module__', None)
+            if isinstance(name, str) and name.split('.')[0] == 'mykaggle' and name in sys.modules:
+                stack.append(sys.modules[name])
+    return [found[name] for name in sorted(found)]
+
+
 class Feature(metaclass=ABCMeta):
     '''
     ひとまとまりの特徴を表すベースクラス。
     特徴を作成する create を実装することで、キャッシュ付き特徴作成クラスとして使える。
+    他の特徴の出力を使う場合は dependencies に特徴クラスを書いておくと、FeaturePipeline が先に作って渡す。
     '''
 
+    dependencies: List[Type['Feature']] = []
+    # create の出力にかける dtype のポリシー (pandas_util.DTYPE_POLICIES)、キャッシュもこの dtype で保存する
+    # 値が変わるので既定ではかけない。使うときは 'compact' などを指定する
+    dtype_policy: Optional[str] = None
+
     @abstractmethod
     def create(
         self,
@@ -29,6 +133,14 @@ class Feature(metaclass=ABCMeta):
         '''
         pass
 
+    def __new__(cls, *args, **kwargs) -> 'Feature':
+        # 属性名がコンストラクタの引数名と違っても params に渡された値が入るように、束縛した引数を覚えておく
+        feature = super().__new__(cls)
+        bound = inspect.signature(cls.__init__).bind_partial(None, *args, **kwargs)
+        bound.apply_defaults()
+        feature._init_args = dict(list(bound.arguments.items())[1:])
+        return feature
+
     def __init__(self, name: str, train: bool = True, category: Optional[str] = None) -> None:
         '''
         :params name: 特徴の名前 e.g.) gender, age
@@ -42,48 +154,220 @@ class Feature(metaclass=ABCMeta):
 
     def __call__(
         self,
-        base: pd.DataFrame,
+        base: Union[pd.DataFrame, FeatureMatrixBuilder],
         others: Optional[Dict[str, pd.DataFrame]] = None,
         use_cache: bool = False,
         save_cache: bool = False,
         merge: bool = False,
         *args, **kwargs
-    ) -> pd.DataFrame:
+    ) -> Union[pd.DataFrame, FeatureMatrixBuilder]:
         '''
         特徴を実際に使うときに呼ぶメソッド。
         前後にキャッシュとして特徴を保存する/キャッシュされた特徴をロードするようにしている。
-        :param base: 最終的に merge する index を含む DataFrame
+        :param base: 最終的に merge する index を含む DataFrame.
+          FeatureMatrixBuilder を渡すと、結合せずに特徴を追加した builder を返す
         :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
         :param use_cache: キャッシュを使うかどうか
         :param save_cache: 作成した特徴を保存するかどうか
         :param merge: pd.merge を使うかどうか
         '''
-        if use_cache:
-            if not self._path.exists():
-                logger.info(f'Creating {self.name_prefix}_{self.name} since it has not been created yet.')
-            else:
-                feature = self._load()
-        feature = self.create(base, others, *args, **kwargs)
-        if save_cache:
-            self._save(feature)
-
+        if isinstance(base, FeatureMatrixBuilder):
+            feature = self.get_feature(base.base, others, use_cache, save_cache, *args, **kwargs)
+            return base.add(feature, self.name, on=self._merge_on if merge else None)
+        feature = self.get_feature(base, others, use_cache, save_cache, *args, **kwargs)
         if merge:
             output = pd.merge(base, feature, how=self._merge_how, on=self._merge_on)
         else:
             output = pd.concat([base, feature], axis=1)
         return output
 
+    def get_feature(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        use_cache: bool = False,
+        save_cache: bool = False,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        '''
+        base に結合する前の特徴だけを返す。
+        use_cache の場合、キャッシュキーが一致するキャッシュがあれば create を呼ばずにそれを返す。
+        dtype_policy があって others に another があれば、dtype を揃えるために another の行の特徴も一緒に作る
+        (get_feature_pair)。train と test の両方を作るなら get_feature_pair を直接使う。
+        :param base: 最終的に merge する index を含む DataFrame
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        :param use_cache: キャッシュを使うかどうか
+        :param save_cache: 作成した特徴を保存するかどうか
+        '''
+        if self.dtype_policy is not None and others is not None and 'another' in others:
+            feature_another = type(self)(**dict(self.params, train=not self.train))  # type: ignore
+            feature_another.dtype_policy = self.dtype_policy
+            return get_feature_pair(
+                self, feature_another, base, others['another'], others, swap_others(others), use_cache, save_cache
+            )[0]
+        cache_key = self.cache_key(others) if use_cache or save_cache else None
+        if use_cache:
+            feature = self._load_cache(cache_key)
+            if feature is not None:
+                return feature
+        feature = apply_dtype_policy(self.create(base, others, *args, **kwargs), self.dtype_policy)
+        if save_cache:
+            self._save(feature, cache_key)
+        return feature
+
+    def _get_whole(self, others: Dict[str, pd.DataFrame], copy: bool = False) -> pd.DataFrame:
+        '''
+        train と test をつなげた DataFrame を返す。train, test どちらの特徴でも train が先にくる。
+        others に 'whole' があれば (FeaturePipeline から渡される) 作り直さずにそれを使う。
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        :param copy: 返り値を書き換える場合は True にする、共有している 'whole' を壊さないため
+        '''
+        if 'whole' in others:
+            return others['whole'].copy() if copy else others['whole']
+        if self.train:
+            return pd.concat([others['main'], others['another']])
+        return pd.concat([others['another'], others['main']])
+
+    def _get_vocabulary(
+        self,
+        others: Dict[str, pd.DataFrame],
+        columns: List[str]
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        '''
+        columns を train と test で共通のカテゴリの Categorical にした、whole の行の分と main の行の分を返す。
+        others に 'vocabulary' があれば (FeaturePipeline から渡される) factorize し直さずにそれを使う。
+        index は whole, main とそれぞれ同じになる。
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        :param columns: Categorical にするカラム
+        '''
+        df_whole = self._get_whole(others)
+        vocabulary = others.get('vocabulary')
+        if vocabulary is None or any(c not in vocabulary.columns for c in columns):
+            vocabulary = build_vocabulary(df_whole, columns)
+        vocabulary_whole = vocabulary.loc[:, columns].set_axis(df_whole.index)
+        n_main = others['main'].shape[0]
+        start = 0 if self.train else df_whole.shape[0] - n_main
+        vocabulary_main = vocabulary_whole.iloc[start:start + n_main].set_axis(others['main'].index)
+        return vocabulary_whole, vocabulary_main
+
+    def _get_name_index(self, others: Dict[str, Any]) -> Tuple[NameIndex, np.ndarray]:
+        '''
+        whole の行をタイトルごとにまとめた NameIndex と、main の各行の Name のコード (NaN は -1) を返す。
+        others に 'name_index' があれば (FeaturePipeline から渡される) 作り直さずにそれを使う。
+        コードは 'vocabulary' の Name のカテゴリと同じ。
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        '''
+        vocabulary_whole, vocabulary_main = self._get_vocabulary(others, ['Name'])
+        names = vocabulary_whole.loc[:, 'Name']
+        index = others.get('name_index')
+        if index is None:
+            index = NameIndex.from_codes(names.cat.codes.values, len(names.cat.categories))
+        return index, vocabulary_main.loc[:, 'Name'].cat.codes.values
+
+    def _get_dependency(
+        self,
+        others: Dict[str, pd.DataFrame],
+        feature_class: Type['Feature']
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        '''
+        依存する特徴の main の行の分と another の行の分を返す。
+        FeaturePipeline で作成済みであればそれを使い、なければここで作る。
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        :param feature_class: 依存する特徴クラス
+        '''
+        feature_main = feature_class(train=self.train)  # type: ignore
+        feature_another = feature_class(train=not self.train)  # type: ignore
+        key_main = dependency_key(feature_main.name, 'main')
+        key_another = dependency_key(feature_main.name, 'another')
+        if key_main in others and key_another in others:
+            return others[key_main], others[key_another]
+        return get_feature_pair(
+            feature_main, feature_another, others['main'], others['another'], others, swap_others(others)
+        )
+
+    def cache_key(self, others: Optional[Dict[str, pd.DataFrame]] = None) -> str:
+        '''
+        特徴クラスのソース、コンストラクタの引数、others のデータから決まるキャッシュキーを返す。
+        どれかが変わればキーも変わるので、古いキャッシュを誤って使うことがなくなる。
+        :param others: 特徴を作るための他の Base 以外の DataFrame, dict の形で渡す
+        '''
+        hasher = hashlib.sha256()
+        hasher.update(self._source().encode())
+        hasher.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+        hasher.update(str(self.dtype_policy).encode())
+        for k in CACHE_KEY_OTHERS:
+            if others is not None and k in others:
+                hasher.update(fingerprint(others[k]).encode())
+        return hasher.hexdigest()
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        '''
+        コンストラクタに渡された引数とその値 (省略された引数はデフォルト値)。
+        *args は 'args' に、**kwargs はそのまま展開して入れる。
+        '''
+        signature = inspect.signature(type(self).__init__)
+        params = {}
+        for name, value in self._init_args.items():
+            if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+                params.update(value)
+            else:
+                params[name] = list(value) if isinstance(value, tuple) else value
+        return params
+
+    def _source(self) -> str:
+        '''
+        特徴のモジュールと、そこから (再帰的に) 参照している mykaggle のモジュールのソースをつなげたもの。
+        COLUMNS などのモジュール定数や、transform/groupby などの処理の変更もキャッシュキーに効くようにする。
+        ソースを読めないモジュール (対話的に定義したクラスなど) はクラス名で代用する。
+        '''
+        sources = []
+        for module in _dependency_modules(inspect.getmodule(type(self))):
+            try:
+                sources.append(inspect.getsource(module))
+            except (OSError, TypeError):
+                continue
+        if len(sources) == 0:
+            try:
+                return inspect.getsource(type(self))
+            except (OSError, TypeError):
+                return type(self).__qualname__
+        return '\n'.join(sources)
+
+    def _load_cache(self, cache_key: Optional[str]) -> Optional[pd.DataFrame]:
+        if not self._path.exists():
+            logger.info(f'Creating {self.name_prefix}_{self.name} since it has not been created yet.')
+            return None
+        if not self._meta_path.exists():
+            logger.warning(f'Recreating {self.name_prefix}_{self.name} since its cache has no key.')
+            return None
+        with open(self._meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('key') != cache_key:
+            logger.warning(
+                f'Recreating {self.name_prefix}_{self.name} since its cache is stale: '
+                f'cached params={meta.get("params")}, current params={self.params}'
+            )
+            return None
+        return self._load()
+
     def _load(self) -> pd.DataFrame:
-        return pd.read_feather(self._path)
+        return read_arrow(self._path)
 
-    def _save(self, df: pd.DataFrame) -> None:
+    def _save(self, df: pd.DataFrame, cache_key: Optional[str] = None) -> None:
         '''
         作った特徴を保存する。特徴保存先がない場合は作成する。
         :params df: 保存する特徴の DataFrame
+        :params cache_key: キャッシュキー、指定すると特徴と一緒に保存する
         '''
         if not self._path.parent.exists():
             self._path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_feather(self._path)
+        # 圧縮しないで保存して、FeatureStore などからメモリマップで読めるようにする
+        df.to_feather(self._path, compression='uncompressed')
+        if cache_key is not None:
+            meta = {'key': cache_key, 'class': type(self).__qualname__, 'params': self.params}
+            with open(self._meta_path, 'w') as f:
+                json.dump(meta, f, default=str)
 
     @property
     def _path(self) -> Path:
@@ -92,6 +376,10 @@ class Feature(metaclass=ABCMeta):
             return FEATURE_DIR / self.category / self.name_prefix / name
         return FEATURE_DIR / self.name_prefix / name
 
+    @property
+    def _meta_path(self) -> Path:
+        return self._path.with_suffix('.json')
+
     @property
     def _merge_how(self) -> str:
         return 'left'
@@ -0,0 +1,81 @@
+from typing import Dict, List, Optional
+import pandas as pd
+
+from mykaggle.lib.pandas_util import DTYPE_POLICIES, apply_dtype_policy, decide_dtypes
+
+
+class FeatureMatrixBuilder:
+    '''
+    特徴のブロックを集めておいて、build で一度だけ結合するクラス。
+    特徴ごとに pd.concat([base, feature], axis=1) すると、それまでに結合した全カラムを毎回コピーすることになるので、
+    特徴の数が多いときはこちらを使う。Feature.__call__ に base の代わりに渡すこともできる。
+
+      builder = FeatureMatrixBuilder(df_base_train, dtype_policy='float32')
+      builder = le_train(builder, others=train_others)
+      builder = ce_train(builder, others=train_others)
+      builder_test = FeatureMatrixBuilder(df_base_test, dtype_policy='float32')
+      builder_test = le_test(builder_test, others=test_others)
+      builder_test = ce_test(builder_test, others=test_others)
+      df_f_train, df_f_test = builder.build(builder_test), builder_test.build(builder)
+    '''
+
+    def __init__(self, base: pd.DataFrame, dtype_policy: Optional[str] = None) -> None:
+        '''
+        :param base: 特徴を結合する DataFrame
+        :param dtype_policy: build のときに特徴のカラムにかける dtype のポリシー (pandas_util.DTYPE_POLICIES)
+        '''
+        if dtype_policy is not None and dtype_policy not in DTYPE_POLICIES:
+            raise ValueError(f'dtype policy must be one of {DTYPE_POLICIES}, but got {dtype_policy}')
+        self.base = base
+        self.dtype_policy = dtype_policy
+        self.blocks: List[pd.DataFrame] = []
+        # カラム名 -> そのカラムを追加した特徴の名前
+        self._owners: Dict[str, str] = {c: 'base' for c in base.columns}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._owners.keys())
+
+    def add(
+        self,
+        feature: pd.DataFrame,
+        name: Optional[str] = None,
+        on: Optional[str] = None
+    ) -> 'FeatureMatrixBuilder':
+        '''
+        特徴のブロックを追加する。カラム名が既に追加したものと重複する場合は ValueError.
+        :param feature: 追加する特徴
+        :param name: 特徴の名前、エラーメッセージに使う
+        :param on: 指定すると、index ではなくこのカラムで base に left join する (Feature.__call__ の merge=True)
+        '''
+        name = name or f'block_{len(self.blocks)}'
+        if on is not None:
+            feature = pd.merge(self.base.loc[:, [on]], feature, how='left', on=on).drop(on, axis=1)
+            feature.index = self.base.index
+        duplicated = feature.columns[feature.columns.duplicated()].tolist()
+        if len(duplicated) > 0:
+            raise ValueError(f'{name} has duplicated columns: {duplicated}')
+        duplicated = [c for c in feature.columns if c in self._owners]
+        if len(duplicated) > 0:
+            owners = {c: self._owners[c] for c in duplicated}
+            raise ValueError(f'{name} has columns already added by other features: {owners}')
+        for c in feature.columns:
+            self._owners[c] = name
+        self.blocks.append(feature)
+        return self
+
+    def build(self, another: Optional['FeatureMatrixBuilder'] = None) -> pd.DataFrame:
+        '''
+        base と追加した特徴を一度に結合して返す。
+        :param another: 同じ特徴を同じ順に追加した、もう片方 (train に対する test など) の builder.
+          渡すと dtype_policy の dtype を両方の特徴の値から決めるので、category のコードや int の幅が揃う。
+          None ならこの builder の特徴だけから決める
+        '''
+        blocks = []
+        for i, block in enumerate(self.blocks):
+            if another is not None and self.dtype_policy is not None:
+                dtypes = decide_dtypes([block, another.blocks[i]], self.dtype_policy)
+            else:
+                dtypes = None
+            blocks.append(apply_dtype_policy(block, self.dtype_policy, dtypes))
+        return pd.concat([self.base] + blocks, axis=1)
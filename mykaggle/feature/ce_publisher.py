@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 COLUMNS = [
     'Publisher'
@@ -22,17 +22,10 @@ class CEPublisher(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        # キーを共有の vocabulary のコードにして、文字列をハッシュし直さずに数える
+        vocabulary_whole, vocabulary_main = self._get_vocabulary(others, COLUMNS)
+        df_main = others['main'].assign(**vocabulary_main)
+        df_whole = self._get_whole(others).assign(**vocabulary_whole)
 
-        added_columns = []
-        for c in COLUMNS:
-            count_transformer = BasicGroupByTransform([c], ['id'], ['count'])
-            count_agg = count_transformer(df_whole)
-            df_main = pd.merge(df_main, count_agg, how='left', on=c)
-            added_columns.append(count_agg.columns[-1])
-        return df_main.loc[:, added_columns]
+        count_transformer = MultiGroupByTransform([([c], ['id'], ['count']) for c in COLUMNS])
+        return count_transformer.transform_to(df_whole, df_main)
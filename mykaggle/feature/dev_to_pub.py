@@ -1,6 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
+from mykaggle.transform.groupby import BasicGroupByTransform
 
 
 class DevToPub(Feature):
@@ -17,18 +18,11 @@ class DevToPub(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
-        dev_to_pub = df_whole.groupby('Developer')['Publisher'].apply(list).reset_index()
-        dev_to_pub['num_dev_to_publisher'] = dev_to_pub['Publisher'].apply(lambda x: len(x))
-        dev_to_u_pub = df_whole.groupby('Developer')['Publisher'].apply(set).reset_index()
-        dev_to_u_pub['num_dev_to_unique_publisher'] = dev_to_u_pub['Publisher'].apply(lambda x: len(list(x)))
-
-        df_main = pd.merge(df_main, dev_to_pub, how='left', on='Developer')
-        df_main = pd.merge(df_main, dev_to_u_pub, how='left', on='Developer')
-        return df_main.loc[:, ['num_dev_to_publisher', 'num_dev_to_unique_publisher']]
+        # Publisher が NaN の行も 1 つの Publisher として数える
+        transform = BasicGroupByTransform(['Developer'], ['Publisher'], ['size', 'count_distinct_pairs'])
+        df_output = transform.transform_to(df_whole, df_main)
+        df_output.columns = ['num_dev_to_publisher', 'num_dev_to_unique_publisher']
+        return df_output
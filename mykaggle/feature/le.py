@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
 from mykaggle.feature.base import Feature
+from mykaggle.lib.vocabulary import label_encode
 
 COLUMNS = [
     'Platform',
@@ -30,20 +30,7 @@ class LE(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
-        for c in COLUMNS:
-            df_whole.loc[:, c] = df_whole.loc[:, c].fillna("NaN")
-            df_main.loc[:, c] = df_main.loc[:, c].fillna("NaN")
-            df_main['le_' + c] = self.fit_transform_le(df_whole.loc[:, c], df_main.loc[:, c])
-        columns = ['le_' + c for c in COLUMNS]
-        return df_main.loc[:, columns]
-
-    def fit_transform_le(self, whole: pd.Series, x: pd.Series):
-        le = LabelEncoder()
-        le.fit(whole)
-        return le.transform(x)
+        vocabulary_whole, vocabulary_main = self._get_vocabulary(others, COLUMNS)
+        # fillna("NaN") して whole で fit した LabelEncoder と同じコードを、共有の vocabulary から作る
+        output = {'le_' + c: label_encode(vocabulary_whole.loc[:, c], vocabulary_main.loc[:, c]) for c in COLUMNS}
+        return pd.DataFrame(output, index=others['main'].index)
@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.lib.pandas_util import change_column_name
+from mykaggle.transform.groupby import take_groups
 
 
 class MultiPlatform(Feature):
@@ -18,14 +18,7 @@ class MultiPlatform(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
-
-        multi_platform = (df_whole.loc[:, ['Name']].value_counts()).reset_index()
-        multi_platform = change_column_name(multi_platform, 0, 'multi_pf_count')
-        df_main = pd.merge(df_main, multi_platform, how='left', on='Name')
-        return df_main.loc[:, ['multi_pf_count']]
+        name_index, name_main = self._get_name_index(others)
+        # Name ごとの whole の行数、Name が NaN の行は NaN
+        multi_pf_count = take_groups(name_index.sizes, name_main)
+        return pd.DataFrame({'multi_pf_count': multi_pf_count}, index=others['main'].index)
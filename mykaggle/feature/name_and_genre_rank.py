@@ -1,6 +1,8 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
+from mykaggle.transform.groupby import MultiGroupByTransform
+from mykaggle.transform.rank import GroupRankTransform
 
 
 class NameAndGenreRank(Feature):
@@ -17,16 +19,16 @@ class NameAndGenreRank(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-
-        df_main_sorted_name = df_main.sort_values(['Name', 'Year_of_Release'])
-        df_main_sorted_genre = df_main.sort_values(['Genre', 'Year_of_Release'])
-
-        ny_rank = df_main_sorted_name.groupby(['Name', 'Year_of_Release']).cumcount()
-        gy_rank = df_main_sorted_genre.groupby(['Genre', 'Year_of_Release']).cumcount()
-        ny_count = df_main_sorted_name.groupby(['Name', 'Year_of_Release'])['Name'].transform('count')
-        gy_count = df_main_sorted_genre.groupby(['Genre', 'Year_of_Release'])['Name'].transform('count')
-        df_main['Name_rank_num_per'] = (ny_rank / ny_count).sort_index()
-        df_main['Genre_rank_num_per'] = (gy_rank / gy_count).sort_index()
-
-        return df_main.loc[:, ['Name_rank_num_per', 'Genre_rank_num_per']]
+        # Name, Genre は共有の vocabulary のコードにして、ハッシュし直さずにグループを作る
+        vocabulary_main = self._get_vocabulary(others, ['Name', 'Genre'])[1]
+        df_main = others['main'].assign(**vocabulary_main)
+        name_year, genre_year = GroupRankTransform([
+            (['Name', 'Year_of_Release'], None),
+            (['Genre', 'Year_of_Release'], None),
+        ]).ranks(df_main)
+        # Genre の方はグループ内で Name が NaN でない行数で割る
+        genre_count = MultiGroupByTransform([(['Genre', 'Year_of_Release'], ['Name'], ['count'])]).transform_to(df_main)
+        return pd.DataFrame({
+            'Name_rank_num_per': name_year.cumcount / name_year.size,
+            'Genre_rank_num_per': genre_year.cumcount / genre_count.iloc[:, 0].values,
+        }, index=df_main.index)
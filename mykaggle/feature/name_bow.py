@@ -1,10 +1,11 @@
 from typing import Optional, Dict, Tuple
 import pandas as pd
 import numpy as np
-from sklearn.decomposition import PCA
-from sklearn.feature_extraction.text import CountVectorizer
+import scipy.sparse as sp
 
 from mykaggle.feature.base import Feature
+from mykaggle.text import preprocess_text
+from mykaggle.transform.bow import get_bow, sparse_pca
 
 
 class NameBOW(Feature):
@@ -35,29 +36,17 @@ class NameBOW(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others, copy=True)
 
-        def preprocess(x: str) -> str:
-            x = x.replace(',', '')
-            x = x.replace(':', ' ')
-            x = x.replace('!', ' ')
-            x = x.replace('\'s', ' ')
-            x = x.replace('  ', ' ')
-            return x.lower()
-
-        df_whole.loc[:, 'processed_name'] = df_whole.loc[:, 'Name'].astype(str).apply(preprocess)
-        df_main.loc[:, 'processed_name'] = df_main.loc[:, 'Name'].astype(str).apply(preprocess)
+        df_whole.loc[:, 'processed_name'] = preprocess_text(df_whole.loc[:, 'Name'])
+        df_main.loc[:, 'processed_name'] = preprocess_text(df_main.loc[:, 'Name'])
         unique_name = pd.DataFrame(df_whole['processed_name'].unique(), columns=['processed_name'])
 
         bow1 = self._get_bow(unique_name.loc[:, 'processed_name'].values,
                              (1, 1), self.word_count_th1, self.threshold_upper1)
         bow2 = self._get_bow(unique_name.loc[:, 'processed_name'].values,
                              (2, 4), self.word_count_th2, self.threshold_upper2)
-        bow = np.concatenate([bow1, bow2], axis=1)
+        bow = sp.hstack([bow1, bow2], format='csr')
         df_pca = self._get_df_pca(bow, self.n_components, self.word_count_th1, self.word_count_th2)
         unique_name = pd.concat([unique_name, df_pca], axis=1)
 
@@ -71,15 +60,11 @@ class NameBOW(Feature):
         ngram_range: Tuple[int, int],
         word_count_th: int,
         th_upper: int = 1000000
-    ) -> np.ndarray:
-        vectorizer = CountVectorizer(ngram_range=ngram_range)
-        bow = vectorizer.fit_transform(texts)
-        word_count = bow.toarray().sum(axis=0)
-        bow = bow.toarray()[:, (word_count > word_count_th) & (word_count < th_upper)]
+    ) -> sp.csr_matrix:
+        _, bow = get_bow(texts, ngram_range, word_count_th, th_upper)
         return bow
 
-    def _get_df_pca(self, bow: np.ndarray, n_components: int, th1: int, th2: int) -> pd.DataFrame:
-        pca = PCA(n_components)
-        bow_pca = pca.fit_transform(bow)
+    def _get_df_pca(self, bow: sp.csr_matrix, n_components: int, th1: int, th2: int) -> pd.DataFrame:
+        bow_pca = sparse_pca(bow, n_components)
         pca_columns = [f'pca_{n}_name_bow_gt_count_{th1}_{th2}' for n in range(n_components)]
         return pd.DataFrame(bow_pca, columns=pca_columns)
@@ -2,11 +2,11 @@ from typing import Optional, Dict, Tuple
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer
-import texthero
-from texthero import preprocessing
 
-from mykaggle.lib.pandas_util import change_column_name
+from mykaggle.lib.aho_corasick import AhoCorasick
 from mykaggle.feature.base import Feature
+from mykaggle.text import clean_text
+from mykaggle.transform.groupby import take_groups
 
 
 class NameSeriesCount(Feature):
@@ -37,14 +37,10 @@ class NameSeriesCount(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others, copy=True)
 
-        df_whole.loc[:, 'clean_name'] = self._clean(df_whole.loc[:, 'Name'])
-        df_main.loc[:, 'clean_name'] = self._clean(df_main.loc[:, 'Name'])
+        df_whole.loc[:, 'clean_name'] = clean_text(df_whole.loc[:, 'Name'])
+        df_main.loc[:, 'clean_name'] = clean_text(df_main.loc[:, 'Name'])
 
         series_count1 = self._get_top_text_ngrams(df_whole.loc[:, 'clean_name'], 100000, (1, 1), 50)
         series_count1 = dict(series_count1[::-1])
@@ -53,24 +49,15 @@ class NameSeriesCount(Feature):
         series_count3 = self._get_top_text_ngrams(df_whole.loc[:, 'clean_name'], 100000, (3, 3), 10)
         series_count3 = dict(series_count3[::-1])
 
-        df_main['num_word_series_1'] = 0
-        for i in series_count1:
-            if len(i) < 5:
-                continue
-            idx = df_main[df_main.loc[:, 'clean_name'].str.startswith(i)].index
-            df_main.loc[idx, 'num_word_series_1'] = series_count1[i]
-        df_main['num_word_series_2'] = 0
-        for i in series_count2:
-            idx = df_main[df_main.loc[:, 'clean_name'].str.startswith(i)].index
-            df_main.loc[idx, 'num_word_series_2'] = series_count2[i]
-        df_main['num_word_series_3'] = 0
-        for i in series_count3:
-            idx = df_main[df_main.loc[:, 'clean_name'].str.contains(i)].index
-            df_main.loc[idx, 'num_word_series_3'] = series_count3[i]
+        series_count1 = {k: v for k, v in series_count1.items() if len(k) >= 5}
+        df_main['num_word_series_1'] = self._match_series(df_main.loc[:, 'clean_name'], series_count1, prefix=True)
+        df_main['num_word_series_2'] = self._match_series(df_main.loc[:, 'clean_name'], series_count2, prefix=True)
+        df_main['num_word_series_3'] = self._match_series(df_main.loc[:, 'clean_name'], series_count3, prefix=False)
 
-        name_platform = df_whole.groupby('Name')['Platform'].nunique()
-        name_platform = change_column_name(name_platform, 'Platform', 'nunique_platform')
-        df_main = pd.merge(df_main, name_platform, how='left', on='Name')
+        name_index, name_main = self._get_name_index(others)
+        platforms = self._get_vocabulary(others, ['Platform'])[0].loc[:, 'Platform']
+        name_platform = name_index.nunique(platforms.cat.codes.values, len(platforms.cat.categories))
+        df_main['nunique_platform'] = take_groups(name_platform, name_main)
         df_main['num_word_series_1'] = df_main.loc[:, 'num_word_series_1'] / df_main.loc[:, 'nunique_platform']
         df_main['num_word_series_2'] = df_main.loc[:, 'num_word_series_2'] / df_main.loc[:, 'nunique_platform']
         df_main['num_word_series_3'] = df_main.loc[:, 'num_word_series_3'] / df_main.loc[:, 'nunique_platform']
@@ -81,6 +68,16 @@ class NameSeriesCount(Feature):
 
         return df_main.loc[:, ['num_word_series_1', 'num_word_series_2', 'num_word_series_3']]
 
+    def _match_series(self, names: pd.Series, series_count: Dict[str, int], prefix: bool) -> np.ndarray:
+        '''
+        各名前に一致する series のうち、series_count で最後のものの出現回数を返す。一致しなければ 0.
+        :param prefix: True なら前方一致、False なら部分一致
+        '''
+        matcher = AhoCorasick(list(series_count.keys()))
+        matched = matcher.last_prefix_match(names) if prefix else matcher.last_substring_match(names)
+        counts = np.array(list(series_count.values()) + [0], dtype=np.int64)
+        return counts[matched]
+
     def _get_top_text_ngrams(self, corpus: np.ndarray, n: int, g: Tuple[int, int], s: int):
         vec = CountVectorizer(ngram_range=g).fit(corpus)
         bag_of_words = vec.transform(corpus)
@@ -88,14 +85,3 @@ class NameSeriesCount(Feature):
         words_freq = [(word, sum_words[0, idx]) for word, idx in vec.vocabulary_.items() if sum_words[0, idx] > s]
         words_freq = sorted(words_freq, key=lambda x: x[1], reverse=True)
         return words_freq[:n]
-
-    def _clean(self, series: pd.Series) -> pd.Series:
-        custom_pipeline = [
-            preprocessing.fillna,
-            preprocessing.lowercase,
-            preprocessing.remove_digits,
-            preprocessing.remove_punctuation,
-            preprocessing.remove_diacritics,
-            preprocessing.remove_whitespace
-        ]
-        return texthero.clean(series, pipeline=custom_pipeline)
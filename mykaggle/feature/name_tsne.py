@@ -0,0 +1,130 @@
+from typing import Dict, List, NamedTuple, Optional
+from pathlib import Path
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from mykaggle.feature.base import Feature
+from mykaggle.lib.memo import Memo
+from mykaggle.text import hash_texts, preprocess_text
+from mykaggle.transform.bow import BOWTransform, get_bow
+from mykaggle.transform.tsne import TSNETransform
+
+# train と test の特徴で同じモデルを使い回すためのキャッシュ
+MAX_FITTED_EMBEDDINGS = 8
+_fitted_embeddings = Memo(MAX_FITTED_EMBEDDINGS)
+
+
+class NameEmbeddingModel(NamedTuple):
+    '''
+    NameTSNE で fit した結果。embedding の i 行目が names の i 番目の (前処理した) 名前に対応する。
+    '''
+    bows: List[BOWTransform]
+    tsne: TSNETransform
+    names: pd.Index
+    embedding: np.ndarray
+    columns: List[str]
+
+    def transform(self, names: pd.Series) -> pd.DataFrame:
+        '''
+        前処理した名前の埋め込みを返す。fit した名前はその埋め込みを、新しい名前は近傍から求めた埋め込みを使う。
+        '''
+        rows = self.names.get_indexer(names)
+        output = np.empty((len(names), len(self.columns)))
+        known = rows >= 0
+        output[known] = self.embedding[rows[known]]
+        unseen = names[~known].unique()
+        if len(unseen) > 0:
+            bow = sp.hstack([b.transform(unseen) for b in self.bows], format='csr')
+            embedding = self.tsne.transform(bow)
+            output[~known] = embedding[pd.Index(unseen).get_indexer(names[~known])]
+        return pd.DataFrame(output, columns=self.columns, index=names.index)
+
+
+class NameTSNE(Feature):
+    '''
+    名前の BoW (または TFIDF) を t-SNE で埋め込む。1単語と複数単語で分けた。
+    モデルは train と test をつなげたデータのユニークな名前から一度だけ fit してプロセス内でメモし、
+    train と test の特徴はどちらもそのモデルから作る。fit していない名前も fit し直さずに埋め込める。
+    プロセスをまたいで使い回すときは model_dir を指定する (例: NameTSNE.model_dir = FEATURE_DIR / 'model')。
+    '''
+
+    # fit したモデルの保存先、None なら保存しない
+    model_dir: Optional[Path] = None
+
+    def __init__(
+        self,
+        train: bool = True,
+        tfidf: bool = False,
+        n_components: int = 2,
+        word_count_th1: int = 5,
+        word_count_th2: int = 3,
+        threshold_upper1: Optional[int] = None,
+        threshold_upper2: Optional[int] = None,
+        svd_components: int = 50,
+        n_neighbors: int = 10,
+        name: Optional[str] = None
+    ) -> None:
+        '''
+        :param tfidf: True なら TFIDF, False なら BoW を使う
+        :param n_components: 埋め込みの次元数、3 以下
+        :param word_count_th1: 1単語の BoW でこれより多く出てくる単語だけ使う
+        :param word_count_th2: 2-4単語の BoW でこれより多く出てくるものだけ使う
+        :param threshold_upper1: 1単語の BoW でこれより少なく出てくる単語だけ使う、None なら上限なし
+        :param threshold_upper2: 2-4単語の BoW でこれより少なく出てくるものだけ使う、None なら上限なし
+        :param svd_components: t-SNE の前に TruncatedSVD で落とす次元数
+        :param n_neighbors: fit していない名前の埋め込みに使う近傍の数
+        :param name: 特徴の名前
+        '''
+        super().__init__(name=name or ('name_tfidf_tsne' if tfidf else 'name_bow_tsne'), train=train)
+        self.tfidf = tfidf
+        self.n_components = n_components
+        self.word_count_th1 = word_count_th1
+        self.word_count_th2 = word_count_th2
+        self.threshold_upper1 = threshold_upper1
+        self.threshold_upper2 = threshold_upper2
+        self.svd_components = svd_components
+        self.n_neighbors = n_neighbors
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        df_main = others['main']
+        df_whole = self._get_whole(others)
+        model = self.fit(preprocess_text(df_whole.loc[:, 'Name']).unique())
+        return model.transform(preprocess_text(df_main.loc[:, 'Name']))
+
+    def fit(self, names: np.ndarray) -> NameEmbeddingModel:
+        '''
+        前処理したユニークな名前で fit したモデルを返す。同じ設定と名前で fit 済みならそれを返す。
+        '''
+        key = self.model_key(names)
+        path = self.model_dir / f'name_tsne_{key}.pkl' if self.model_dir is not None else None
+        return _fitted_embeddings.get(key, lambda: self._fit(names), path)
+
+    def model_key(self, names: np.ndarray) -> str:
+        hasher = hashlib.sha256()
+        config = [
+            self.tfidf, self.n_components, self.word_count_th1, self.word_count_th2,
+            self.threshold_upper1, self.threshold_upper2, self.svd_components, self.n_neighbors
+        ]
+        hasher.update(json.dumps(config).encode())
+        hasher.update(hash_texts(names).encode())
+        return hasher.hexdigest()
+
+    def _fit(self, names: np.ndarray) -> NameEmbeddingModel:
+        bow1, matrix1 = get_bow(names, (1, 1), self.word_count_th1, self.threshold_upper1, tfidf=self.tfidf)
+        bow2, matrix2 = get_bow(names, (2, 4), self.word_count_th2, self.threshold_upper2, tfidf=self.tfidf)
+        tsne = TSNETransform(self.n_components, self.svd_components, self.n_neighbors)
+        embedding = tsne.fit_transform(sp.hstack([matrix1, matrix2], format='csr'))
+        kind = 'tfidf' if self.tfidf else 'bow'
+        columns = [
+            f'tsne_{n}_name_{kind}_gt_count_{self.word_count_th1}_{self.word_count_th2}'
+            for n in range(self.n_components)
+        ]
+        return NameEmbeddingModel([bow1, bow2], tsne, pd.Index(names), embedding, columns)
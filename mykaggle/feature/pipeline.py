@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+import pandas as pd
+
+from mykaggle.feature.base import Feature, dependency_key, get_feature_pair
+from mykaggle.lib.name_index import NameIndex
+from mykaggle.lib.vocabulary import build_vocabulary
+from mykaggle.util.logger import get_logger
+
+FeatureSpec = Tuple[Type[Feature], Dict[str, Any]]
+logger = get_logger(__name__)
+
+
+class FeatureNode(NamedTuple):
+    '''
+    FeaturePipeline の依存グラフのノード。
+    '''
+    feature_class: Type[Feature]
+    params: Dict[str, Any]
+    name: str
+    dependencies: List[int]
+    # False なら他の特徴の依存として作るだけで、出力には含めない
+    emit: bool
+
+
+def create_features(
+    feature_class: Type[Feature],
+    params: Dict[str, Any],
+    train_others: Dict[str, pd.DataFrame],
+    test_others: Dict[str, pd.DataFrame],
+    base_train: pd.DataFrame,
+    base_test: pd.DataFrame,
+    use_cache: bool = False,
+    save_cache: bool = False,
+    dtype_policy: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    '''
+    1 つの特徴クラスについて train, test の特徴を作る。
+    dtype_policy を指定すると、特徴クラスの dtype_policy の代わりに使う。dtype は train と test の両方の出力から決める。
+    '''
+    feature_train = feature_class(train=True, **params)  # type: ignore
+    feature_test = feature_class(train=False, **params)  # type: ignore
+    if dtype_policy is not None:
+        feature_train.dtype_policy = feature_test.dtype_policy = dtype_policy
+    logger.info(f'Creating {feature_train.name}')
+    return get_feature_pair(
+        feature_train, feature_test, base_train, base_test, train_others, test_others, use_cache, save_cache
+    )
+
+
+def add_dependencies(
+    train_others: Dict[str, pd.DataFrame],
+    test_others: Dict[str, pd.DataFrame],
+    dependencies: List[Tuple[str, pd.DataFrame, pd.DataFrame]]
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+    '''
+    作成済みの依存特徴 (名前, train の特徴, test の特徴) を others に追加したものを返す。
+    '''
+    train_others = dict(train_others)
+    test_others = dict(test_others)
+    for name, block_train, block_test in dependencies:
+        train_others[dependency_key(name, 'main')] = block_train
+        train_others[dependency_key(name, 'another')] = block_test
+        test_others[dependency_key(name, 'main')] = block_test
+        test_others[dependency_key(name, 'another')] = block_train
+    return train_others, test_others
+
+
+class FeaturePipeline:
+    '''
+    複数の特徴の train / test を一度に作るクラス。
+    train と test をつなげた df_whole は一度だけ作り、others['whole'] として全特徴で共有する。
+    Feature.dependencies に書かれた特徴は先に作り、依存する特徴に渡す。
+    '''
+
+    def __init__(
+        self,
+        features: List[Union[Type[Feature], FeatureSpec]],
+        dtype_policy: Optional[str] = None
+    ) -> None:
+        '''
+        :param features: 特徴クラス、または (特徴クラス, train 以外のコンストラクタ引数) のリスト
+        :param dtype_policy: 全特徴の出力にかける dtype のポリシー e.g.) 'compact', None なら特徴クラスの設定のまま
+        '''
+        self.features: List[FeatureSpec] = [f if isinstance(f, tuple) else (f, {}) for f in features]
+        self.dtype_policy = dtype_policy
+
+    def build_others(
+        self,
+        df_train: pd.DataFrame,
+        df_test: pd.DataFrame,
+        df_whole: Optional[pd.DataFrame] = None
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+        '''
+        train 用と test 用の others を作る。'whole' と、そのカテゴリカラムを一度だけ factorize した
+        'vocabulary' (mykaggle.lib.vocabulary.build_vocabulary), Name があればその行をタイトルごとにまとめた
+        'name_index' (mykaggle.lib.name_index.NameIndex) は同じものを共有する。
+        :param df_whole: train と test をつなげたもの、None ならここでつなげる
+        '''
+        if df_whole is None:
+            df_whole = pd.concat([df_train, df_test])
+        shared: Dict[str, Any] = {'whole': df_whole, 'vocabulary': build_vocabulary(df_whole)}
+        if 'Name' in shared['vocabulary'].columns:
+            names = shared['vocabulary'].loc[:, 'Name']
+            shared['name_index'] = NameIndex.from_codes(names.cat.codes.values, len(names.cat.categories))
+        train_others = {'main': df_train, 'another': df_test, **shared}
+        test_others = {'main': df_test, 'another': df_train, **shared}
+        return train_others, test_others
+
+    def build_graph(self) -> List[FeatureNode]:
+        '''
+        指定された特徴と、その依存特徴をノードにした依存グラフを作る。
+        指定されていない依存特徴はデフォルトの引数で追加する。
+        '''
+        specs = [(feature_class, params, True) for feature_class, params in self.features]
+        index: Dict[Type[Feature], int] = {}
+        i = 0
+        while i < len(specs):
+            feature_class = specs[i][0]
+            index.setdefault(feature_class, i)
+            for dependency in feature_class.dependencies:
+                if all(s[0] is not dependency for s in specs):
+                    specs.append((dependency, {}, False))
+            i += 1
+
+        nodes = []
+        for feature_class, params, emit in specs:
+            name = feature_class(train=True, **params).name  # type: ignore
+            dependencies = [index[d] for d in feature_class.dependencies]
+            nodes.append(FeatureNode(feature_class, params, name, dependencies, emit))
+        return nodes
+
+    def sort_graph(self, nodes: List[FeatureNode]) -> List[int]:
+        '''
+        依存先が先にくるようにノードの順番を返す。循環している場合は ValueError.
+        '''
+        order: List[int] = []
+        done = set()
+        while len(order) < len(nodes):
+            ready = [i for i, node in enumerate(nodes)
+                     if i not in done and all(d in done for d in node.dependencies)]
+            if len(ready) == 0:
+                cycle = [nodes[i].name for i in range(len(nodes)) if i not in done]
+                raise ValueError(f'features have cyclic dependencies: {cycle}')
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def run(
+        self,
+        df_train: pd.DataFrame,
+        df_test: pd.DataFrame,
+        base_train: Optional[pd.DataFrame] = None,
+        base_test: Optional[pd.DataFrame] = None,
+        use_cache: bool = False,
+        save_cache: bool = False
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        '''
+        全特徴を作って train, test の特徴 DataFrame を返す。結合は最後に一度だけ行う。
+        :param df_train: train の元データ
+        :param df_test: test の元データ
+        :param base_train: train の特徴を結合する DataFrame, 指定しなければ id だけのもの
+        :param base_test: test の特徴を結合する DataFrame, 指定しなければ id だけのもの
+        :param use_cache: キャッシュを使うかどうか
+        :param save_cache: 作成した特徴を保存するかどうか
+        '''
+        if base_train is None:
+            base_train = df_train.loc[:, ['id']]
+        if base_test is None:
+            base_test = df_test.loc[:, ['id']]
+        train_others, test_others = self.build_others(df_train, df_test)
+
+        nodes = self.build_graph()
+        blocks: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        for i in self.sort_graph(nodes):
+            node = nodes[i]
+            dependencies = [(nodes[d].name, *blocks[d]) for d in node.dependencies]
+            node_train_others, node_test_others = add_dependencies(train_others, test_others, dependencies)
+            blocks[i] = create_features(
+                node.feature_class, node.params, node_train_others, node_test_others,
+                base_train, base_test, use_cache, save_cache, self.dtype_policy
+            )
+        return self._concat(nodes, blocks, base_train, base_test)
+
+    def _concat(
+        self,
+        nodes: List[FeatureNode],
+        blocks: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]],
+        base_train: pd.DataFrame,
+        base_test: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        blocks_train = [base_train] + [blocks[i][0] for i, node in enumerate(nodes) if node.emit]
+        blocks_test = [base_test] + [blocks[i][1] for i, node in enumerate(nodes) if node.emit]
+        return pd.concat(blocks_train, axis=1), pd.concat(blocks_test, axis=1)
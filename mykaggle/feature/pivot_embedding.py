@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+from pathlib import Path
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.decomposition import TruncatedSVD
+
+from mykaggle.feature.base import Feature
+from mykaggle.lib.memo import Memo
+from mykaggle.lib.pandas_util import fingerprint
+from mykaggle.transform.bow import fit_sparse_pca
+from mykaggle.transform.groupby import take_groups
+from mykaggle.transform.pivot import SparsePivot, SparsePivotTransform, hstack_pivots
+
+METHODS = ['pca', 'svd', 'kmeans']
+DEFAULT_CATEGORIES = ['Genre', 'Platform', 'Year_of_Release']
+# train と test の特徴で同じモデルを使い回すためのキャッシュ
+MAX_FITTED_EMBEDDINGS = 16
+_fitted_embeddings = Memo(MAX_FITTED_EMBEDDINGS)
+
+
+class PivotEmbeddingModel(NamedTuple):
+    '''
+    PivotEmbedding で fit した結果。embedding の i 行目が pivot.index の i 行目の entity に対応する。
+    '''
+    pivot: SparsePivot
+    estimators: List[Any]
+    embedding: np.ndarray
+    columns: List[str]
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        df の各行の entity の埋め込みを返す。fit したデータにない entity は NaN.
+        '''
+        rows = self.pivot.rows_for(df)
+        output = {column: take_groups(self.embedding[:, i], rows) for i, column in enumerate(self.columns)}
+        return pd.DataFrame(output, index=df.index)
+
+
+class PivotEmbedding(Feature):
+    '''
+    entity から見た各カテゴリの出現数の pivot を PCA / TruncatedSVD / KMeans で埋め込む。
+    モデルは train と test をつなげたデータから (設定, データ) ごとに一度だけ fit してプロセス内でメモし、
+    train と test の特徴はどちらもそのモデルから作る。
+    プロセスをまたいで使い回すときは model_dir を指定する (例: PivotEmbedding.model_dir = FEATURE_DIR / 'model')。
+    '''
+
+    # fit したモデルの保存先、None なら保存しない
+    model_dir: Optional[Path] = None
+
+    def __init__(
+        self,
+        train: bool = True,
+        entity: str = 'Publisher',
+        categories: Optional[List[str]] = None,
+        method: str = 'pca',
+        n_components: int = 3,
+        n_clusters: int = 8,
+        combine: bool = True,
+        name: Optional[str] = None
+    ) -> None:
+        '''
+        :param entity: 埋め込む対象のカラム
+        :param categories: pivot の column にするカラム
+        :param method: pca, svd, kmeans のどれか。kmeans は PCA した後にクラスタリングする
+        :param n_components: 埋め込みの次元数
+        :param n_clusters: kmeans のクラスタ数
+        :param combine: True なら全カテゴリの pivot を並べて一度に、False ならカテゴリごとに埋め込む
+        :param name: 特徴の名前、指定しなければ設定から作る
+        '''
+        if method not in METHODS:
+            raise ValueError(f'method must be one of {METHODS}, but got {method}')
+        self.entity = entity
+        self.categories = categories if categories is not None else DEFAULT_CATEGORIES
+        self.method = method
+        self.n_components = n_components
+        self.n_clusters = n_clusters
+        self.combine = combine
+        if name is None:
+            name = '_'.join([entity.lower(), 'pivot', method, 'all' if combine else 'each'] + self.categories)
+        super().__init__(name=name, train=train)
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        df_main = others['main']
+        df_whole = self._get_whole(others)
+        return self.fit(df_whole).transform(df_main)
+
+    def fit(self, df_whole: pd.DataFrame) -> PivotEmbeddingModel:
+        '''
+        df_whole で fit したモデルを返す。同じ設定とデータで fit 済みならそれを返す。
+        '''
+        key = self.model_key(df_whole)
+        path = self.model_dir / f'pivot_embedding_{key}.pkl' if self.model_dir is not None else None
+        return _fitted_embeddings.get(key, lambda: self._fit(df_whole), path)
+
+    def model_key(self, df_whole: pd.DataFrame) -> str:
+        '''
+        埋め込みの設定と、pivot に使うカラムのデータから決まるキー。
+        train と test で同じ df_whole を使うので、どちらの特徴からも同じキーになる。
+        '''
+        hasher = hashlib.sha256()
+        config = [self.entity, self.categories, self.method, self.n_components, self.n_clusters, self.combine]
+        hasher.update(json.dumps(config).encode())
+        hasher.update(fingerprint(df_whole.loc[:, [self.entity] + self.categories]).encode())
+        return hasher.hexdigest()
+
+    def _fit(self, df_whole: pd.DataFrame) -> PivotEmbeddingModel:
+        pivots = [
+            SparsePivotTransform(indices=[self.entity], column=c, target='id', agg='count')(df_whole)
+            for c in self.categories
+        ]
+        if self.combine:
+            pivot = hstack_pivots(pivots, drop_empty_rows=True)
+            estimators, embedding = self._embed(pivot)
+            return PivotEmbeddingModel(pivot, estimators, embedding, self._columns('all'))
+
+        # カテゴリごとの埋め込みを entity の全行に揃えて並べる
+        pivot = hstack_pivots(pivots)
+        estimators, embeddings = [], []
+        for c, category_pivot in zip(self.categories, pivots):
+            nonempty = np.diff(category_pivot.matrix.indptr) > 0
+            category_estimators, category_embedding = self._embed(category_pivot.drop_empty_rows())
+            embedding = np.full((len(nonempty), category_embedding.shape[1]), np.nan)
+            embedding[nonempty] = category_embedding
+            estimators.extend(category_estimators)
+            embeddings.append(embedding)
+        columns = [column for c in self.categories for column in self._columns(c)]
+        return PivotEmbeddingModel(pivot, estimators, np.hstack(embeddings), columns)
+
+    def _embed(self, pivot: SparsePivot) -> Any:
+        matrix = pivot.matrix
+        if self.method == 'svd':
+            svd = TruncatedSVD(self.n_components, random_state=1019)
+            embedding = svd.fit_transform(matrix)
+            estimators: List[Any] = [svd]
+        else:
+            pca, embedding = fit_sparse_pca(matrix, self.n_components)
+            estimators = [pca]
+        if self.method == 'kmeans':
+            kmeans = KMeans(n_clusters=self.n_clusters, random_state=1019)
+            return estimators + [kmeans], kmeans.fit_predict(embedding)[:, np.newaxis]
+        # 成分は後ろから順に pca_0, pca_1, ... とする
+        return estimators, embedding[:, ::-1]
+
+    def _columns(self, category: str) -> List[str]:
+        if self.method == 'kmeans':
+            return ['_'.join(['kmeans_cluster_by', self.entity, 'pivotby', category])]
+        return [
+            '_'.join([self.method, str(n), 'count_id_pivotby', self.entity, 'for', category])
+            for n in range(self.n_components)
+        ]
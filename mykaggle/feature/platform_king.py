@@ -20,11 +20,7 @@ class PlatformKing(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others)
 
         df_platform = self.get_platform_rank(df_whole)
         df_platform = df_platform[df_platform.loc[:, 'rank'] <= 3.0]
@@ -2,6 +2,7 @@ from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
 from mykaggle.feature.year_rank5 import YearRank5
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 COLUMNS = [
     'Platform',
@@ -16,6 +17,8 @@ class PlatformTimeDiff(Feature):
     Name 以外の全カテゴリのラベルエンコーディング
     '''
 
+    dependencies = [YearRank5]
+
     def __init__(self, train: bool = True) -> None:
         super().__init__(name='platform_time_diff', train=train)
 
@@ -25,19 +28,14 @@ class PlatformTimeDiff(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        year_rank = YearRank5(train=self.train)
-        df_main = year_rank(df_main, others=others, use_cache=False, save_cache=False)
-        df_another = year_rank(df_another, others=others, use_cache=False, save_cache=False)
+        year_rank_main, year_rank_another = self._get_dependency(others, YearRank5)
+        vocabulary_whole, vocabulary_main = self._get_vocabulary(others, ['Platform'])
         if self.train:
-            df_whole = pd.concat([df_main, df_another])
+            year_rank_whole = pd.concat([year_rank_main, year_rank_another])
         else:
-            df_whole = pd.concat([df_another, df_main])
-        pf_to_yor = df_whole.groupby('Platform')['year_rank_plus'].agg(['min', 'max']).reset_index()
-        pf_to_yor.columns = ['Platform', 'platform_year_rank_min', 'platform_year_rank_max']
-        df_main = pd.merge(df_main, pf_to_yor, how='left', on='Platform')
-        df_main['diff_platform_min'] = df_main.loc[:, 'year_rank_plus'] - df_main.loc[:, 'platform_year_rank_min']
-        df_main['diff_platform_max'] = df_main.loc[:, 'platform_year_rank_max'] - df_main.loc[:, 'year_rank_plus']
-
-        return df_main.loc[:, ['diff_platform_min']]
+            year_rank_whole = pd.concat([year_rank_another, year_rank_main])
+        df_main = vocabulary_main.assign(year_rank_plus=year_rank_main.loc[:, 'year_rank_plus'].values)
+        df_whole = vocabulary_whole.assign(year_rank_plus=year_rank_whole.loc[:, 'year_rank_plus'].values)
+        pf_to_yor = MultiGroupByTransform([(['Platform'], ['year_rank_plus'], ['min'])]).transform_to(df_whole, df_main)
+        diff_platform_min = df_main.loc[:, 'year_rank_plus'] - pf_to_yor.iloc[:, 0]
+        return pd.DataFrame({'diff_platform_min': diff_platform_min}, index=df_main.index)
@@ -2,7 +2,7 @@ from typing import Optional, Dict
 import pandas as pd
 
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 SALES_COLUMNS = [
     'JP_Sales',
@@ -34,7 +34,7 @@ class PlatformToRegionHasSales(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
             df_train = others['main'].copy()
         else:
@@ -44,10 +44,5 @@ class PlatformToRegionHasSales(Feature):
         for c in SALES_COLUMNS:
             df_train[f'has_{c}'] = df_train.loc[:, c].fillna(0) > 0
 
-        added_columns = []
-        for c in COLUMNS:
-            transform = BasicGroupByTransform(keys=[c], targets=has_sales_columns, aggs=['mean'])
-            platform_sales_mean = transform(df_train)
-            df_main = pd.merge(df_main, platform_sales_mean, how='left', on=c)
-            added_columns.extend(platform_sales_mean.columns[1:])
-        return df_main.loc[:, added_columns]
+        transform = MultiGroupByTransform([([c], has_sales_columns, ['mean']) for c in COLUMNS])
+        return transform.transform_to(df_train, df_main)
@@ -2,7 +2,7 @@ from typing import Optional, Dict
 import pandas as pd
 
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 SALES_COLUMNS = [
     'JP_Sales',
@@ -34,16 +34,11 @@ class PlatformToRegionSales(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
-            df_train = others['main'].copy()
+            df_train = others['main']
         else:
-            df_train = others['another'].copy()
-
-        added_columns = []
-        for c in COLUMNS:
-            transform = BasicGroupByTransform(keys=[c], targets=SALES_COLUMNS, aggs=['mean'])
-            platform_sales = transform(df_train)
-            df_main = pd.merge(df_main, platform_sales, how='left', on=c)
-            added_columns.extend(platform_sales.columns[1:])
-        return df_main.loc[:, added_columns]
+            df_train = others['another']
+
+        transform = MultiGroupByTransform([([c], SALES_COLUMNS, ['mean']) for c in COLUMNS])
+        return transform.transform_to(df_train, df_main)
@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 TARGET_COLUMNS = [
     'User_Score',
@@ -28,17 +28,11 @@ class PlatformToScores(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others, copy=True)
 
         df_whole.loc[df_whole.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
         df_whole.loc[:, 'User_Score'] = df_whole.loc[:, 'User_Score'].astype(np.float32) / 10.0
         df_whole.loc[:, 'Critic_Score'] = df_whole.loc[:, 'Critic_Score'] / 100.0
-        transform = BasicGroupByTransform(keys=['Platform'], targets=TARGET_COLUMNS, aggs=['mean', 'max', 'min'])
-        platform_scores = transform(df_whole)
-        df_main = pd.merge(df_main, platform_scores, how='left', on='Platform')
-        return df_main.loc[:, platform_scores.columns[1:]]
+        transform = MultiGroupByTransform([(['Platform'], TARGET_COLUMNS, ['mean', 'max', 'min'])])
+        return transform.transform_to(df_whole, df_main)
@@ -18,17 +18,13 @@ class PubCount500(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
         transform = BasicGroupByTransform(keys=['Publisher'], targets=['id'], aggs=['count'])
-        pub_count = transform(df_whole)
-        df_main = pd.merge(df_main, pub_count, how='left', on='Publisher')
-        df_main['count_over_500_Publisher'] = df_main.loc[:, pub_count.columns[-1]] >= 500
-        df_main['count_over_100_Publisher'] = df_main.loc[:, pub_count.columns[-1]] >= 100
+        pub_count = transform.transform_to(df_whole, df_main).iloc[:, -1]
+        df_feature = pd.DataFrame(index=df_main.index)
+        df_feature['count_over_500_Publisher'] = pub_count >= 500
+        df_feature['count_over_100_Publisher'] = pub_count >= 100
 
-        return df_main.loc[:, ['count_over_500_Publisher', 'count_over_100_Publisher']]
+        return df_feature
@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 COLUMNS = [
     'Developer',
@@ -25,18 +25,8 @@ class PubToCategory(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
-        agg_columns = []
-        for c in COLUMNS:
-            transform = BasicGroupByTransform(keys=['Publisher'], targets=[c], aggs=['nunique'])
-            pub_to_c = transform(df_whole)
-            agg_columns.append(pub_to_c.columns[-1])
-            df_main = pd.merge(df_main, pub_to_c, how='left', on='Publisher')
-
-        return df_main.loc[:, agg_columns]
+        transform = MultiGroupByTransform([(['Publisher'], COLUMNS, ['nunique'])])
+        return transform.transform_to(df_whole, df_main)
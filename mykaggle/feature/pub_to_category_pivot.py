@@ -1,7 +1,8 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.pivot import PivotTransform
+from mykaggle.transform.groupby import take_groups
+from mykaggle.transform.pivot import SparsePivotTransform
 
 COLUMNS = [
     # 'Developer',
@@ -25,18 +26,15 @@ class PubToCategoryPivot(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
-        agg_columns = []
+        output = {}
         for c in COLUMNS:
-            transform = PivotTransform(indices=['Publisher'], column=c, target='id', aggs=['count'], fillna=0)
-            pub_to_c = transform(df_whole)
-            agg_columns.extend(pub_to_c.columns[1:])
-            df_main = pd.merge(df_main, pub_to_c, how='left', on='Publisher')
-
-        return df_main.loc[:, agg_columns]
+            transform = SparsePivotTransform(indices=['Publisher'], column=c, target='id', agg='count')
+            pivot = transform(df_whole).drop_empty_rows()
+            rows = pivot.rows_for(df_main)
+            values = pivot.matrix.toarray()
+            for i, column in enumerate(pivot.columns):
+                output[column] = take_groups(values[:, i], rows)
+        return pd.DataFrame(output, index=df_main.index)
@@ -1,6 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
+from mykaggle.transform.groupby import BasicGroupByTransform
 
 
 class PubToDev(Feature):
@@ -17,15 +18,11 @@ class PubToDev(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
-        pub_to_dev = df_whole.groupby('Publisher')['Developer'].apply(set).reset_index()
-        pub_to_dev['num_publisher_to_unique_dev'] = pub_to_dev['Developer'].apply(lambda x: len(list(x)))
-
-        df_main = pd.merge(df_main, pub_to_dev, how='left', on='Publisher')
-        return df_main.loc[:, ['num_publisher_to_unique_dev']]
+        # Developer が NaN の行も 1 つの Developer として数える
+        transform = BasicGroupByTransform(['Publisher'], ['Developer'], ['count_distinct_pairs'])
+        df_output = transform.transform_to(df_whole, df_main)
+        df_output.columns = ['num_publisher_to_unique_dev']
+        return df_output
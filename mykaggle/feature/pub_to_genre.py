@@ -22,11 +22,7 @@ class PubToGenre(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others, copy=True)
 
         pub_to_genre = df_whole.groupby('Publisher')['Genre'].apply(set).reset_index()
         pub_to_genre['num_publisher_to_unique_genre'] = pub_to_genre['Genre'].apply(lambda x: len(list(x)))
@@ -19,17 +19,12 @@ class PubToYear(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
         agg_transform = BasicGroupByTransform(keys=['Publisher'], targets=['Year_of_Release'], aggs=['min'])
-        df_agg = agg_transform(df_whole)
-        df_main = pd.merge(df_main, df_agg, how='left', on='Publisher')
-        min_column = df_agg.columns[-1]
-        df_main['publisher_year_from_first'] = df_main.loc[:, 'Year_of_Release'] - df_main.loc[:, min_column]
+        df_feature = agg_transform.transform_to(df_whole, df_main)
+        min_column = df_feature.columns[-1]
+        df_feature['publisher_year_from_first'] = df_main.loc[:, 'Year_of_Release'] - df_feature.loc[:, min_column]
 
-        return df_main.loc[:, [min_column, 'publisher_year_from_first']]
+        return df_feature
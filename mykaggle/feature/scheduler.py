@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import tempfile
+
+import pandas as pd
+
+from mykaggle.feature.base import Feature
+from mykaggle.feature.pipeline import FeaturePipeline, FeatureSpec, add_dependencies, create_features
+from mykaggle.lib.arrow_util import read_arrow, write_arrow
+
+# Arrow ファイルに書き出して、ワーカーがメモリマップして読む DataFrame
+ARROW_FRAMES = ['train', 'test', 'whole', 'base_train', 'base_test']
+# ワーカープロセスごとに読み込んだ (train の others, test の others, base_train, base_test), 同じディレクトリは一度しか読まない
+_worker_frames: Dict[str, Tuple[Dict[str, Any], Dict[str, Any], pd.DataFrame, pd.DataFrame]] = {}
+
+
+def _load_frames(arrow_dir: str) -> Tuple[Dict[str, Any], Dict[str, Any], pd.DataFrame, pd.DataFrame]:
+    '''
+    arrow_dir の Arrow ファイルをメモリマップして作った others と base を返す。
+    元データの数値と文字列のカラムはコピーせずにファイルを指すので、ワーカーの間でページキャッシュを共有する。
+    特徴が others を書き換えても、メモリマップした配列や同じワーカーの他の特徴に影響しないように、
+    DataFrame は浅いコピーを渡す (pandas の Copy-on-Write で、書き換えたカラムだけコピーされる)。
+    '''
+    if arrow_dir not in _worker_frames:
+        _worker_frames.clear()
+        frames = {name: read_arrow(Path(arrow_dir) / f'{name}.arrow', zero_copy=True) for name in ARROW_FRAMES}
+        train_others, test_others = FeaturePipeline([]).build_others(frames['train'], frames['test'], frames['whole'])
+        _worker_frames[arrow_dir] = (train_others, test_others, frames['base_train'], frames['base_test'])
+    train_others, test_others, base_train, base_test = _worker_frames[arrow_dir]
+    # train と test の others で共有しているものは、浅いコピーも共有する
+    copies = {id(v): v.copy(deep=False) for v in [*train_others.values(), *test_others.values()]
+              if isinstance(v, pd.DataFrame)}
+    return (
+        {k: copies.get(id(v), v) for k, v in train_others.items()},
+        {k: copies.get(id(v), v) for k, v in test_others.items()},
+        base_train.copy(deep=False),
+        base_test.copy(deep=False),
+    )
+
+
+def _create_features_from_arrow(
+    arrow_dir: str,
+    feature_class: Type[Feature],
+    params: Dict[str, Any],
+    dependencies: List[Tuple[str, pd.DataFrame, pd.DataFrame]],
+    use_cache: bool,
+    save_cache: bool,
+    dtype_policy: Optional[str]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    train_others, test_others, base_train, base_test = _load_frames(arrow_dir)
+    train_others, test_others = add_dependencies(train_others, test_others, dependencies)
+    return create_features(
+        feature_class, params, train_others, test_others, base_train, base_test, use_cache, save_cache, dtype_policy
+    )
+
+
+class ParallelFeaturePipeline(FeaturePipeline):
+    '''
+    依存関係のない特徴をプロセスプールで並列に作る FeaturePipeline.
+    元データ, train と test をつなげた whole, base は一度だけメモリマップ可能な Arrow ファイルに書き出し、
+    各ワーカーはそれをコピーせずにメモリマップして使う。タスクごとに送るのは作成済みの依存特徴だけで、
+    元データや base を pickle して送ることはしない。
+    '''
+
+    def __init__(
+        self,
+        features: List[Union[Type[Feature], FeatureSpec]],
+        n_workers: Optional[int] = None,
+        workdir: Optional[Path] = None,
+        dtype_policy: Optional[str] = None
+    ) -> None:
+        '''
+        :param features: 特徴クラス、または (特徴クラス, train 以外のコンストラクタ引数) のリスト
+        :param n_workers: ワーカープロセス数、None なら CPU 数
+        :param workdir: Arrow ファイルを置くディレクトリ、None ならシステムの一時ディレクトリ
+        :param dtype_policy: 全特徴の出力にかける dtype のポリシー e.g.) 'compact', None なら特徴クラスの設定のまま
+        '''
+        super().__init__(features, dtype_policy)
+        self.n_workers = n_workers
+        self.workdir = workdir
+
+    def run(
+        self,
+        df_train: pd.DataFrame,
+        df_test: pd.DataFrame,
+        base_train: Optional[pd.DataFrame] = None,
+        base_test: Optional[pd.DataFrame] = None,
+        use_cache: bool = False,
+        save_cache: bool = False
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if base_train is None:
+            base_train = df_train.loc[:, ['id']]
+        if base_test is None:
+            base_test = df_test.loc[:, ['id']]
+        nodes = self.build_graph()
+        self.sort_graph(nodes)  # 循環を先に検出する
+
+        blocks: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        with tempfile.TemporaryDirectory(dir=self.workdir) as tmpdir:
+            frames = {
+                'train': df_train, 'test': df_test, 'whole': pd.concat([df_train, df_test]),
+                'base_train': base_train, 'base_test': base_test,
+            }
+            for name in ARROW_FRAMES:
+                write_arrow(frames[name], Path(tmpdir) / f'{name}.arrow')
+            del frames
+            with ProcessPoolExecutor(self.n_workers) as executor:
+                pending: Dict[Future, int] = {}
+
+                def submit_ready() -> None:
+                    submitted = set(pending.values())
+                    for i, node in enumerate(nodes):
+                        if i in blocks or i in submitted or any(d not in blocks for d in node.dependencies):
+                            continue
+                        dependencies = [(nodes[d].name, *blocks[d]) for d in node.dependencies]
+                        future = executor.submit(
+                            _create_features_from_arrow, tmpdir, node.feature_class, node.params,
+                            dependencies, use_cache, save_cache, self.dtype_policy
+                        )
+                        pending[future] = i
+
+                submit_ready()
+                while len(pending) > 0:
+                    done, _ = wait(list(pending.keys()), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        blocks[pending.pop(future)] = future.result()
+                    submit_ready()
+        return self._concat(nodes, blocks, base_train, base_test)
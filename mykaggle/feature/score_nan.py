@@ -29,11 +29,7 @@ class ScoreNaN(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others, copy=True)
 
         df_main.loc[df_main.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
         df_whole.loc[df_whole.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
@@ -45,10 +41,9 @@ class ScoreNaN(Feature):
         df_whole.loc[:, 'Critic_Score'] = df_whole.loc[:, 'Critic_Score'] / 100.0
 
         transform = BasicGroupByTransform(keys=['Platform', 'Year_of_Release'], targets=COLUMNS, aggs=['mean'])
-        platform_scores = transform(df_whole)
-        df_main = pd.merge(df_main, platform_scores, how='left', on=['Platform', 'Year_of_Release'])
+        platform_scores = transform.transform_to(df_whole, df_main)
 
         for c in COLUMNS:
             c_na = df_main[c].isna()
-            df_main.loc[c_na, c] = df_main.loc[c_na, f'mean_{c}_groupby_Platform_Year_of_Release']
+            df_main.loc[c_na, c] = platform_scores.loc[c_na, f'mean_{c}_groupby_Platform_Year_of_Release']
         return df_main.loc[:, COLUMNS]
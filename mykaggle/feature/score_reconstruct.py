@@ -2,17 +2,24 @@ from typing import Optional, Dict
 import pandas as pd
 import numpy as np
 
-from mykaggle.lib.pandas_util import change_column_name
 from mykaggle.feature.base import Feature
+from mykaggle.transform.groupby import MultiGroupByTransform
+from mykaggle.transform.impute import reconstruct_from_moments
 
 COLUMNS = [
     'Critic_Score', 'User_Score', 'Critic_Count', 'User_Count'
 ]
+# Platform ごとの平均と標準偏差を一度に集約する
+MOMENTS = MultiGroupByTransform([
+    (['Platform'], ['User_Score', 'Critic_Score'], ['mean', 'std']),
+    (['Platform'], ['User_Count', 'Critic_Count'], ['mean']),
+])
 
 
 class ScoreReconstruct(Feature):
     '''
     Critic_Score, User_Score, Critic_Count, User_Count
+    片方のスコアだけ欠損している場合は、もう片方のスコアを Platform ごとに標準化した値から埋める。
     '''
 
     def __init__(self, train: bool = True) -> None:
@@ -29,62 +36,35 @@ class ScoreReconstruct(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
-
-        df_main.loc[df_main.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
-        df_whole.loc[df_whole.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
-
-        # normalize
-        df_main.loc[:, 'User_Score'] = df_main.loc[:, 'User_Score'].astype(np.float32) / 10.0
-        df_main.loc[:, 'Critic_Score'] = df_main.loc[:, 'Critic_Score'] / 100.0
-        df_whole.loc[:, 'User_Score'] = df_whole.loc[:, 'User_Score'].astype(np.float32) / 10.0
-        df_whole.loc[:, 'Critic_Score'] = df_whole.loc[:, 'Critic_Score'] / 100.0
-
-        df_main = self._merge_agg_scores(df_whole, df_main)
-
-        def user_score_reconstruct(x):
-            diff = x['Critic_Score'] - x['mean_critic_score_by_platform']
-            normalized_diff = diff / x['std_critic_score_by_platform']
-            reconstructed = x['mean_user_score_by_platform'] + normalized_diff * x['std_user_score_by_platform']
-            return reconstructed
-
-        def critic_score_reconstruct(x):
-            normalized_diff = (x['User_Score'] - x['mean_user_score_by_platform']) / x['std_user_score_by_platform']
-            reconstructed = x['mean_critic_score_by_platform'] + normalized_diff * x['std_critic_score_by_platform']
-            return reconstructed
-
-        us_notna_cr_na = ~df_main['User_Score'].isna() & df_main['Critic_Score'].isna()
-        us_na_cr_notna = ~df_main['Critic_Score'].isna() & df_main['User_Score'].isna()
-
-        df_main.loc[us_na_cr_notna, 'User_Score'] = df_main.loc[us_na_cr_notna].apply(user_score_reconstruct, axis=1)
-        df_main.loc[us_na_cr_notna, 'User_Count'] = df_main.loc[us_na_cr_notna, 'mean_user_count_by_platform']
-        df_main.loc[us_notna_cr_na, 'Critic_Score'] = df_main.loc[us_notna_cr_na].apply(
-            critic_score_reconstruct, axis=1)
-        df_main.loc[us_notna_cr_na, 'Critic_Count'] = df_main.loc[us_notna_cr_na, 'mean_critic_count_by_platform']
-
-        return df_main.loc[:, COLUMNS]
-
-    def _merge_agg_scores(self, df: pd.DataFrame, merge_to_df: pd.DataFrame) -> pd.DataFrame:
-        user_score_agg = df.groupby(['Platform'])['User_Score'].agg(['mean', 'std'])
-        user_score_agg = change_column_name(
-            user_score_agg, ['mean', 'std'], ['mean_user_score_by_platform', 'std_user_score_by_platform'])
-        critic_score_agg = df.groupby(['Platform'])['Critic_Score'].agg(['mean', 'std'])
-        critic_score_agg = change_column_name(
-            critic_score_agg, ['mean', 'std'], ['mean_critic_score_by_platform', 'std_critic_score_by_platform'])
-
-        user_count_agg = df.groupby(['Platform'])['User_Count'].agg('mean')
-        user_count_agg = change_column_name(user_count_agg, 'User_Count', 'mean_user_count_by_platform')
-        critic_count_agg = df.groupby(['Platform'])['Critic_Count'].agg('mean')
-        critic_count_agg = change_column_name(critic_count_agg, 'Critic_Count', 'mean_critic_count_by_platform')
-
-        merge_to_df = pd.merge(merge_to_df, user_score_agg, how='left', on='Platform')
-        merge_to_df = pd.merge(merge_to_df, critic_score_agg, how='left', on='Platform')
-        merge_to_df = pd.merge(merge_to_df, user_count_agg, how='left', on='Platform')
-        merge_to_df = pd.merge(merge_to_df, critic_count_agg, how='left', on='Platform')
-
-        return merge_to_df
+        df_main = self._normalize(others['main'])
+        df_whole = self._normalize(self._get_whole(others))
+        df_moments = MOMENTS.transform_to(df_whole, df_main)
+        mean_user, std_user, mean_critic, std_critic, mean_user_count, mean_critic_count = [
+            df_moments.iloc[:, i].values for i in range(6)
+        ]
+
+        user_score = df_main.loc[:, 'User_Score'].values
+        critic_score = df_main.loc[:, 'Critic_Score'].values
+        us_na_cr_notna = np.isnan(user_score) & ~np.isnan(critic_score)
+        us_notna_cr_na = ~np.isnan(user_score) & np.isnan(critic_score)
+
+        df_output = df_main.loc[:, COLUMNS].reset_index(drop=True)
+        df_output.loc[us_na_cr_notna, 'User_Score'] = reconstruct_from_moments(
+            critic_score, mean_critic, std_critic, mean_user, std_user)[us_na_cr_notna]
+        df_output.loc[us_na_cr_notna, 'User_Count'] = mean_user_count[us_na_cr_notna]
+        df_output.loc[us_notna_cr_na, 'Critic_Score'] = reconstruct_from_moments(
+            user_score, mean_user, std_user, mean_critic, std_critic)[us_notna_cr_na]
+        df_output.loc[us_notna_cr_na, 'Critic_Count'] = mean_critic_count[us_notna_cr_na]
+        return df_output
+
+    def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        User_Score の tbd を NaN にして、スコアを 0-1 に揃えた DataFrame を返す。
+        '''
+        user_score = pd.to_numeric(df.loc[:, 'User_Score'].mask(df.loc[:, 'User_Score'] == 'tbd'))
+        return df.assign(
+            User_Score=user_score.astype(np.float64) / 10.0,
+            Critic_Score=df.loc[:, 'Critic_Score'].astype(np.float64) / 100.0,
+            User_Count=df.loc[:, 'User_Count'].astype(np.float64),
+            Critic_Count=df.loc[:, 'Critic_Count'].astype(np.float64),
+        )
@@ -0,0 +1,133 @@
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from mykaggle.feature.base import FEATURE_DIR
+
+
+class FeatureStore:
+    '''
+    Feature._save で保存した特徴 (圧縮なしの Arrow IPC ファイル) をメモリマップして、必要なカラムだけ読むクラス。
+    特徴ごとに pd.concat([base, feature], axis=1) を繰り返す代わりに、
+    load で必要なカラムの DataFrame を、load_matrix で LightGBM に渡す float32 の行列を直接作る。
+    '''
+
+    def __init__(self, root: Path = FEATURE_DIR, category: Optional[str] = None) -> None:
+        '''
+        :param root: 特徴の保存先、Feature と同じく FEATURE_DIR
+        :param category: Feature の category を指定していた場合はそれ
+        '''
+        self.root = Path(root)
+        self.category = category
+
+    def path(self, name: str, train: bool = True) -> Path:
+        directory = self.root if self.category is None else self.root / self.category
+        return directory / ('train' if train else 'test') / f'{name}.ftr'
+
+    def names(self, train: bool = True) -> List[str]:
+        '''
+        保存されている特徴の名前を返す。
+        '''
+        return sorted(p.stem for p in self.path('_', train).parent.glob('*.ftr'))
+
+    def columns(self, names: Optional[List[str]] = None, train: bool = True) -> Dict[str, List[str]]:
+        '''
+        特徴ごとのカラム名を返す。スキーマだけを読むので値は読まない。
+        '''
+        names = names if names is not None else self.names(train)
+        columns = {}
+        for name in names:
+            with pa.memory_map(str(self.path(name, train)), 'r') as source:
+                schema = pa.ipc.open_file(source).schema
+            columns[name] = [c for c in schema.names if c not in self._index_columns(schema)]
+        return columns
+
+    def load(
+        self,
+        names: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+        train: bool = True
+    ) -> pd.DataFrame:
+        '''
+        特徴を横に並べた DataFrame を返す。columns を指定するとそのカラムだけを読む。
+        数値カラムは可能な限りメモリマップしたバッファをコピーせずに使う。
+        :param names: 読む特徴の名前、None なら全部
+        :param columns: 読むカラム、None なら names の全カラム
+        :param train: train の特徴なら True, test なら False
+        '''
+        tables = self._select(names, columns, train)
+        if len(tables) == 0:
+            return pd.DataFrame()
+        # split_blocks にするとカラムごとにバッファをそのまま使える。concat も CoW なのでコピーしない
+        df_output = pd.concat([table.to_pandas(split_blocks=True) for table in tables], axis=1)
+        return df_output.loc[:, columns] if columns is not None else df_output
+
+    def load_matrix(
+        self,
+        names: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+        train: bool = True,
+        dtype: np.dtype = np.float32,
+        order: str = 'F'
+    ) -> Tuple[np.ndarray, List[str]]:
+        '''
+        特徴を一つの連続した行列にして返す。DataFrame を経由しないので、中間のコピーはカラム 1 本分だけ。
+        LightGBM は C, F どちらの順の float32 もコピーせずに受け取るので、カラムごとに書き込める F 順をデフォルトにする。
+        欠損は NaN, category (dictionary) 型はコードにする。
+        Returns:
+          (n_rows, n_columns) の行列と、カラム名
+        '''
+        tables = self._select(names, columns, train)
+        arrays = {c: table.column(c) for table in tables for c in table.column_names}
+        columns = columns if columns is not None else list(arrays.keys())
+        n_rows = tables[0].num_rows if len(tables) > 0 else 0
+        matrix = np.empty((n_rows, len(columns)), dtype=dtype, order=order)
+        for i, c in enumerate(columns):
+            matrix[:, i] = self._to_numpy(arrays[c], c, matrix.dtype)
+        return matrix, columns
+
+    def _select(self, names: Optional[List[str]], columns: Optional[List[str]], train: bool) -> List[pa.Table]:
+        '''
+        特徴ごとに、読むカラムだけを選んだ Table を返す。
+        '''
+        feature_columns = self.columns(names, train)
+        owners: Dict[str, str] = {}
+        for name, cs in feature_columns.items():
+            for c in cs:
+                if c in owners:
+                    raise ValueError(f'column {c} is in both {owners[c]} and {name}')
+                owners[c] = name
+        if columns is not None:
+            missing = [c for c in columns if c not in owners]
+            if len(missing) > 0:
+                raise KeyError(f'columns not found in the store: {missing}')
+
+        requested = set(columns) if columns is not None else set()
+        tables = []
+        for name, cs in feature_columns.items():
+            selected = cs if columns is None else [c for c in cs if c in requested]
+            if len(selected) == 0:
+                continue
+            # 閉じずに返す Table はメモリマップを参照し続ける
+            source = pa.memory_map(str(self.path(name, train)), 'r')
+            tables.append(pa.ipc.open_file(source).read_all().select(selected))
+        if len(set(t.num_rows for t in tables)) > 1:
+            raise ValueError(f'features have different numbers of rows: {[t.num_rows for t in tables]}')
+        return tables
+
+    def _to_numpy(self, array: pa.ChunkedArray, column: str, dtype: np.dtype) -> np.ndarray:
+        if pa.types.is_dictionary(array.type):
+            array = pa.chunked_array([chunk.indices for chunk in array.chunks], type=array.type.index_type)
+        if not (pa.types.is_integer(array.type) or pa.types.is_floating(array.type) or pa.types.is_boolean(array.type)):
+            raise ValueError(f'column {column} has non-numeric type {array.type}')
+        # null は NaN になる
+        return pc.cast(array, pa.from_numpy_dtype(dtype), safe=False).to_numpy(zero_copy_only=False)
+
+    def _index_columns(self, schema: pa.Schema) -> List[str]:
+        # pandas の index は __index_level_0__ などのカラムとして保存されている
+        if schema.pandas_metadata is None:
+            return []
+        return [c for c in schema.pandas_metadata.get('index_columns', []) if isinstance(c, str)]
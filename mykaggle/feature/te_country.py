@@ -25,16 +25,15 @@ class TECountry(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
-            df_train = others['main'].copy()
+            df_train = others['main']
         else:
-            df_train = others['another'].copy()
+            df_train = others['another']
 
-        added_columns = []
+        added_blocks = []
         for c in COLUMNS:
             mean_transformer = BasicGroupByTransform([c], SALES_COLUMNS, ['mean', 'median'])
-            te = mean_transformer(df_train)
-            df_main = pd.merge(df_main, te, how='left', on=c)
-            added_columns.extend(te.columns[-len(SALES_COLUMNS):])
-        return df_main.loc[:, added_columns]
+            te = mean_transformer.transform_to(df_train, df_main)
+            added_blocks.append(te.iloc[:, -len(SALES_COLUMNS):])
+        return pd.concat(added_blocks, axis=1)
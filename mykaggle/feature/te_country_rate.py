@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 COLUMNS = [
     'Platform',
@@ -25,21 +25,18 @@ class TECountryRate(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
-            df_train = others['main'].copy()
+            df_train = others['main']
         else:
-            df_train = others['another'].copy()
+            df_train = others['another']
 
-        added_columns = []
+        transform = MultiGroupByTransform([([c], SALES_COLUMNS, ['sum']) for c in COLUMNS])
+        df_sum = transform.transform_to(df_train, df_main)
+        df_rate = pd.DataFrame(index=df_main.index)
         for c in COLUMNS:
-            transform = BasicGroupByTransform([c], SALES_COLUMNS, ['sum'])
-            df_sum = transform(df_train)
-            global_column = df_sum.columns[-1]
-            country_columns = df_sum.columns[1:-1]
-            for cc in country_columns:
-                df_sum[f'{cc}_rate'] = df_sum.loc[:, cc] / df_sum.loc[:, global_column]
-            df_main = pd.merge(df_main, df_sum, how='left', on=c)
-            country_columns = [f'{cc}_rate' for cc in country_columns]
-            added_columns.extend(country_columns)
-        return df_main.loc[:, added_columns]
+            sum_columns = [f'sum_{sc}_groupby_{c}' for sc in SALES_COLUMNS]
+            global_column = sum_columns[-1]
+            for cc in sum_columns[:-1]:
+                df_rate[f'{cc}_rate'] = df_sum.loc[:, cc] / df_sum.loc[:, global_column]
+        return df_rate
@@ -1,7 +1,7 @@
 from typing import Optional, Dict
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
 
 COLUMNS = [
     'Platform',
@@ -25,16 +25,11 @@ class TEOtherAggs(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
-            df_train = others['main'].copy()
+            df_train = others['main']
         else:
-            df_train = others['another'].copy()
+            df_train = others['another']
 
-        added_columns = []
-        for c in COLUMNS:
-            mean_transformer = BasicGroupByTransform([c], ['target'], ['median', 'sum'])
-            te = mean_transformer(df_train)
-            df_main = pd.merge(df_main, te, how='left', on=c)
-            added_columns.extend(te.columns[-2:])
-        return df_main.loc[:, added_columns]
+        mean_transformer = MultiGroupByTransform([([c], ['target'], ['median', 'sum']) for c in COLUMNS])
+        return mean_transformer.transform_to(df_train, df_main)
@@ -4,7 +4,6 @@ from sklearn.decomposition import PCA
 
 from mykaggle.lib.pandas_util import change_column_name
 from mykaggle.feature.base import Feature
-from mykaggle.transform.pivot import PivotTransform
 from mykaggle.transform.groupby import BasicGroupByTransform
 
 COLUMNS = [
@@ -32,21 +31,6 @@ class TEPubToCategoryPivotKMeans(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
-
-        df_pivot = None
-        for i, c in enumerate(COLUMNS):
-            transform = PivotTransform(indices=['Publisher'], column=c, target='id', aggs=['count'], fillna=0)
-            pub_to_c = transform(df_whole)
-            if df_pivot is None:
-                df_pivot = pub_to_c
-            else:
-                df_pivot = pd.merge(df_pivot, pub_to_c, how='left', on='Publisher')
-
         column_name = 'kmeans_cluster_by_Publisher_pivotby_all'
         df_main[column_name] = base.copy().loc[:, column_name]
         df_main = change_column_name(df_main, column_name, 'kmeans_cluster')
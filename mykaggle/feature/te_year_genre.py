@@ -23,13 +23,11 @@ class TEYearGenre(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
+        df_main = others['main']
         if self.train:
-            df_train = others['main'].copy()
+            df_train = others['main']
         else:
-            df_train = others['another'].copy()
+            df_train = others['another']
 
         mean_transformer = BasicGroupByTransform(COLUMNS, ['target'], ['mean', 'median', 'sum', 'std'])
-        te = mean_transformer(df_train)
-        df_main = pd.merge(df_main, te, how='left', on=COLUMNS)
-        return df_main.loc[:, te.columns[-4:]]
+        return mean_transformer.transform_to(df_train, df_main)
@@ -2,6 +2,7 @@ from typing import Optional, Dict
 import pandas as pd
 
 from mykaggle.feature.base import Feature
+from mykaggle.transform.groupby import BasicGroupByTransform
 
 
 class YearNaN(Feature):
@@ -19,17 +20,11 @@ class YearNaN(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_main = others['main']
+        df_whole = self._get_whole(others)
 
-        platform_year_mode = df_whole.groupby('Platform')['Year_of_Release'].agg(lambda x: x.value_counts().index[0])
-        platform_year_mode_map = dict(platform_year_mode)
-        year_na = df_main['Year_of_Release'].isna()
-        df_main.loc[year_na, 'Year_of_Release'] = df_main.loc[year_na,
-                                                              'Platform'].apply(lambda x: platform_year_mode_map[x])
-
-        return df_main.loc[:, ['Year_of_Release']]
+        # 最頻値が複数あるときは小さい年にする
+        transform = BasicGroupByTransform(['Platform'], ['Year_of_Release'], ['mode'])
+        platform_year_mode = transform.transform_to(df_whole, df_main).iloc[:, 0]
+        year = df_main.loc[:, 'Year_of_Release'].fillna(platform_year_mode)
+        return year.to_frame('Year_of_Release')
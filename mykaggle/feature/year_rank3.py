@@ -1,8 +1,7 @@
 from typing import Optional, Dict
-import numpy as np
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.rank import GroupRankTransform
 
 COLUMNS = ['Year_of_Release']
 
@@ -21,14 +20,5 @@ class YearRank3(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-
-        count_transformer = BasicGroupByTransform(keys=['Year_of_Release'], targets=['id'], aggs=['count'])
-        count_agg = count_transformer(df_main)
-        df_main = pd.merge(df_main, count_agg, how='left', on='Year_of_Release')
-
-        year_rank = df_main.groupby('Year_of_Release')['id'].rank()
-        df_main['year_rank'] = year_rank
-
-        df_main.loc[df_main.loc[:, count_agg.columns[-1]].isna(), 'year_rank'] = np.nan
-        return df_main.loc[:, ['year_rank']]
+        year = GroupRankTransform([(['Year_of_Release'], 'id')]).ranks(others['main'])[0]
+        return pd.DataFrame({'year_rank': year.rank}, index=others['main'].index)
@@ -2,7 +2,7 @@ from typing import Optional, Dict
 import numpy as np
 import pandas as pd
 from mykaggle.feature.base import Feature
-from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.rank import GroupRankTransform
 
 COLUMNS = ['Year_of_Release']
 
@@ -22,18 +22,8 @@ class YearRank6(Feature):
         others: Optional[Dict[str, pd.DataFrame]] = None,
         *args, **kwargs
     ) -> pd.DataFrame:
-        df_main = others['main'].copy()
-
-        count_transformer = BasicGroupByTransform(keys=['Year_of_Release'], targets=['id'], aggs=['count'])
-        count_agg = count_transformer(df_main)
-        df_main = pd.merge(df_main, count_agg, how='left', on='Year_of_Release')
-
-        year_rank = df_main.groupby('Year_of_Release')['id'].rank()
-        df_main['year_rank'] = year_rank
-
-        df_main.loc[df_main.loc[:, count_agg.columns[-1]].isna(), 'year_rank'] = np.nan
-        df_main['year_rank_rate'] = (df_main.loc[:, 'year_rank'] - 1) / df_main.loc[:, count_agg.columns[-1]]
-        year_rank_na = df_main['year_rank_rate'].isna()
-        df_main.loc[year_rank_na, 'year_rank_rate'] = 0.5
-        df_main['year_rank_plus'] = df_main.loc[:, 'year_rank_rate'] + df_main.loc[:, 'Year_of_Release']
-        return df_main.loc[:, ['year_rank_rate', 'year_rank_plus']]
+        df_main = others['main']
+        year = GroupRankTransform([(['Year_of_Release'], 'id')]).ranks(df_main)[0]
+        year_rank_rate = np.nan_to_num((year.rank - 1) / year.count, nan=0.5)
+        year_rank_plus = year_rank_rate + df_main.loc[:, 'Year_of_Release'].values
+        return pd.DataFrame({'year_rank_rate': year_rank_rate, 'year_rank_plus': year_rank_plus}, index=df_main.index)
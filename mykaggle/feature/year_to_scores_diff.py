@@ -29,11 +29,7 @@ class YearToScoresDiff(Feature):
         *args, **kwargs
     ) -> pd.DataFrame:
         df_main = others['main'].copy()
-        df_another = others['another'].copy()
-        if self.train:
-            df_whole = pd.concat([df_main, df_another])
-        else:
-            df_whole = pd.concat([df_another, df_main])
+        df_whole = self._get_whole(others, copy=True)
 
         df_whole.loc[df_whole.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
         df_main.loc[df_main.loc[:, 'User_Score'] == 'tbd', 'User_Score'] = np.nan
@@ -42,9 +38,9 @@ class YearToScoresDiff(Feature):
         df_whole.loc[:, 'Critic_Score'] = df_whole.loc[:, 'Critic_Score'] / 100.0
         df_main.loc[:, 'Critic_Score'] = df_main.loc[:, 'Critic_Score'] / 100.0
         transform = BasicGroupByTransform(keys=['Year_of_Release'], targets=TARGET_COLUMNS, aggs=['mean', 'max', 'min'])
-        platform_scores = transform(df_whole)
-        df_main = pd.merge(df_main, platform_scores, how='left', on='Year_of_Release')
-        agg_columns = platform_scores.columns[1:]
+        platform_scores = transform.transform_to(df_whole, df_main)
+        df_main = pd.concat([df_main, platform_scores], axis=1)
+        agg_columns = platform_scores.columns
         feature_columns = []
         for c in agg_columns:
             for tc in TARGET_COLUMNS:
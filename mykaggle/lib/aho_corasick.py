@@ -0,0 +1,88 @@
+from typing import Callable, Dict, List
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class AhoCorasick:
+    '''
+    複数パターンの前方一致・部分一致を、文字列ごとに 1 回の走査でまとめて調べるクラス。
+    パターンごとに全行へ str.startswith / str.contains をかける代わりに使う。
+    複数のパターンに一致した場合は、patterns の中で後ろにあるものを返す
+    (パターンの順に上書きしていくループと同じ結果になる)。
+    '''
+
+    def __init__(self, patterns: List[str]) -> None:
+        '''
+        :param patterns: 探すパターンのリスト
+        '''
+        self.patterns = list(patterns)
+        self._children: List[Dict[str, int]] = [{}]
+        # そのノードで終わるパターンの番号、なければ -1
+        self._terminal = [-1]
+        for i, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                child = self._children[node].get(ch)
+                if child is None:
+                    child = len(self._children)
+                    self._children[node][ch] = child
+                    self._children.append({})
+                    self._terminal.append(-1)
+                node = child
+            self._terminal[node] = i
+        self._build_failure()
+
+    def _build_failure(self) -> None:
+        '''
+        failure link と、そのノードまでの文字列の接尾辞で終わるパターン番号の最大値を作る。
+        '''
+        self._fail = [0] * len(self._children)
+        self._best = list(self._terminal)
+        queue = deque(self._children[0].values())
+        while len(queue) > 0:
+            node = queue.popleft()
+            self._best[node] = max(self._best[node], self._best[self._fail[node]])
+            for ch, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail != 0 and ch not in self._children[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._children[fail].get(ch, 0)
+                queue.append(child)
+
+    def last_prefix_match(self, texts: pd.Series) -> np.ndarray:
+        '''
+        各文字列について、前方一致するパターンのうち最後のものの番号を返す。一致しなければ -1.
+        '''
+        return self._match_unique(texts, self._last_prefix)
+
+    def last_substring_match(self, texts: pd.Series) -> np.ndarray:
+        '''
+        各文字列について、部分一致するパターンのうち最後のものの番号を返す。一致しなければ -1.
+        '''
+        return self._match_unique(texts, self._last_substring)
+
+    def _match_unique(self, texts: pd.Series, match: Callable[[str], int]) -> np.ndarray:
+        codes, uniques = pd.factorize(np.asarray(texts, dtype=object))
+        matched = np.array([match(text) for text in uniques] + [-1], dtype=np.int64)
+        return matched[codes]
+
+    def _last_prefix(self, text: str) -> int:
+        node = 0
+        result = self._terminal[0]
+        for ch in text:
+            node = self._children[node].get(ch, -1)
+            if node < 0:
+                break
+            result = max(result, self._terminal[node])
+        return result
+
+    def _last_substring(self, text: str) -> int:
+        node = 0
+        result = self._best[0]
+        for ch in text:
+            while node != 0 and ch not in self._children[node]:
+                node = self._fail[node]
+            node = self._children[node].get(ch, 0)
+            result = max(result, self._best[node])
+        return result
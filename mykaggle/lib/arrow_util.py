@@ -0,0 +1,69 @@
+from typing import Iterator, List, Optional
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+def write_arrow(df: pd.DataFrame, path: Path) -> Path:
+    '''
+    DataFrame を圧縮なしの Arrow IPC ファイルとして保存する。
+    圧縮しないのでメモリマップして読むことができる。index も保存される。
+    float の NaN は null にせず NaN のまま書くので、read_arrow(zero_copy=True) でコピーせずに読める。
+    '''
+    # チャンクが分かれているとつなげるときにコピーするので、1 つにまとめておく
+    table = pa.Table.from_pandas(df).combine_chunks()
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count > 0:
+            table = table.set_column(i, field, pc.fill_null(table.column(i), float('nan')))
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def read_arrow(path: Path, columns: Optional[List[str]] = None, zero_copy: bool = False) -> pd.DataFrame:
+    '''
+    Arrow IPC ファイルをメモリマップして読む。columns を指定した場合はその列だけ読む。
+    :param zero_copy: True ならカラムごとに別のブロックにして、null のない数値と文字列のカラムは
+      コピーせずにメモリマップしたファイルを指す読み取り専用の配列にする。複数のプロセスで読んでもページキャッシュを共有する。
+      そのまま書き換えるとエラーになるので、書き換える場合は df.copy(deep=False) を渡して、
+      元の DataFrame は残しておく (pandas の Copy-on-Write で、書き換えたカラムだけコピーされる)
+    '''
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=zero_copy)
+
+
+def iter_batches(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 1_000_000
+) -> Iterator[pd.DataFrame]:
+    '''
+    CSV / feather (Arrow IPC) / parquet ファイルを batch_size 行ずつの DataFrame にして返す。
+    ファイル全体をメモリに載せないので、メモリに載らないデータを集約するときに使う。
+    :param columns: 読むカラム、None なら全部
+    '''
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in ['.csv', '.gz']:
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+    elif suffix == '.parquet':
+        for batch in pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    elif suffix in ['.feather', '.ftr', '.arrow']:
+        with pa.memory_map(str(path), 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size).to_pandas()
+    else:
+        raise ValueError(f'unsupported file type: {path}')
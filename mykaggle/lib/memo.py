@@ -0,0 +1,64 @@
+from typing import Any, Callable, Hashable, Optional
+from collections import OrderedDict
+from pathlib import Path
+import pickle
+
+from mykaggle.util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Memo:
+    '''
+    キーごとに計算した結果を、最近使った max_size 個だけプロセス内で覚えておく LRU のキャッシュ。
+    path を渡すと結果を pickle でも保存して、別のプロセスからも読めるようにする。
+    train と test の特徴で同じモデルや前処理の結果を使い回すのに使う。
+
+      _fitted_models = Memo(8)
+      model = _fitted_models.get(key, lambda: fit(df), path=model_dir / f'model_{key}.pkl')
+    '''
+
+    def __init__(self, max_size: int) -> None:
+        '''
+        :param max_size: 覚えておく結果の数、超えたら最も長く使われていないものから捨てる
+        '''
+        self.max_size = max_size
+        self._values: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable, compute: Callable[[], Any], path: Optional[Path] = None) -> Any:
+        '''
+        key の結果を返す。覚えていなければ、path に保存したものを読むか compute() で計算する。
+        :param key: 結果を決めるキー
+        :param compute: 結果を計算する関数
+        :param path: 結果を pickle で保存する場所、None なら保存しない
+        '''
+        if key in self._values:
+            self._values.move_to_end(key)
+            return self._values[key]
+        if path is not None and path.exists():
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        else:
+            value = compute()
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'wb') as f:
+                    pickle.dump(value, f)
+                logger.info(f'saved {path}')
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def clear(self) -> None:
+        self._values.clear()
@@ -0,0 +1,61 @@
+from typing import NamedTuple
+import numpy as np
+import scipy.sparse as sp
+
+from mykaggle.lib.sparse_util import incidence_matrix
+
+
+class NameIndex(NamedTuple):
+    '''
+    タイトル (Name のコード) から、それを持つ whole の行番号を引く CSR 形式のインデックス。
+    rows[offsets[g]:offsets[g + 1]] がコード g の行番号で、行番号の昇順に並ぶ。
+    一度作れば、タイトルごとの集約は Name の文字列をハッシュし直さずにコードと配列演算だけで O(行数) で行える。
+
+      index = NameIndex.from_codes(vocabulary_whole.loc[:, 'Name'].cat.codes.values, n_names)
+      counts = index.sizes[name_main]
+    '''
+    codes: np.ndarray
+    offsets: np.ndarray
+    rows: np.ndarray
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, n_names: int) -> 'NameIndex':
+        '''
+        :param codes: whole の各行の Name のコード、NaN は -1
+        :param n_names: コードの種類数
+        '''
+        codes = np.asarray(codes)
+        valid = codes >= 0
+        counts = np.bincount(codes[valid], minlength=n_names)
+        offsets = np.zeros(n_names + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = np.flatnonzero(valid)[np.argsort(codes[valid], kind='stable')]
+        return cls(codes, offsets, rows)
+
+    @property
+    def n_names(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def sizes(self) -> np.ndarray:
+        '''
+        タイトルごとの行数。
+        '''
+        return np.diff(self.offsets)
+
+    def rows_of(self, code: int) -> np.ndarray:
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def incidence(self, values: np.ndarray, n_values: int) -> sp.csr_matrix:
+        '''
+        (タイトル, 値) の組が whole に 1 回以上出てくる場所を 1 にした (タイトル数, n_values) の疎行列。
+        :param values: whole の各行の値のコード、負の値は無視する
+        :param n_values: 値のコードの種類数
+        '''
+        return incidence_matrix(self.codes, values, self.n_names, n_values)
+
+    def nunique(self, values: np.ndarray, n_values: int) -> np.ndarray:
+        '''
+        タイトルごとの値のユニーク数。負の値 (NaN) は数えない。
+        '''
+        return np.diff(self.incidence(values, n_values).indptr)
@@ -1,6 +1,11 @@
-from typing import Union, List
+import hashlib
+from typing import Any, Union, List, Optional
+import numpy as np
 import pandas as pd
 
+# apply_dtype_policy で使えるポリシー
+DTYPE_POLICIES = ['float32', 'compact']
+
 
 def change_column_name(df: Union[pd.DataFrame, pd.Series],
                        old: Union[str, List[str]],
@@ -14,3 +19,100 @@ def change_column_name(df: Union[pd.DataFrame, pd.Series],
     for o, n in zip(old, new):
         name_map[o] = n
     return df.rename(columns=name_map)
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    '''
+    DataFrame の中身 (index, column 名, dtype, 値) から決まるハッシュ文字列を返す。
+    キャッシュのキーなど、同じデータかどうかを判定したい場合に使う。
+    '''
+    hasher = hashlib.sha256()
+    hasher.update(str(df.shape).encode())
+    hasher.update(','.join(map(str, df.columns)).encode())
+    hasher.update(','.join(map(str, df.dtypes)).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return hasher.hexdigest()
+
+
+def apply_dtype_policy(
+    df: pd.DataFrame,
+    policy: Optional[str],
+    dtypes: Optional[List[Optional[Any]]] = None
+) -> pd.DataFrame:
+    '''
+    policy に従ってカラムの dtype を変えた DataFrame を返す。
+    :param policy: None なら何もしない。
+      'float32' なら float64 のカラムを float32 にする。
+      'compact' ならさらに 0/1 だけの int を bool に、それ以外の int を値が収まる最小の int に、文字列を category にする。
+      float32 や bool にすると値や足し算の結果が変わり、既存の実験の特徴が変わってしまうので、
+      どちらのポリシーも Feature.dtype_policy か FeaturePipeline の dtype_policy で指定したときだけかける
+    :param dtypes: decide_dtypes で決めたカラムごとの dtype、None なら df だけから決める。
+      train と test の特徴には、両方から決めた同じ dtypes を渡す
+    '''
+    if policy is None:
+        return df
+    if dtypes is None:
+        dtypes = decide_dtypes([df], policy)
+    output = None
+    for i, new_dtype in enumerate(dtypes):
+        column = df.iloc[:, i]
+        if new_dtype is None or column.dtype == new_dtype:
+            continue
+        if output is None:
+            output = df.copy()
+        # カラム名が重複していても位置で置き換えられるように isetitem を使う
+        output.isetitem(i, column.astype(new_dtype))
+    return output if output is not None else df
+
+
+def decide_dtypes(dfs: List[pd.DataFrame], policy: Optional[str]) -> List[Optional[Any]]:
+    '''
+    同じカラムを持つ dfs (train と test の特徴など) の値をあわせて、policy でカラムごとにかける dtype を決める。
+    category のカテゴリも dfs 全体の値から作るので、同じ値は train でも test でも同じコードになる。
+    dtype を変えないカラムは None.
+    '''
+    if policy is not None and policy not in DTYPE_POLICIES:
+        raise ValueError(f'dtype policy must be one of {DTYPE_POLICIES}, but got {policy}')
+    for df in dfs[1:]:
+        if not df.columns.equals(dfs[0].columns):
+            raise ValueError('dataframes must have the same columns')
+    if policy is None:
+        return [None] * dfs[0].shape[1]
+    dtypes = []
+    for i in range(dfs[0].shape[1]):
+        column = pd.concat([df.iloc[:, i] for df in dfs], ignore_index=True) if len(dfs) > 1 else dfs[0].iloc[:, i]
+        dtypes.append(_compact_dtype(column) if policy == 'compact' else _float32_dtype(column))
+    return dtypes
+
+
+def _float32_dtype(column: pd.Series) -> Optional[Any]:
+    if column.dtype != np.float64:
+        return None
+    # float32 に収まらない値があるカラムはそのままにする
+    if np.nanmax(np.abs(column.values), initial=0) > np.finfo(np.float32).max:
+        return None
+    return np.float32
+
+
+def _compact_dtype(column: pd.Series) -> Optional[Any]:
+    dtype = column.dtype
+    if dtype == np.float64:
+        return _float32_dtype(column)
+    if dtype.kind in 'iu' and isinstance(dtype, np.dtype):
+        if len(column) == 0:
+            return None
+        low, high = column.min(), column.max()
+        # フラグ (HasSales など) は bool にする
+        if low >= 0 and high <= 1:
+            return bool
+        for candidate in [np.int8, np.int16, np.int32]:
+            info = np.iinfo(candidate)
+            if info.min <= low and high <= info.max:
+                return candidate if np.dtype(candidate).itemsize < dtype.itemsize else None
+        return None
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        # 数値や bool が入った object カラムは category にしない
+        if pd.api.types.infer_dtype(column, skipna=True) not in ['string', 'empty']:
+            return None
+        return pd.CategoricalDtype(pd.Index(column.dropna().unique()).sort_values())
+    return None
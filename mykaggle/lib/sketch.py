@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+
+def _canonical_values(values: np.ndarray) -> np.ndarray:
+    '''
+    同じ値が同じハッシュになるように、数値と bool は float64 (-0.0 は 0.0) に揃える。
+    read_csv のチャンクの途中で空欄が出てきて int64 が float64 に変わっても、1 と 1.0 を同じ値として数える。
+    2 ** 53 を超える整数は float64 で区別できないことがある。
+    '''
+    values = np.asarray(values)
+    numeric = ['integer', 'floating', 'mixed-integer-float', 'boolean']
+    if values.dtype.kind == 'O' and pd.api.types.infer_dtype(values, skipna=False) in numeric:
+        values = values.astype(np.float64)
+    if values.dtype.kind in 'iufb':
+        return values.astype(np.float64) + 0.0
+    return values.astype(object)
+
+
+class GroupedHyperLogLog:
+    '''
+    グループごとのユニーク数を HyperLogLog で近似するスケッチ。
+    レジスタの要素ごとの max でマージできるので、チャンクごとに作ったものをまとめられる。
+    相対誤差はおよそ 1.04 / sqrt(2 ** precision).
+    '''
+
+    def __init__(self, n_groups: int = 0, precision: int = 10) -> None:
+        '''
+        :param n_groups: グループ数
+        :param precision: レジスタ数を 2 ** precision にする
+        '''
+        self.precision = precision
+        self.registers = np.zeros((n_groups, 2 ** precision), dtype=np.uint8)
+
+    @property
+    def n_groups(self) -> int:
+        return self.registers.shape[0]
+
+    def resize(self, n_groups: int) -> None:
+        '''
+        グループ数を増やす。追加したグループは空になる。
+        '''
+        if n_groups > self.n_groups:
+            extra = np.zeros((n_groups - self.n_groups, self.registers.shape[1]), dtype=np.uint8)
+            self.registers = np.concatenate([self.registers, extra])
+
+    def add(self, groups: np.ndarray, values: np.ndarray) -> None:
+        '''
+        :param groups: 各値のグループ番号
+        :param values: 追加する値、NaN は除いておく
+        '''
+        hashes = pd.util.hash_array(_canonical_values(values))
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # 残りのビットの先頭から数えた 0 の数 + 1
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest > 0, bits - exponent + 1, bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, (groups, index), rank)
+
+    def merge(self, other: 'GroupedHyperLogLog') -> None:
+        self.resize(other.n_groups)
+        self.registers[:other.n_groups] = np.maximum(self.registers[:other.n_groups], other.registers)
+
+    def estimate(self) -> np.ndarray:
+        '''
+        グループごとのユニーク数の推定値を返す。
+        '''
+        m = self.registers.shape[1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m ** 2 / np.sum(2.0 ** -self.registers.astype(np.float64), axis=1)
+        zeros = np.sum(self.registers == 0, axis=1)
+        # 小さいユニーク数は linear counting の方が正確
+        with np.errstate(divide='ignore'):
+            linear = m * np.log(m / np.maximum(zeros, 1))
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class GroupedQuantileSketch:
+    '''
+    グループごとの分位点を、値を対数スケールのビンに数えて近似する DDSketch 風のスケッチ。
+    返す値の相対誤差は relative_accuracy 以下になる。ビンの数え上げの和でマージできる。
+    '''
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        '''
+        :param relative_accuracy: 分位点の相対誤差の上限
+        '''
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # (グループ, 符号, ビン) ごとの個数。負の値はビンの符号を反転して、値の順とビンの順を揃える
+        self.bins = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays([[], [], []]))
+
+    def add(self, groups: np.ndarray, values: np.ndarray) -> None:
+        '''
+        :param groups: 各値のグループ番号
+        :param values: 追加する値、NaN は除いておく
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        sign = np.sign(values).astype(np.int64)
+        with np.errstate(divide='ignore'):
+            index = np.ceil(np.log(np.abs(values)) / np.log(self.gamma))
+        index = np.where(sign == 0, 0, index * np.where(sign < 0, -1, 1)).astype(np.int64)
+        counts = pd.Series(1, index=pd.MultiIndex.from_arrays([groups, sign, index])).groupby(level=[0, 1, 2]).sum()
+        self._add_bins(counts)
+
+    def merge(self, other: 'GroupedQuantileSketch') -> None:
+        self._add_bins(other.bins)
+
+    def _add_bins(self, counts: pd.Series) -> None:
+        if len(self.bins) == 0:
+            self.bins = counts
+        else:
+            self.bins = pd.concat([self.bins, counts]).groupby(level=[0, 1, 2]).sum()
+
+    def quantile(self, n_groups: int, q: float = 0.5) -> np.ndarray:
+        '''
+        グループごとの分位点を返す。pandas と同じく、間にくる場合は前後の値の平均を取る。値のないグループは NaN.
+        '''
+        result = np.full(n_groups, np.nan)
+        if len(self.bins) == 0:
+            return result
+        bins = self.bins.sort_index()
+        groups = bins.index.get_level_values(0).values
+        sign = bins.index.get_level_values(1).values
+        index = bins.index.get_level_values(2).values
+        counts = bins.values
+        values = np.where(sign == 0, 0, sign * 2 * self.gamma ** (sign * index) / (self.gamma + 1))
+
+        totals = np.bincount(groups, weights=counts, minlength=n_groups)
+        starts = np.concatenate([[0], np.cumsum(totals)[:-1]])
+        cumsum = np.cumsum(counts)
+        found = totals > 0
+        lower = self._value_at(cumsum, values, starts + np.floor(q * (totals - 1)))
+        upper = self._value_at(cumsum, values, starts + np.ceil(q * (totals - 1)))
+        result[found] = ((lower + upper) / 2)[found]
+        return result
+
+    def _value_at(self, cumsum: np.ndarray, values: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+        # 全グループを通した順位 rank の値が入っているビン
+        position = np.searchsorted(cumsum, ranks, side='right')
+        return values[np.minimum(position, len(values) - 1)]
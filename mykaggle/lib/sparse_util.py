@@ -0,0 +1,17 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+def incidence_matrix(row_codes: np.ndarray, col_codes: np.ndarray, n_rows: int, n_cols: int) -> sp.csr_matrix:
+    '''
+    (row_codes[i], col_codes[i]) の組が 1 回以上出てくる場所を 1 にした疎行列を返す。
+    どちらかのコードが負 (NaN などの欠損) の組は無視する。
+    '''
+    row_codes = np.asarray(row_codes)
+    col_codes = np.asarray(col_codes)
+    valid = (row_codes >= 0) & (col_codes >= 0)
+    data = np.ones(valid.sum(), dtype=np.int32)
+    matrix = sp.csr_matrix((data, (row_codes[valid], col_codes[valid])), shape=(n_rows, n_cols))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
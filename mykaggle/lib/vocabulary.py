@@ -0,0 +1,42 @@
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+# build_vocabulary で共通のカテゴリにするカラム
+CATEGORICAL_COLUMNS = ['Name', 'Platform', 'Genre', 'Publisher', 'Developer', 'Rating']
+
+
+def build_vocabulary(df_whole: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    '''
+    train と test をつなげた df_whole のカテゴリカラムを一度だけ factorize して、
+    ソートしたカテゴリを train と test で共有する pd.Categorical のカラムにした DataFrame を返す。
+    コードはカテゴリ数に応じて int8/int16/int32 で持ち、NaN は -1.
+    行は df_whole と同じ順で、index は 0 からの連番。
+    :param df_whole: train と test をつなげた DataFrame
+    :param columns: 対象のカラム、None なら CATEGORICAL_COLUMNS のうち df_whole にあるもの
+    '''
+    if columns is None:
+        columns = [c for c in CATEGORICAL_COLUMNS if c in df_whole.columns]
+    vocabulary = {}
+    for c in columns:
+        codes, categories = pd.factorize(df_whole.loc[:, c], sort=True)
+        vocabulary[c] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(vocabulary)
+
+
+def label_encode(whole: pd.Series, x: pd.Series, na_value: str = 'NaN') -> np.ndarray:
+    '''
+    fillna(na_value) してから whole で fit した LabelEncoder と同じコードを、Categorical のコードから作る。
+    文字列を比較し直さずに、na_value が入る位置より後ろのコードを 1 つずらすだけで済む。
+    :param whole: LabelEncoder を fit するカラム、x と同じカテゴリの Categorical
+    :param x: エンコードするカラム
+    :param na_value: NaN を埋める文字列
+    '''
+    codes = x.cat.codes.values.astype(np.int64)
+    if not (whole.cat.codes.values < 0).any():
+        return codes
+    categories = whole.cat.categories
+    if na_value in categories:
+        return np.where(codes < 0, categories.get_loc(na_value), codes)
+    position = categories.searchsorted(na_value)
+    return np.where(codes < 0, position, codes + (codes >= position))
@@ -0,0 +1,77 @@
+from typing import Callable, Dict
+from functools import lru_cache
+import hashlib
+import string
+import sys
+import unicodedata
+import numpy as np
+import pandas as pd
+
+from mykaggle.lib.memo import Memo
+
+# texthero の remove_punctuation と同じパターン
+PUNCTUATION_PATTERN = rf'([{string.punctuation}])+'
+# 同じ列を何度もきれいにしないためのキャッシュ
+MAX_CLEANED_TEXTS = 32
+_cleaned_texts = Memo(MAX_CLEANED_TEXTS)
+
+
+def hash_texts(texts: np.ndarray) -> str:
+    '''
+    文字列の配列の中身から決まるハッシュ文字列を返す。
+    '''
+    hashes = pd.util.hash_array(np.asarray(texts, dtype=object))
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+def clean_text(series: pd.Series) -> pd.Series:
+    '''
+    texthero.clean に fillna, lowercase, remove_digits, remove_punctuation, remove_diacritics,
+    remove_whitespace のパイプラインを渡したときと同じ結果を返す。
+    '''
+    return _map_unique(series.fillna(''), _clean_unique, 'clean')
+
+
+def preprocess_text(series: pd.Series) -> pd.Series:
+    '''
+    カンマなど一部の記号だけ取り除いて小文字にする、軽めの前処理。NaN は 'nan' になる。
+    '''
+    return _map_unique(series, _preprocess_unique, 'preprocess')
+
+
+def _map_unique(series: pd.Series, func: Callable[[pd.Series], pd.Series], name: str) -> pd.Series:
+    '''
+    ユニークな文字列にだけ func をかけて、元の行に戻す。結果は列の中身のハッシュでキャッシュする。
+    文字列でない値は Series.astype(str) と同じく str にしてから渡す (NaN は 'nan')。
+    '''
+    texts = np.asarray(series.values, dtype=object).astype(str).astype(object)
+
+    def clean() -> np.ndarray:
+        codes, uniques = pd.factorize(texts)
+        cleaned = func(pd.Series(uniques, dtype=object)).values.astype(object)
+        return cleaned[codes]
+    cleaned = _cleaned_texts.get(f'{name}:{hash_texts(texts)}', clean)
+    return pd.Series(cleaned, index=series.index, name=series.name, dtype=object, copy=True)
+
+
+def _clean_unique(texts: pd.Series) -> pd.Series:
+    texts = texts.str.lower()
+    texts = texts.str.replace(r'\b\d+\b', ' ', regex=True)
+    texts = texts.str.replace(PUNCTUATION_PATTERN, ' ', regex=True)
+    texts = texts.str.normalize('NFKD').str.translate(_combining_characters())
+    return texts.str.replace('\xa0', ' ', regex=False).str.split().str.join(' ')
+
+
+def _preprocess_unique(texts: pd.Series) -> pd.Series:
+    texts = texts.str.replace(',', '', regex=False)
+    for c in [':', '!', '\'s']:
+        texts = texts.str.replace(c, ' ', regex=False)
+    return texts.str.replace('  ', ' ', regex=False).str.lower()
+
+
+@lru_cache(maxsize=None)
+def _combining_characters() -> Dict[int, None]:
+    '''
+    str.translate で結合文字 (アクセント記号など) を消すためのテーブル。
+    '''
+    return {c: None for c in range(sys.maxunicode + 1) if unicodedata.combining(chr(c))}
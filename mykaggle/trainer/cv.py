@@ -0,0 +1,227 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import multiprocessing
+import os
+import tempfile
+import numpy as np
+import lightgbm as lgb
+from sklearn.metrics import mean_squared_error
+
+from mykaggle.trainer.dataset import FoldDatasets
+from mykaggle.util.logger import get_logger
+
+logger = get_logger(__name__)
+# ワーカープロセスごとの FoldDatasets と test の特徴、initializer で一度だけ受け取る
+_worker_state: Dict[str, Any] = {}
+
+
+class CVResult(NamedTuple):
+    '''
+    CVRunner.run の結果。
+    oof_pred は学習データの各行の out-of-fold な予測、test_pred は fold ごとの test の予測 (fold 数, test の行数)。
+    '''
+    oof_pred: np.ndarray
+    test_pred: Optional[np.ndarray]
+    models: List[lgb.Booster]
+    scores: List[float]
+    score: float
+
+
+class FoldResult(NamedTuple):
+    fold: int
+    model: lgb.Booster
+    valid_pred: np.ndarray
+    test_pred: Optional[np.ndarray]
+
+
+def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    return mean_squared_error(y_true, y_pred) ** 0.5
+
+
+def _init_worker(datasets: FoldDatasets, x_test: Optional[np.ndarray], oof_test: Optional[np.ndarray]) -> None:
+    _worker_state['datasets'] = datasets
+    _worker_state['x_test'] = x_test
+    _worker_state['oof_test'] = oof_test
+
+
+def _train_fold_in_worker(*args: Any) -> FoldResult:
+    return _train_fold(_worker_state['datasets'], _worker_state['x_test'], _worker_state['oof_test'], *args)
+
+
+def _train_fold(
+    datasets: FoldDatasets,
+    x_test: Optional[np.ndarray],
+    oof_test: Optional[np.ndarray],
+    fold: int,
+    train_idx: np.ndarray,
+    valid_idx: np.ndarray,
+    oof: Optional[np.ndarray],
+    oof_columns: Optional[List[str]],
+    params: Dict[str, Any],
+    num_rounds: int,
+    early_stopping_rounds: Optional[int],
+    verbose_eval: int,
+    feval: Optional[Callable],
+    ckptdir: Optional[Path]
+) -> FoldResult:
+    '''
+    1 fold 分を学習して、モデルと valid, test の予測を返す。
+    '''
+    train_data, valid_data = datasets.fold(train_idx, valid_idx, oof, oof_columns)
+    callbacks = []
+    if early_stopping_rounds is not None:
+        callbacks.append(lgb.early_stopping(early_stopping_rounds, verbose=verbose_eval > 0))
+    if verbose_eval > 0:
+        callbacks.append(lgb.log_evaluation(verbose_eval))
+    model = lgb.train(
+        params,
+        train_data,
+        num_boost_round=num_rounds,
+        valid_names=['train', 'valid'],
+        valid_sets=[train_data, valid_data],
+        feval=feval,
+        callbacks=callbacks
+    )
+    valid_pred = model.predict(datasets.matrix(valid_idx, oof))
+    test_pred = None
+    if x_test is not None:
+        test_pred = model.predict(x_test if oof_test is None else np.hstack([x_test, oof_test]))
+    if ckptdir is not None:
+        model.save_model(str(ckptdir / f'model_{fold}.txt'))
+    return FoldResult(fold, model, valid_pred, test_pred)
+
+
+class CVRunner:
+    '''
+    LightGBM の cross validation を行うクラス。notebook ごとにコピーしていた train() の代わりに使う。
+    Dataset のビン分割は FoldDatasets で一度だけ行い、n_workers > 1 なら fold をプロセスで並列に学習する。
+    num_threads は n_workers で分けるので、並列にしても CPU 数以上のスレッドは使わない。
+
+      runner = CVRunner(settings['lgbm_params'], num_rounds=10000, early_stopping_rounds=1000, n_workers=5)
+      result = runner.run(x_train, y_train, splits, x_test, ckptdir=ckptdir)
+      preds = np.expm1(result.test_pred).mean(axis=0)
+    '''
+
+    def __init__(
+        self,
+        params: Dict[str, Any],
+        num_rounds: int = 10000,
+        early_stopping_rounds: Optional[int] = 1000,
+        verbose_eval: int = 0,
+        feval: Optional[Callable] = None,
+        metric: Callable[[np.ndarray, np.ndarray], float] = rmse,
+        n_workers: int = 1,
+        num_threads: Optional[int] = None
+    ) -> None:
+        '''
+        :param params: lgb.train のパラメータ
+        :param num_rounds: 最大の boosting の回数
+        :param early_stopping_rounds: early stopping の回数、None ならしない
+        :param verbose_eval: 何回ごとに評価値をログに出すか、0 なら出さない
+        :param feval: lgb.train に渡す評価関数 e.g.) mykaggle.metric.mse.rmse
+          n_workers > 1 のときはプロセスに渡すので、モジュールに定義した関数にする
+        :param metric: fold と全体のスコアを計算する関数 (y_true, y_pred) -> float
+        :param n_workers: 並列に学習する fold の数
+        :param num_threads: 全体で使うスレッド数、None なら params の num_threads か CPU 数
+        '''
+        self.params = params
+        self.num_rounds = num_rounds
+        self.early_stopping_rounds = early_stopping_rounds
+        self.verbose_eval = verbose_eval
+        self.feval = feval
+        self.metric = metric
+        self.n_workers = n_workers
+        self.num_threads = num_threads or params.get('num_threads') or os.cpu_count() or 1
+
+    @property
+    def fold_params(self) -> Dict[str, Any]:
+        '''
+        1 fold の学習に使うパラメータ。num_threads をワーカーの数で分ける。
+        '''
+        return {**self.params, 'num_threads': max(1, self.num_threads // self.n_workers)}
+
+    def run(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        splits: Sequence[Tuple[np.ndarray, np.ndarray]],
+        x_test: Optional[np.ndarray] = None,
+        weight: Optional[np.ndarray] = None,
+        oof: Optional[np.ndarray] = None,
+        oof_test: Optional[np.ndarray] = None,
+        oof_columns: Optional[List[str]] = None,
+        feature_name: Optional[List[str]] = None,
+        ckptdir: Optional[Path] = None,
+        cache_dir: Optional[Path] = None
+    ) -> CVResult:
+        '''
+        全 fold を学習して、OOF と test の予測を返す。
+        :param x: 学習データの特徴、DataFrame なら x.values を渡す
+        :param y: 学習データのラベル
+        :param splits: fold ごとの (train_idx, valid_idx)
+        :param x_test: test の特徴、None なら test の予測はしない
+        :param weight: 学習データのサンプルの重み
+        :param oof: fold ごとに値が変わる特徴 (fold 数, 学習データの行数, カラム数) e.g.) OOFTargetEncoder.encode
+        :param oof_test: test の fold ごとに値が変わる特徴 (test の行数, カラム数) e.g.) OOFTargetEncoder.encode_full
+        :param oof_columns: oof のカラム名
+        :param feature_name: x のカラム名
+        :param ckptdir: fold ごとのモデルを model_{fold}.txt として保存するディレクトリ
+        :param cache_dir: ビン分割した Dataset の保存先、FoldDatasets を参照
+        '''
+        if oof is not None and len(oof) != len(splits):
+            raise ValueError(f'oof must have {len(splits)} folds, but got {len(oof)}')
+        if (oof is None) != (oof_test is None) and x_test is not None:
+            raise ValueError('oof and oof_test must be given together')
+        if ckptdir is not None:
+            ckptdir = Path(ckptdir)
+            ckptdir.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            if cache_dir is None and self.n_workers > 1:
+                # ワーカーごとにビン分割しないように、一度だけ作ってファイル経由で渡す
+                cache_dir = Path(tmpdir)
+            params = self.fold_params
+            # num_threads はビン分割に関係しないので、ワーカー数を変えても同じ binary を使えるようにする
+            dataset_params = {k: v for k, v in params.items() if k != 'num_threads'}
+            datasets = FoldDatasets(x, y, weight, dataset_params, feature_name=feature_name, cache_dir=cache_dir)
+            if self.n_workers > 1:
+                # ワーカーが読む binary を先に保存しておく
+                datasets.dataset
+            tasks = [
+                (
+                    i, train_idx, valid_idx, oof[i] if oof is not None else None, oof_columns,
+                    params, self.num_rounds, self.early_stopping_rounds, self.verbose_eval, self.feval, ckptdir
+                )
+                for i, (train_idx, valid_idx) in enumerate(splits)
+            ]
+            results = self._run_tasks(datasets, x_test, oof_test, tasks)
+
+        oof_pred = np.zeros(len(y), dtype=np.float64)
+        scores = []
+        for (train_idx, valid_idx), result in zip(splits, results):
+            oof_pred[valid_idx] = result.valid_pred
+            scores.append(self.metric(np.asarray(y)[valid_idx], result.valid_pred))
+            logger.info(f'fold {result.fold}: score {scores[-1]:.4f}, best iteration {result.model.best_iteration}')
+        valid = np.concatenate([valid_idx for _, valid_idx in splits])
+        score = self.metric(np.asarray(y)[valid], oof_pred[valid])
+        logger.info(f'whole score: {score:.4f}')
+        test_pred = np.stack([r.test_pred for r in results]) if x_test is not None else None
+        return CVResult(oof_pred, test_pred, [r.model for r in results], scores, score)
+
+    def _run_tasks(
+        self,
+        datasets: FoldDatasets,
+        x_test: Optional[np.ndarray],
+        oof_test: Optional[np.ndarray],
+        tasks: List[Tuple]
+    ) -> List[FoldResult]:
+        if self.n_workers <= 1:
+            return [_train_fold(datasets, x_test, oof_test, *task) for task in tasks]
+        # LightGBM の OpenMP は fork 後に固まることがあるので spawn にする
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            self.n_workers, mp_context=context, initializer=_init_worker, initargs=(datasets, x_test, oof_test)
+        ) as executor:
+            futures = [executor.submit(_train_fold_in_worker, *task) for task in tasks]
+            return [future.result() for future in futures]
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+import hashlib
+import json
+import warnings
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+from mykaggle.lib.pandas_util import fingerprint
+from mykaggle.util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FoldDatasets:
+    '''
+    学習データ全体を一度だけビン分割した lgb.Dataset を作り、fold ごとの Dataset はその subset で作るクラス。
+    ビン分割した Dataset は save_binary で cache_dir に保存するので、同じデータなら次の実行でもビン分割しない。
+    target encoding のように fold ごとに値が変わるカラムだけは fold ごとにビン分割し、add_features_from で後ろに足す。
+
+      datasets = FoldDatasets(x_train, y_train, cache_dir=ckptdir)
+      oof = OOFTargetEncoder(keys, targets).encode(df_train, folds)
+      for i, (train_idx, valid_idx) in enumerate(splits):
+          train_data, valid_data = datasets.fold(train_idx, valid_idx, oof[i], oof_columns)
+          model = lgb.train(params, train_data, valid_sets=[train_data, valid_data])
+          pred = model.predict(datasets.matrix(valid_idx, oof[i]))
+    '''
+
+    def __init__(
+        self,
+        x: Union[np.ndarray, pd.DataFrame],
+        y: np.ndarray,
+        weight: Optional[np.ndarray] = None,
+        params: Optional[Dict[str, Any]] = None,
+        feature_name: Optional[List[str]] = None,
+        categorical_feature: Optional[List[str]] = None,
+        cache_dir: Optional[Path] = None
+    ) -> None:
+        '''
+        :param x: 学習データ全体の特徴、DataFrame ならカラム名を feature_name に使う
+        :param y: 学習データ全体のラベル
+        :param weight: 学習データ全体のサンプルの重み
+        :param params: Dataset を作るときのパラメータ e.g.) max_bin, min_data_in_leaf
+          ビン分割に関わるパラメータは後から変えられないので、lgb.train に渡すパラメータをそのまま渡すとよい
+        :param feature_name: 特徴の名前
+        :param categorical_feature: カテゴリとして扱う特徴の名前
+        :param cache_dir: ビン分割した Dataset の保存先、None なら保存しない
+        '''
+        if feature_name is None:
+            feature_name = list(map(str, x.columns)) if isinstance(x, pd.DataFrame) else None
+        self.x = x
+        self.y = np.asarray(y)
+        self.weight = weight
+        self.params = {'verbose': -1, **(params or {})}
+        self.feature_name = feature_name
+        self.categorical_feature = categorical_feature
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._dataset: Optional[lgb.Dataset] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # lgb.Dataset のハンドルは pickle できないので、別プロセスでは binary か x から作り直す
+        return {**self.__dict__, '_dataset': None}
+
+    @property
+    def num_data(self) -> int:
+        return self.x.shape[0]
+
+    @property
+    def key(self) -> str:
+        '''
+        特徴, ラベル, 重み, Dataset のパラメータから決まるキー。save_binary したファイル名に使う。
+        '''
+        hasher = hashlib.sha256()
+        if isinstance(self.x, pd.DataFrame):
+            hasher.update(fingerprint(self.x).encode())
+        else:
+            hasher.update(f'{self.x.shape},{self.x.dtype}'.encode())
+            hasher.update(np.ascontiguousarray(self.x).data)
+        for array in [self.y, self.weight]:
+            if array is not None:
+                hasher.update(np.ascontiguousarray(array, dtype=np.float64).data)
+        config = [self.params, self.feature_name, self.categorical_feature]
+        hasher.update(json.dumps(config, sort_keys=True, default=str).encode())
+        return hasher.hexdigest()
+
+    @property
+    def dataset(self) -> lgb.Dataset:
+        '''
+        学習データ全体をビン分割した Dataset. 保存したものがあればそれを読む。
+        '''
+        if self._dataset is not None:
+            return self._dataset
+        path = self.cache_dir / f'lgb_dataset_{self.key}.bin' if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            dataset = lgb.Dataset(str(path), params=self.params).construct()
+        else:
+            dataset = lgb.Dataset(
+                self.x, label=self.y, weight=self.weight, params=self.params,
+                feature_name=self.feature_name or 'auto',
+                categorical_feature=self.categorical_feature or 'auto'
+            ).construct()
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                dataset.save_binary(str(path))
+                logger.info(f'saved binned dataset to {path}')
+        self._dataset = dataset
+        return dataset
+
+    def fold(
+        self,
+        train_idx: np.ndarray,
+        valid_idx: np.ndarray,
+        oof: Optional[np.ndarray] = None,
+        oof_columns: Optional[List[str]] = None
+    ) -> Tuple[lgb.Dataset, lgb.Dataset]:
+        '''
+        fold の学習用と検証用の Dataset を返す。どちらも全体の Dataset のビンをそのまま使う。
+        Dataset の行は train_idx, valid_idx を昇順に並べた順になる。
+        :param train_idx: 学習に使う行
+        :param valid_idx: 検証に使う行
+        :param oof: この fold 用の out-of-fold な特徴、(全体の行数, カラム数) の配列
+          e.g.) OOFTargetEncoder.encode の [fold]。これだけは train_idx の行でビン分割する
+        :param oof_columns: oof のカラム名
+        '''
+        train_data = self.dataset.subset(np.sort(train_idx)).construct()
+        valid_data = self.dataset.subset(np.sort(valid_idx)).construct()
+        if oof is None:
+            return train_data, valid_data
+
+        oof = np.asarray(oof)
+        if oof.shape[0] != self.num_data:
+            raise ValueError(f'oof must have {self.num_data} rows, but got {oof.shape[0]}')
+        if oof_columns is None:
+            oof_columns = [f'oof_{i}' for i in range(oof.shape[1])]
+        oof_train = lgb.Dataset(
+            oof[np.sort(train_idx)], params=self.params, feature_name=oof_columns, free_raw_data=False
+        ).construct()
+        oof_valid = lgb.Dataset(
+            oof[np.sort(valid_idx)], params=self.params, feature_name=oof_columns,
+            reference=oof_train, free_raw_data=False
+        ).construct()
+        with warnings.catch_warnings():
+            # 生データを持たないことと、カテゴリ特徴の設定を戻すことの警告が出るが、ビンは保持されている
+            warnings.simplefilter('ignore')
+            train_data.add_features_from(oof_train)
+            valid_data.add_features_from(oof_valid)
+        return train_data, valid_data
+
+    def matrix(self, idx: np.ndarray, oof: Optional[np.ndarray] = None) -> np.ndarray:
+        '''
+        fold で作った Dataset と同じ順のカラムの、idx の行の行列を返す。学習したモデルで予測するときに使う。
+        '''
+        x = self.x.iloc[idx].values if isinstance(self.x, pd.DataFrame) else self.x[idx]
+        if oof is None:
+            return x
+        return np.hstack([x, np.asarray(oof)[idx]])
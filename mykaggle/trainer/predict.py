@@ -0,0 +1,93 @@
+from typing import List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+
+AVERAGES = ['log', 'linear']
+
+
+class FoldPredictor:
+    '''
+    fold ごとのモデルの予測をまとめて行うクラス。notebook の predict() の代わりに使う。
+    特徴は一度だけ連続した float32 の行列にし、chunk_size 行ずつ全モデルで予測する。
+    n_workers > 1 ならモデルごとにスレッドで並列に予測する (LightGBM は予測中に GIL を手放す)。
+    モデルは log1p した target で学習している前提で、average で平均を取る空間を選ぶ。
+
+      predictor = FoldPredictor.from_dir(ckptdir, average='linear')
+      preds = predictor.predict(x_test)
+    '''
+
+    def __init__(
+        self,
+        models: List[lgb.Booster],
+        average: str = 'linear',
+        chunk_size: int = 100_000,
+        n_workers: int = 1,
+        num_threads: Optional[int] = None
+    ) -> None:
+        '''
+        :param models: fold ごとのモデル
+        :param average: 'log' なら log1p の空間で平均してから expm1, 'linear' なら expm1 してから平均する
+        :param chunk_size: 一度に予測する行数
+        :param n_workers: 並列に予測するモデルの数
+        :param num_threads: 全体で使うスレッド数、None なら CPU 数。モデルごとには n_workers で分ける
+        '''
+        if average not in AVERAGES:
+            raise ValueError(f'average must be one of {AVERAGES}, but got {average}')
+        self.models = models
+        self.average = average
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.num_threads = num_threads or os.cpu_count() or 1
+
+    @classmethod
+    def from_dir(cls, ckptdir: Path, **kwargs) -> 'FoldPredictor':
+        '''
+        CVRunner が保存した model_{fold}.txt を fold の順に読む。
+        '''
+        paths = sorted(Path(ckptdir).glob('model_*.txt'), key=lambda p: int(p.stem.split('_')[-1]))
+        if len(paths) == 0:
+            raise FileNotFoundError(f'no model_*.txt in {ckptdir}')
+        return cls([lgb.Booster(model_file=str(p)) for p in paths], **kwargs)
+
+    def predict(self, x: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        '''
+        全モデルの予測を average の空間で平均して、expm1 した値を返す。
+        '''
+        preds = self.predict_folds(x)
+        if self.average == 'log':
+            return np.expm1(preds.mean(axis=0))
+        return np.expm1(preds).mean(axis=0)
+
+    def predict_folds(self, x: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        '''
+        モデルごとの (log1p の空間の) 予測を返す。
+        Returns:
+          (モデル数, x の行数) の配列
+        '''
+        matrix = self._to_matrix(x)
+        preds = np.empty((len(self.models), matrix.shape[0]), dtype=np.float64)
+        num_threads = max(1, self.num_threads // max(1, min(self.n_workers, len(self.models))))
+
+        def predict_chunk(i: int, start: int) -> None:
+            end = min(start + self.chunk_size, matrix.shape[0])
+            preds[i, start:end] = self.models[i].predict(matrix[start:end], num_threads=num_threads)
+
+        tasks = [(i, start) for start in range(0, matrix.shape[0], self.chunk_size) for i in range(len(self.models))]
+        if self.n_workers <= 1:
+            for task in tasks:
+                predict_chunk(*task)
+        else:
+            with ThreadPoolExecutor(self.n_workers) as executor:
+                for future in [executor.submit(predict_chunk, *task) for task in tasks]:
+                    future.result()
+        return preds
+
+    def _to_matrix(self, x: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        # LightGBM は C 順の float32 をコピーせずに受け取るので、行の chunk も連続したまま切り出せる
+        if isinstance(x, pd.DataFrame):
+            x = x.to_numpy(dtype=np.float32, na_value=np.nan)
+        return np.ascontiguousarray(x, dtype=np.float32)
@@ -0,0 +1,98 @@
+from typing import Optional, Tuple
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import PCA
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from mykaggle.lib.memo import Memo
+from mykaggle.text import hash_texts
+from mykaggle.transform.base import BaseTransform
+
+# 同じテキストと設定で fit した BOWTransform を使い回すためのキャッシュ
+MAX_FITTED_BOWS = 16
+_fitted_bows = Memo(MAX_FITTED_BOWS)
+
+
+class BOWTransform(BaseTransform):
+    '''
+    テキストを疎行列の BoW (または TFIDF) にして、カラムごとの合計で語彙を絞る Transform.
+    密行列には変換しないので、語彙が大きくなってもメモリは非ゼロ要素の数にしか比例しない。
+    fit した語彙はそのまま別のテキスト (test など) の transform に使える。
+    '''
+
+    def __init__(
+        self,
+        ngram_range: Tuple[int, int] = (1, 1),
+        min_count: float = 0,
+        max_count: Optional[float] = None,
+        tfidf: bool = False
+    ) -> None:
+        '''
+        Args:
+          ngram_range: 使う n-gram の範囲
+          min_count: カラムの合計がこれより大きいものだけ残す
+          max_count: カラムの合計がこれより小さいものだけ残す、None なら上限なし
+          tfidf: True なら TfidfVectorizer, False なら CountVectorizer を使う
+        '''
+        self.ngram_range = ngram_range
+        self.min_count = min_count
+        self.max_count = max_count
+        self.tfidf = tfidf
+
+    def fit(self, texts: np.ndarray) -> 'BOWTransform':
+        self.fit_transform(texts)
+        return self
+
+    def fit_transform(self, texts: np.ndarray) -> sp.csr_matrix:
+        if self.tfidf:
+            self.vectorizer_ = TfidfVectorizer(ngram_range=self.ngram_range)
+        else:
+            self.vectorizer_ = CountVectorizer(ngram_range=self.ngram_range)
+        bow = self.vectorizer_.fit_transform(texts).tocsr()
+        word_count = np.asarray(bow.sum(axis=0)).ravel()
+        mask = word_count > self.min_count
+        if self.max_count is not None:
+            mask &= word_count < self.max_count
+        self.columns_ = np.flatnonzero(mask)
+        return bow[:, self.columns_]
+
+    def transform(self, texts: np.ndarray) -> sp.csr_matrix:
+        return self.vectorizer_.transform(texts).tocsr()[:, self.columns_]
+
+
+def get_bow(
+    texts: np.ndarray,
+    ngram_range: Tuple[int, int] = (1, 1),
+    min_count: float = 0,
+    max_count: Optional[float] = None,
+    tfidf: bool = False
+) -> Tuple[BOWTransform, sp.csr_matrix]:
+    '''
+    texts で fit した BOWTransform と texts の BoW を返す。
+    train と test の特徴はどちらも df_whole から作るので、同じテキストと設定なら fit 済みのものを使い回す。
+    '''
+    key = (hash_texts(texts), tuple(ngram_range), min_count, max_count, tfidf)
+
+    def fit() -> Tuple[BOWTransform, sp.csr_matrix]:
+        transform = BOWTransform(ngram_range, min_count, max_count, tfidf)
+        return transform, transform.fit_transform(texts)
+    return _fitted_bows.get(key, fit)
+
+
+def sparse_pca(bow: sp.spmatrix, n_components: int, random_state: Optional[int] = 0) -> np.ndarray:
+    '''
+    疎行列のまま PCA をかける。中心化は密行列を作らずに ARPACK の中で行うので、値は密行列の PCA と同じになる。
+    ARPACK は n_components < min(bow.shape) が必要なので、それを満たさない小さい行列だけ密にして計算する。
+    '''
+    return fit_sparse_pca(bow, n_components, random_state)[1]
+
+
+def fit_sparse_pca(bow: sp.spmatrix, n_components: int, random_state: Optional[int] = 0) -> Tuple[PCA, np.ndarray]:
+    '''
+    sparse_pca と同じ計算をして、fit した PCA も返す。
+    '''
+    if n_components < min(bow.shape):
+        pca = PCA(n_components, svd_solver='arpack', random_state=random_state)
+        return pca, pca.fit_transform(bow)
+    pca = PCA(n_components)
+    return pca, pca.fit_transform(bow.toarray())
@@ -1,9 +1,98 @@
-from typing import Any, Union, List
+from typing import Any, Dict, Iterable, Union, List, Optional, Tuple
+from pathlib import Path
+import re
+import numpy as np
 import pandas as pd
 
+from mykaggle.lib.arrow_util import iter_batches
+from mykaggle.lib.sketch import GroupedHyperLogLog, GroupedQuantileSketch
 from mykaggle.transform.base import BaseTransform
 
 
+def factorize_keys(dfs: List[pd.DataFrame], keys: List[str]) -> Tuple[List[np.ndarray], int]:
+    '''
+    複数の DataFrame にまたがって keys の組を共通の整数コードにする。
+    keys のどれかが NaN の行は -1 になる。
+    Returns:
+      各 DataFrame の行ごとのコードと、コードの種類数
+    '''
+    sizes = [df.shape[0] for df in dfs]
+    key_codes = [factorize_column(dfs, key) for key in keys]
+    codes, n_groups = combine_codes(key_codes)
+    return np.split(codes, np.cumsum(sizes)[:-1]), n_groups
+
+
+def factorize_column(dfs: List[pd.DataFrame], key: str) -> Tuple[np.ndarray, int]:
+    '''
+    複数の DataFrame の key カラムをつなげて整数コードにする。NaN は -1.
+    どれも同じカテゴリの Categorical (build_vocabulary で作ったものなど) なら、ハッシュし直さずにそのコードを使う。
+    '''
+    dtypes = [df.dtypes[key] for df in dfs]
+    if isinstance(dtypes[0], pd.CategoricalDtype) and all(d == dtypes[0] for d in dtypes):
+        codes = np.concatenate([df.loc[:, key].cat.codes.values for df in dfs]).astype(np.int64)
+        return codes, len(dtypes[0].categories)
+    codes, uniques = pd.factorize(pd.concat([df.loc[:, key] for df in dfs], ignore_index=True))
+    return codes.astype(np.int64), len(uniques)
+
+
+def combine_codes(key_codes: List[Tuple[np.ndarray, int]]) -> Tuple[np.ndarray, int]:
+    '''
+    カラムごとの (コード, 種類数) から、その組のコードを作る。どれかが -1 の行は -1 になる。
+    '''
+    codes = np.zeros(len(key_codes[0][0]), dtype=np.int64)
+    n_groups = 1
+    for key_code, n_uniques in key_codes:
+        combined = np.where((codes < 0) | (key_code < 0), -1, codes * n_uniques + key_code)
+        # 出てくる組だけに詰め直して、キーが増えてもコードが大きくなりすぎないようにする
+        valid = combined >= 0
+        codes = np.full(len(combined), -1, dtype=np.int64)
+        codes[valid], uniques = pd.factorize(combined[valid])
+        n_groups = len(uniques)
+    return codes, n_groups
+
+
+def take_groups(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    '''
+    グループごとの値 values を rows で引く。rows が -1 の行は NaN にする (int, bool は float にする)。
+    '''
+    found = rows >= 0
+    if found.all():
+        return np.take(values, rows)
+    if values.dtype.kind in 'iub':
+        values = values.astype(np.float64)
+    output = np.full(len(rows), np.nan, dtype=values.dtype)
+    output[found] = np.take(values, rows[found])
+    return output
+
+
+# pandas の groupby を使わずにソートと factorize のカーネルで計算する演算
+# mode は最頻値、top{k} は k 番目に多い値で、どちらも同数なら小さい値を先にする
+# count_distinct_pairs は NaN も 1 つの値として数えた (キー, 値) の組の数
+KERNEL_AGGS = ['nunique', 'count_distinct_pairs', 'mode']
+TOPK_PATTERN = re.compile(r'top([1-9][0-9]*)')
+
+
+def is_kernel_agg(agg: Any) -> bool:
+    return isinstance(agg, str) and (agg in KERNEL_AGGS or TOPK_PATTERN.fullmatch(agg) is not None)
+
+
+def result_dtype(dtype: np.dtype, agg: str) -> np.dtype:
+    '''
+    dtype のカラムを agg で集約したときに pandas の groupby が返す dtype.
+    '''
+    if agg in ['count', 'nunique', 'count_distinct_pairs']:
+        return np.dtype(np.int64)
+    if dtype.kind == 'f':
+        return dtype
+    if agg in ['sum', 'min', 'max'] and dtype.kind in 'iu':
+        return np.dtype(np.int64) if agg == 'sum' else dtype
+    if agg in ['min', 'max'] and dtype.kind == 'b':
+        return dtype
+    if agg == 'sum' and dtype.kind == 'b':
+        return np.dtype(np.int64)
+    return np.dtype(np.float64)
+
+
 class BaseGroupByTransform(BaseTransform):
     '''
     GroupBy 系の変換をかける Transform の Base クラス。
@@ -30,6 +119,30 @@ class BaseGroupByTransform(BaseTransform):
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         return self.aggregate(df, self.keys, self.targets, self.aggs)
 
+    def transform_to(self, df: pd.DataFrame, df_to: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        '''
+        df で集約した値を df_to の各行に対応させて返す。
+        pd.merge(df_to, self.transform(df), how='left', on=keys) の集約カラムと同じ値になるが、
+        キーを整数コードにして np.take で引くので、df_to 自体のコピーは作らない。
+        Args:
+          df: 集約に使う DataFrame
+          df_to: 集約値を対応させる DataFrame、指定しなければ df
+        Returns:
+          index が df_to と同じで、集約カラムだけを持つ DataFrame
+        '''
+        if df_to is None:
+            df_to = df
+        df_agg = self.transform(df)
+        (agg_codes, to_codes), n_groups = factorize_keys([df_agg, df_to], self.keys)
+        agg_rows = np.full(n_groups, -1, dtype=np.int64)
+        agg_rows[agg_codes[agg_codes >= 0]] = np.flatnonzero(agg_codes >= 0)
+        rows = np.where(to_codes >= 0, agg_rows[np.maximum(to_codes, 0)], -1)
+
+        output = {}
+        for column in df_agg.columns[len(self.keys):]:
+            output[column] = take_groups(df_agg.loc[:, column].values, rows)
+        return pd.DataFrame(output, index=df_to.index)
+
     def aggregate(
         self,
         df: pd.DataFrame,
@@ -56,6 +169,13 @@ class BasicGroupByTransform(BaseGroupByTransform):
     '''
 
     def __init__(self, keys: List[str], targets: List[str], aggs: List[str]) -> None:
+        '''
+        Args:
+          keys: 集約キー
+          targets: 集約後に計算を行うカラム
+          aggs: 集約後に行う演算。pandas の agg に渡せるものに加えて、
+            mode, top{k} (k 番目に多い値), count_distinct_pairs (NaN も数える nunique) が使える
+        '''
         self.keys = keys
         self.targets = targets
         self.aggs = aggs
@@ -69,6 +189,432 @@ class BasicGroupByTransform(BaseGroupByTransform):
         *args, **kwargs
     ) -> pd.DataFrame:
         columns = keys + targets
-        df_output = df.loc[:, columns].groupby(keys)[targets].agg(aggs).reset_index()
+        grouped = df.loc[:, columns].groupby(keys)
+        pandas_aggs = [a for a in aggs if not is_kernel_agg(a)]
+        if len(pandas_aggs) == len(aggs):
+            df_output = grouped[targets].agg(aggs).reset_index()
+            df_output.columns = keys + self._prepare_aggregated_columns(keys, targets, aggs)
+            return df_output
+
+        # カーネルで計算する演算は、groupby と同じ順のグループコードで集約して pandas の結果と並べる
+        df_keys = grouped.size().reset_index().loc[:, keys]
+        df_pandas = grouped[targets].agg(pandas_aggs) if len(pandas_aggs) > 0 else None
+        codes = np.nan_to_num(grouped.ngroup().values.astype(np.float64), nan=-1).astype(np.int64)
+        kernel = _GroupKernel(codes, df_keys.shape[0])
+        output = {}
+        aggregated_columns = iter(self._prepare_aggregated_columns(keys, targets, aggs))
+        for target in targets:
+            for agg in aggs:
+                if is_kernel_agg(agg):
+                    output[next(aggregated_columns)] = kernel.aggregate(df.loc[:, target].values, agg)
+                else:
+                    name = agg if isinstance(agg, str) else agg.__name__
+                    output[next(aggregated_columns)] = df_pandas.loc[:, (target, name)].values
+        return pd.concat([df_keys, pd.DataFrame(output)], axis=1)
+
+
+# MultiGroupByTransform で計算できる演算、top{k} も使える
+MULTI_AGGS = ['count', 'nunique', 'sum', 'mean', 'std', 'var', 'min', 'max', 'median', 'count_distinct_pairs', 'mode']
+GroupBySpec = Tuple[List[str], List[str], List[str]]
+
+
+class MultiGroupByTransform(BaseTransform):
+    '''
+    複数の (keys, targets, aggs) の GroupBy をまとめて計算する Transform.
+    キーのカラムは全 spec で一度だけ factorize し、集約は np.bincount や ソート済み配列の reduceat で行う。
+    カラムごとに BasicGroupByTransform を作って groupby し直すのと同じ値を、transform_to は df_to の行に揃えた一つの DataFrame で、
+    transform / aggregate は BaseGroupByTransform と同じくグループごとに 1 行で返す。
+    '''
+
+    def __init__(self, specs: List[GroupBySpec]) -> None:
+        '''
+        Args:
+          specs: (集約キー, 集約するカラム, 演算) のリスト。演算は MULTI_AGGS のみ
+        '''
+        for _, _, aggs in specs:
+            unsupported = [a for a in aggs if a not in MULTI_AGGS and not is_kernel_agg(a)]
+            if len(unsupported) > 0:
+                raise ValueError(f'MultiGroupByTransform supports only {MULTI_AGGS}, but got {unsupported}')
+        self.specs = specs
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.transform(df)
+
+    def fit(self, X: pd.DataFrame) -> 'MultiGroupByTransform':
+        return self
+
+    @property
+    def columns(self) -> List[str]:
+        columns: List[str] = []
+        for keys, targets, aggs in self.specs:
+            columns.extend(BaseGroupByTransform(keys, targets, aggs)._prepare_aggregated_columns(keys, targets, aggs))
+        return columns
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        BaseGroupByTransform.transform と同じく、キーでソートしたグループごとに 1 行の集約結果を返す。
+        1 つの DataFrame にするので、全 spec のキーが同じ場合だけ使える。
+        キーが違う spec を混ぜる場合は aggregate を、行ごとの値が欲しい場合は transform_to を使う。
+        '''
+        keys_list = [keys for keys, _, _ in self.specs]
+        if any(keys != keys_list[0] for keys in keys_list):
+            raise ValueError(f'transform needs the same keys for all specs, but got {keys_list}. use aggregate instead')
+        df_aggs = self.aggregate(df)
+        keys = keys_list[0]
+        return pd.concat([df_aggs[0]] + [df_agg.drop(columns=keys) for df_agg in df_aggs[1:]], axis=1)
+
+    def aggregate(self, df: pd.DataFrame) -> List[pd.DataFrame]:
+        '''
+        spec ごとに、キーでソートしたグループごとに 1 行の集約結果 (キーと集約カラム) を返す。
+        BasicGroupByTransform(*spec).transform(df) と同じ値になる。
+        '''
+        key_codes = self._factorize_keys([df])
+        columns = iter(self.columns)
+        output = []
+        for keys, targets, aggs in self.specs:
+            codes, n_groups = combine_codes([key_codes[key] for key in keys])
+            kernel = _GroupKernel(codes, n_groups)
+            groups, first_rows = np.unique(codes, return_index=True)
+            groups, first_rows = groups[groups >= 0], first_rows[groups >= 0]
+            df_keys = df.iloc[first_rows].loc[:, keys].reset_index(drop=True)
+            order = df_keys.sort_values(keys).index.values
+            df_agg = df_keys.iloc[order].reset_index(drop=True)
+            for target in targets:
+                values = df.loc[:, target].values
+                for agg in aggs:
+                    df_agg[next(columns)] = kernel.aggregate(values, agg)[groups[order]]
+            output.append(df_agg)
+        return output
+
+    def transform_to(self, df: pd.DataFrame, df_to: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        '''
+        df で集約した値を df_to の各行に対応させて返す。
+        Args:
+          df: 集約に使う DataFrame
+          df_to: 集約値を対応させる DataFrame、指定しなければ df
+        Returns:
+          index が df_to と同じで、self.columns を持つ DataFrame
+        '''
+        if df_to is None:
+            df_to = df
+        n_rows = df.shape[0]
+        key_codes = self._factorize_keys([df, df_to])
+
+        output = {}
+        columns = iter(self.columns)
+        for keys, targets, aggs in self.specs:
+            codes, n_groups = combine_codes([key_codes[key] for key in keys])
+            kernel = _GroupKernel(codes[:n_rows], n_groups)
+            # df にない組は merge と同じく NaN にする
+            codes_to = codes[n_rows:]
+            rows = np.where((codes_to >= 0) & kernel.exists[np.maximum(codes_to, 0)], codes_to, -1)
+            for target in targets:
+                values = df.loc[:, target].values
+                for agg in aggs:
+                    output[next(columns)] = take_groups(kernel.aggregate(values, agg), rows)
+        return pd.DataFrame(output, index=df_to.index)
+
+    def _factorize_keys(self, dfs: List[pd.DataFrame]) -> Dict[str, Tuple[np.ndarray, int]]:
+        # キーのカラムは全 spec で一度だけ factorize する
+        key_codes: Dict[str, Tuple[np.ndarray, int]] = {}
+        for keys, _, _ in self.specs:
+            for key in keys:
+                if key not in key_codes:
+                    key_codes[key] = factorize_column(dfs, key)
+        return key_codes
+
+
+class _GroupKernel:
+    '''
+    グループコードが決まった行に対して、pandas の groupby と同じ結果になる集約を計算する。
+    target の NaN は除いて計算し、dtype も pandas に合わせる。
+    '''
+
+    def __init__(self, codes: np.ndarray, n_groups: int) -> None:
+        self.codes = codes
+        self.n_groups = n_groups
+        self.exists = np.bincount(codes[codes >= 0], minlength=n_groups) > 0
+
+    def aggregate(self, values: np.ndarray, agg: str) -> np.ndarray:
+        if agg in ['nunique', 'count_distinct_pairs']:
+            value_codes, uniques = pd.factorize(values, use_na_sentinel=agg == 'nunique')
+            valid = (self.codes >= 0) & (value_codes >= 0)
+            pairs = np.unique(self.codes[valid] * len(uniques) + value_codes[valid])
+            return np.bincount(pairs // max(len(uniques), 1), minlength=self.n_groups)
+        if agg == 'mode' or TOPK_PATTERN.fullmatch(agg):
+            return self._frequent_value(values, 1 if agg == 'mode' else int(agg[3:]))
+
+        valid = (self.codes >= 0) & ~pd.isna(values)
+        codes = self.codes[valid]
+        if agg == 'count':
+            return np.bincount(codes, minlength=self.n_groups)
+
+        x = values[valid].astype(np.float64)
+        count = np.bincount(codes, minlength=self.n_groups)
+        if agg == 'sum':
+            result = np.bincount(codes, weights=x, minlength=self.n_groups)
+        elif agg in ['mean', 'std', 'var']:
+            total = np.bincount(codes, weights=x, minlength=self.n_groups)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = np.where(count > 0, total / count, np.nan)
+                if agg != 'mean':
+                    squared = np.bincount(codes, weights=(x - result[codes]) ** 2, minlength=self.n_groups)
+                    result = np.where(count > 1, squared / (count - 1), np.nan)
+                    if agg == 'std':
+                        result = np.sqrt(result)
+        else:
+            result = self._order_statistic(codes, x, count, agg)
+        dtype = result_dtype(values.dtype, agg)
+        if dtype.kind != 'f':
+            # 値のないグループは take_groups で NaN になるので、ここでは 0 を入れておく
+            result = np.where(np.isnan(result), 0, result)
+        return result.astype(dtype)
+
+    def _frequent_value(self, values: np.ndarray, k: int) -> np.ndarray:
+        '''
+        グループごとに k 番目に多い値を返す。同数の値は小さい順に並べる。k 種類の値がないグループは NaN.
+        (グループ, 値) の組を数えてから、グループ, 件数の降順, 値の順に一度だけソートする。
+        '''
+        value_codes, uniques = pd.factorize(values, sort=True)
+        valid = (self.codes >= 0) & (value_codes >= 0)
+        n_uniques = max(len(uniques), 1)
+        pairs, counts = np.unique(self.codes[valid] * n_uniques + value_codes[valid], return_counts=True)
+        groups, value_codes = pairs // n_uniques, pairs % n_uniques
+        order = np.lexsort((value_codes, -counts, groups))
+        groups, value_codes = groups[order], value_codes[order]
+        # ソート後の各組がグループ内で何番目か
+        starts = np.searchsorted(groups, groups, side='left')
+        selected = np.arange(len(groups)) - starts == k - 1
+        rows = np.full(self.n_groups, -1, dtype=np.int64)
+        rows[groups[selected]] = value_codes[selected]
+        return take_groups(np.asarray(uniques), rows)
+
+    def _order_statistic(self, codes: np.ndarray, x: np.ndarray, count: np.ndarray, agg: str) -> np.ndarray:
+        '''
+        グループ, 値の順にソートして min/max/median を取る。
+        '''
+        order = np.lexsort((x, codes))
+        x = x[order]
+        starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+        found = count > 0
+        result = np.full(self.n_groups, np.nan)
+        if agg == 'min':
+            result[found] = x[starts[found]]
+        elif agg == 'max':
+            result[found] = x[starts[found] + count[found] - 1]
+        else:
+            lower = starts[found] + (count[found] - 1) // 2
+            upper = starts[found] + count[found] // 2
+            result[found] = (x[lower] + x[upper]) / 2
+        return result
+
+
+# ChunkedGroupByTransform で計算できる演算。median と nunique はスケッチによる近似値
+CHUNKED_AGGS = ['count', 'sum', 'mean', 'std', 'var', 'min', 'max', 'median', 'nunique']
+
+
+class ChunkedGroupByTransform(BaseGroupByTransform):
+    '''
+    メモリに載らないデータを行のチャンクごとに読みながら GroupBy する Transform.
+    グループごとに count, sum, 平均, 平均からの二乗和, min, max のマージできる途中結果だけを持つので、
+    メモリはグループ数にしか比例しない。count/sum/mean/std/var/min/max は BasicGroupByTransform と同じ値
+    (浮動小数点の足し算の順序の差を除く) になり、median と nunique は lib.sketch のスケッチによる近似値になる。
+    '''
+
+    def __init__(
+        self,
+        keys: List[str],
+        targets: List[str],
+        aggs: List[str],
+        hll_precision: int = 10,
+        relative_accuracy: float = 0.01
+    ) -> None:
+        '''
+        Args:
+          keys: 集約キー
+          targets: 集約後に計算を行うカラム
+          aggs: 集約後に行う演算。CHUNKED_AGGS のみ
+          hll_precision: nunique に使う HyperLogLog のレジスタ数 (2 ** hll_precision)
+          relative_accuracy: median に使う分位点スケッチの相対誤差
+        '''
+        unsupported = [a for a in aggs if a not in CHUNKED_AGGS]
+        if len(unsupported) > 0:
+            raise ValueError(f'ChunkedGroupByTransform supports only {CHUNKED_AGGS}, but got {unsupported}')
+        super().__init__(keys, targets, aggs)
+        self.hll_precision = hll_precision
+        self.relative_accuracy = relative_accuracy
+
+    def aggregate_file(self, path: Path, chunksize: int = 1_000_000) -> pd.DataFrame:
+        '''
+        CSV / feather / parquet ファイルを chunksize 行ずつ読んで集約する。
+        '''
+        return self.aggregate_chunks(iter_batches(path, self.keys + self.targets, chunksize))
+
+    def aggregate_chunks(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        '''
+        DataFrame のチャンクを順に集約する。結果は BasicGroupByTransform.transform と同じ形式。
+        '''
+        partial = _PartialAggregates(self.keys, self.targets, self.aggs, self.hll_precision, self.relative_accuracy)
+        for chunk in chunks:
+            partial.update(chunk)
+        df_output = partial.result()
+        df_output.columns = self.keys + self._prepare_aggregated_columns(self.keys, self.targets, self.aggs)
+        return df_output
+
+    def aggregate(
+        self,
+        df: pd.DataFrame,
+        keys: List[str],
+        targets: List[str],
+        aggs: List[str],
+        chunksize: Optional[int] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        chunksize = chunksize or max(df.shape[0], 1)
+        partial = _PartialAggregates(keys, targets, aggs, self.hll_precision, self.relative_accuracy)
+        for start in range(0, df.shape[0], chunksize):
+            partial.update(df.iloc[start:start + chunksize])
+        df_output = partial.result()
         df_output.columns = keys + self._prepare_aggregated_columns(keys, targets, aggs)
         return df_output
+
+
+class _PartialAggregates:
+    '''
+    ChunkedGroupByTransform のグループごとの途中結果。
+    これまでに出てきたキーの組を df_keys に持ち、その行番号をグループ番号にする。
+    '''
+
+    def __init__(
+        self,
+        keys: List[str],
+        targets: List[str],
+        aggs: List[str],
+        hll_precision: int,
+        relative_accuracy: float
+    ) -> None:
+        self.keys = keys
+        self.targets = targets
+        self.aggs = aggs
+        self.df_keys: Optional[pd.DataFrame] = None
+        self.dtypes: Dict[str, np.dtype] = {}
+        self.stats: Dict[str, Dict[str, np.ndarray]] = {t: self._empty_stats(0) for t in targets}
+        self.hlls = {t: GroupedHyperLogLog(0, hll_precision) for t in targets if 'nunique' in aggs}
+        self.quantiles = {t: GroupedQuantileSketch(relative_accuracy) for t in targets if 'median' in aggs}
+
+    @property
+    def n_groups(self) -> int:
+        return 0 if self.df_keys is None else self.df_keys.shape[0]
+
+    def _empty_stats(self, n_groups: int) -> Dict[str, np.ndarray]:
+        return {
+            'count': np.zeros(n_groups, dtype=np.int64),
+            'sum': np.zeros(n_groups),
+            'mean': np.zeros(n_groups),
+            'm2': np.zeros(n_groups),
+            'min': np.full(n_groups, np.inf),
+            'max': np.full(n_groups, -np.inf),
+        }
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        codes = self._group_codes(chunk)
+        valid_rows = codes >= 0
+        for target in self.targets:
+            values = chunk.loc[:, target].values
+            dtype = self.dtypes.get(target, values.dtype)
+            self.dtypes[target] = values.dtype if dtype == values.dtype else np.result_type(dtype, values.dtype)
+            valid = valid_rows & ~pd.isna(values)
+            self._update_stats(self.stats[target], codes[valid], values[valid])
+            if target in self.hlls:
+                self.hlls[target].resize(self.n_groups)
+                self.hlls[target].add(codes[valid], values[valid])
+            if target in self.quantiles:
+                self.quantiles[target].add(codes[valid], values[valid])
+
+    def _group_codes(self, chunk: pd.DataFrame) -> np.ndarray:
+        '''
+        チャンクの各行のグループ番号を返し、新しく出てきたキーの組を df_keys に追加する。
+        '''
+        if self.df_keys is None:
+            (codes,), n_groups = factorize_keys([chunk], self.keys)
+            n_known = 0
+        else:
+            n_known = self.n_groups
+            # 既知のキーの組は重複がないので、先に並べるとコードが 0, 1, ..., n_known - 1 になる
+            (_, codes), n_groups = factorize_keys([self.df_keys, chunk], self.keys)
+        if n_groups > n_known:
+            _, first_rows = np.unique(codes, return_index=True)
+            new_rows = first_rows[-(n_groups - n_known):]
+            df_new = chunk.iloc[new_rows].loc[:, self.keys].reset_index(drop=True)
+            self.df_keys = df_new if self.df_keys is None else pd.concat([self.df_keys, df_new], ignore_index=True)
+            for stats in self.stats.values():
+                empty = self._empty_stats(n_groups - n_known)
+                for name in stats:
+                    stats[name] = np.concatenate([stats[name], empty[name]])
+        return codes
+
+    def _update_stats(self, stats: Dict[str, np.ndarray], codes: np.ndarray, values: np.ndarray) -> None:
+        n_groups = self.n_groups
+        count = np.bincount(codes, minlength=n_groups)
+        if values.dtype.kind not in 'iufb':
+            # 文字列などは count と nunique だけ計算できる
+            stats['count'] += count
+            return
+        x = values.astype(np.float64)
+        total = np.bincount(codes, weights=x, minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, total / count, 0)
+        m2 = np.bincount(codes, weights=(x - mean[codes]) ** 2, minlength=n_groups)
+
+        # 平均と二乗和は Chan らの方法でマージする (sum of squares から引き算するより桁落ちしにくい)
+        n_a = stats['count']
+        n = n_a + count
+        delta = mean - stats['mean']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(n > 0, count / n, 0)
+        stats['mean'] = stats['mean'] + delta * ratio
+        stats['m2'] = stats['m2'] + m2 + delta ** 2 * n_a * ratio
+        stats['count'] = n
+        stats['sum'] = stats['sum'] + total
+        np.minimum.at(stats['min'], codes, x)
+        np.maximum.at(stats['max'], codes, x)
+
+    def result(self) -> pd.DataFrame:
+        '''
+        BasicGroupByTransform と同じく、キーでソートしたグループごとの集約値を返す。
+        '''
+        if self.df_keys is None:
+            return pd.DataFrame(columns=self.keys + [f'{t}_{a}' for t in self.targets for a in self.aggs])
+        sort_codes = [pd.factorize(self.df_keys.loc[:, key], sort=True)[0] for key in self.keys]
+        order = np.lexsort(sort_codes[::-1])
+        df_output = self.df_keys.iloc[order].reset_index(drop=True)
+        for target in self.targets:
+            for agg in self.aggs:
+                result = self._finalize(target, agg)
+                dtype = result_dtype(self.dtypes[target], agg)
+                if dtype.kind != 'f':
+                    result = np.where(np.isnan(result), 0, result)
+                df_output[f'{target}_{agg}'] = result[order].astype(dtype)
+        return df_output
+
+    def _finalize(self, target: str, agg: str) -> np.ndarray:
+        stats = self.stats[target]
+        count = stats['count']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if agg == 'count':
+                return count.astype(np.float64)
+            if agg == 'sum':
+                return stats['sum']
+            if agg == 'mean':
+                return np.where(count > 0, stats['sum'] / count, np.nan)
+            if agg in ['var', 'std']:
+                var = np.where(count > 1, stats['m2'] / (count - 1), np.nan)
+                return np.sqrt(var) if agg == 'std' else var
+            if agg == 'min':
+                return np.where(count > 0, stats['min'], np.nan)
+            if agg == 'max':
+                return np.where(count > 0, stats['max'], np.nan)
+        if agg == 'median':
+            return self.quantiles[target].quantile(self.n_groups)
+        self.hlls[target].resize(self.n_groups)
+        return np.round(self.hlls[target].estimate())
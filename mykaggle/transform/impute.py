@@ -0,0 +1,63 @@
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+from mykaggle.transform.base import BaseTransform
+from mykaggle.transform.groupby import MultiGroupByTransform
+
+
+def reconstruct_from_moments(
+    source: np.ndarray,
+    mean_source: np.ndarray,
+    std_source: np.ndarray,
+    mean_target: np.ndarray,
+    std_target: np.ndarray
+) -> np.ndarray:
+    '''
+    source をグループ内で標準化した値を、target のグループの平均と標準偏差で戻す。
+    mean_target + (source - mean_source) / std_source * std_target
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return mean_target + (source - mean_source) / std_source * std_target
+
+
+class GroupMomentImputer(BaseTransform):
+    '''
+    target の欠損を、同じ行の source からグループごとの平均と標準偏差を使って埋める Transform.
+    source をグループ内で z-score にして、target のグループ内の平均と標準偏差で戻した値を入れる。
+    グループの平均と標準偏差は MultiGroupByTransform で一度に集約し、行ごとの計算は配列演算で行う。
+    target と source の両方が欠損している行はそのまま。
+
+      User_Score = GroupMomentImputer(['Platform'], 'User_Score', 'Critic_Score').transform_to(df_whole, df_main)
+    '''
+
+    def __init__(self, keys: List[str], target: str, source: str) -> None:
+        '''
+        Args:
+          keys: 平均と標準偏差を集約するキー
+          target: 欠損を埋めるカラム
+          source: 埋めるのに使うカラム
+        '''
+        self.keys = keys
+        self.target = target
+        self.source = source
+
+    def transform(self, df: pd.DataFrame) -> pd.Series:
+        return self.transform_to(df)
+
+    def transform_to(self, df: pd.DataFrame, df_to: Optional[pd.DataFrame] = None) -> pd.Series:
+        '''
+        df で集約した平均と標準偏差を使って、df_to の target の欠損を埋めた Series を返す。
+        Args:
+          df: 平均と標準偏差の集約に使う DataFrame
+          df_to: 欠損を埋める DataFrame、指定しなければ df
+        '''
+        if df_to is None:
+            df_to = df
+        moments = MultiGroupByTransform([(self.keys, [self.target, self.source], ['mean', 'std'])])
+        df_moments = moments.transform_to(df, df_to)
+        mean_target, std_target, mean_source, std_source = [df_moments.iloc[:, i].values for i in range(4)]
+        target = df_to.loc[:, self.target].values.astype(np.float64)
+        source = df_to.loc[:, self.source].values.astype(np.float64)
+        imputed = reconstruct_from_moments(source, mean_source, std_source, mean_target, std_target)
+        return pd.Series(np.where(np.isnan(target), imputed, target), index=df_to.index, name=self.target)
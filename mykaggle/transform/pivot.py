@@ -1,7 +1,10 @@
-from typing import Any, Union, List, Optional
+from typing import Any, NamedTuple, Union, List, Optional
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 
 from mykaggle.transform.base import BaseTransform
+from mykaggle.transform.groupby import factorize_keys
 
 
 class PivotTransform(BaseTransform):
@@ -72,3 +75,110 @@ class PivotTransform(BaseTransform):
             for index in indices
             for a in aggs
         ]
+
+
+class SparsePivot(NamedTuple):
+    '''
+    SparsePivotTransform の結果。matrix の i 行目が index の i 行目のキーの組に対応する。
+    '''
+    matrix: sp.csr_matrix
+    index: pd.DataFrame
+    columns: List[str]
+
+    def drop_empty_rows(self) -> 'SparsePivot':
+        '''
+        要素が一つもない行を除く。pivot_table の結果に出てくる行と同じになる。
+        '''
+        nonempty = np.diff(self.matrix.indptr) > 0
+        return SparsePivot(self.matrix[nonempty], self.index.loc[nonempty].reset_index(drop=True), self.columns)
+
+    def rows_for(self, df: pd.DataFrame) -> np.ndarray:
+        '''
+        df の各行に対応する matrix の行番号を返す。対応する行がなければ -1.
+        '''
+        keys = self.index.columns.tolist()
+        (index_codes, df_codes), n_groups = factorize_keys([self.index, df], keys)
+        rows = np.full(n_groups, -1, dtype=np.int64)
+        rows[index_codes[index_codes >= 0]] = np.flatnonzero(index_codes >= 0)
+        return np.where(df_codes >= 0, rows[np.maximum(df_codes, 0)], -1)
+
+
+def hstack_pivots(pivots: List[SparsePivot], drop_empty_rows: bool = False) -> SparsePivot:
+    '''
+    同じ DataFrame, 同じ indices で作った SparsePivot を横に並べる。
+    pivot_table の結果を indices で merge していくのと同じだが、行が揃っているので merge はいらない。
+    :param drop_empty_rows: True なら pivot_table の結果を最初の pivot に how='left' で merge していくのと同じく、
+      最初の pivot に要素のある行だけを残す。
+      False なら indices の組すべての行を残す (最初の pivot では空で、後の pivot にだけ要素のある行も含む)
+    '''
+    for pivot in pivots[1:]:
+        if not pivot.index.equals(pivots[0].index):
+            raise ValueError('pivots must have the same index')
+    matrix = sp.hstack([pivot.matrix for pivot in pivots], format='csr')
+    columns = [c for pivot in pivots for c in pivot.columns]
+    if not drop_empty_rows:
+        return SparsePivot(matrix, pivots[0].index, columns)
+    nonempty = np.diff(pivots[0].matrix.indptr) > 0
+    return SparsePivot(matrix[nonempty], pivots[0].index.loc[nonempty].reset_index(drop=True), columns)
+
+
+class SparsePivotTransform(PivotTransform):
+    '''
+    PivotTransform と同じ pivot を、factorize したコードから scipy の疎行列として作る。
+    pivot_table と違って密な DataFrame を作らないので、column の種類が多くても速くて省メモリ。
+    行は df に出てくる indices の組すべて (ソート済み) なので、同じ df から作った結果は hstack_pivots で並べられる。
+    '''
+
+    AGGS = ['count', 'sum']
+
+    def __init__(self, indices: List[str], column: str, target: str, agg: str = 'count') -> None:
+        '''
+        Args:
+          indices: 集約キー
+          column: pivot 後の column とするキー
+          target: 集約対象のキー
+          agg: count か sum
+        '''
+        if agg not in self.AGGS:
+            raise ValueError(f'SparsePivotTransform supports only {self.AGGS}, but got {agg}')
+        super().__init__(indices, column, target, [agg])
+
+    def transform(self, df: pd.DataFrame) -> SparsePivot:  # type: ignore
+        return self.pivot(df, self.indices, self.column, self.target, self.aggs)
+
+    def pivot(  # type: ignore
+        self,
+        df: pd.DataFrame,
+        indices: List[str],
+        column: str,
+        target: str,
+        aggs: List[str],
+        *args, **kwargs
+    ) -> SparsePivot:
+        # pivot_table と同じく、行と列はそれぞれ値でソートしておく
+        index_codes = np.stack([pd.factorize(df.loc[:, index], sort=True)[0] for index in indices], axis=1)
+        has_index = (index_codes >= 0).all(axis=1)
+        rows = np.full(df.shape[0], -1, dtype=np.int64)
+        uniques, first_rows, rows[has_index] = np.unique(
+            index_codes[has_index], axis=0, return_index=True, return_inverse=True
+        )
+        column_codes, column_values = pd.factorize(df.loc[:, column], sort=True)
+
+        # target が NaN でも (index, column) の組があれば pivot_table と同じく 0 の要素として持つ
+        valid = (rows >= 0) & (column_codes >= 0)
+        values = df.loc[valid, target].values
+        if aggs[0] == 'count':
+            data = (~pd.isna(values)).astype(np.float64)
+        else:
+            data = np.nan_to_num(values.astype(np.float64))
+        matrix = sp.csr_matrix((data, (rows[valid], column_codes[valid])), shape=(len(uniques), len(column_values)))
+        matrix.sum_duplicates()
+
+        # 要素のある列だけ残す (pivot_table は全部 NaN の列を落とす)
+        used = np.bincount(matrix.indices, minlength=matrix.shape[1]) > 0
+        matrix = matrix[:, used]
+        column_values = [c for c, u in zip(column_values, used) if u]
+
+        df_index = df.loc[has_index, indices].iloc[first_rows].reset_index(drop=True)
+        columns = self._prepare_pivoted_columns(indices, column, column_values, target, aggs)
+        return SparsePivot(matrix, df_index, columns)
@@ -0,0 +1,144 @@
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from mykaggle.lib.memo import Memo
+from mykaggle.transform.base import BaseTransform
+from mykaggle.transform.groupby import factorize_keys
+
+# (集約キー, 順位をつけるカラム) の組、カラムが None なら行の順で順位をつける
+RankSpec = Tuple[List[str], Optional[str]]
+# 同じ DataFrame とキーの順位を特徴の間で使い回すためのキャッシュ
+MAX_COMPUTED_RANKS = 32
+_computed_ranks = Memo(MAX_COMPUTED_RANKS)
+RANK_STATS = ['rank', 'cumcount', 'size', 'count', 'pct']
+
+
+class GroupRanks(NamedTuple):
+    '''
+    1 つの RankSpec について、元の行の順に並んだグループ内の順位。キーのどれかが NaN の行はすべて NaN.
+    rank: 1 から始まる順位、同じ値は平均の順位 (groupby().rank() と同じ)。順位をつけるカラムが NaN の行は NaN
+    cumcount: (カラム, 行) の順で 0 から数えた位置 (カラムが None なら groupby().cumcount() と同じ)
+    size: グループの行数
+    count: グループ内で順位をつけるカラムが NaN でない行数
+    pct: rank / count
+    '''
+    rank: np.ndarray
+    cumcount: np.ndarray
+    size: np.ndarray
+    count: np.ndarray
+    pct: np.ndarray
+
+
+def compute_group_ranks(df: pd.DataFrame, keys: List[str], by: Optional[str] = None) -> GroupRanks:
+    '''
+    keys のグループごとに by の順位を、(グループ, by, 行) の lexsort 一回で計算する。
+    '''
+    n_rows = df.shape[0]
+    (codes,), n_groups = factorize_keys([df], keys)
+    valid = codes >= 0
+    if by is None:
+        values = np.arange(n_rows, dtype=np.float64)
+    else:
+        values = df.loc[:, by].to_numpy(dtype=np.float64, na_value=np.nan)
+    notna = valid & ~np.isnan(values)
+    # NaN は lexsort で後ろにくるので、グループ内で値のある行が先に並ぶ
+    order = np.lexsort((np.arange(n_rows), values, np.where(valid, codes, n_groups)))
+    sizes = np.bincount(codes[valid], minlength=n_groups)
+    counts = np.bincount(codes[notna], minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    n_valid = valid.sum()
+    sorted_codes = codes[order[:n_valid]]
+    sorted_values = values[order[:n_valid]]
+    position = np.arange(n_valid) - starts[sorted_codes]
+    # 同じグループで同じ値の塊ごとに、最初と最後の位置の平均を順位にする
+    new_block = np.ones(n_valid, dtype=bool)
+    new_block[1:] = (sorted_codes[1:] != sorted_codes[:-1]) | (sorted_values[1:] != sorted_values[:-1])
+    block = np.cumsum(new_block) - 1
+    block_starts = np.flatnonzero(new_block)
+    block_ends = np.append(block_starts[1:], n_valid) - 1
+    sorted_ranks = position - (np.arange(n_valid) - block_starts[block]) + (block_ends - block_starts)[block] / 2 + 1
+    sorted_ranks[np.isnan(sorted_values)] = np.nan
+
+    rank = np.full(n_rows, np.nan)
+    cumcount = np.full(n_rows, np.nan)
+    size = np.full(n_rows, np.nan)
+    count = np.full(n_rows, np.nan)
+    rank[order[:n_valid]] = sorted_ranks
+    cumcount[order[:n_valid]] = position
+    size[valid] = sizes[codes[valid]]
+    count[valid] = counts[codes[valid]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = rank / count
+    ranks = GroupRanks(rank, cumcount, size, count, pct)
+    # メモした配列を特徴の間で共有するので、書き換えられないようにしておく
+    for array in ranks:
+        array.flags.writeable = False
+    return ranks
+
+
+class GroupRankTransform(BaseTransform):
+    '''
+    複数の (keys, by) について、グループ内の順位, cumcount, グループの行数, 順位の割合 (GroupRanks) をまとめて計算する Transform.
+    spec ごとに lexsort を一回だけ行い、結果は (spec, DataFrame) ごとにメモしておくので、
+    同じ DataFrame (others['main'] など) に同じ spec を使う特徴 (YearRank の仲間など) は並べ替えをやり直さない。
+    中身のハッシュは並べ替えと同じくらい時間がかかるので、メモは DataFrame の id で引き、
+    計算したときのキーと順位をつけるカラムのコピーと比べて、書き換えられていないことを確かめてから使う。
+
+      year = GroupRankTransform([(['Year_of_Release'], 'id')]).ranks(df_main)[0]
+      df_main['year_rank_rate'] = year.pct
+    '''
+
+    def __init__(self, specs: List[RankSpec]) -> None:
+        '''
+        Args:
+          specs: (集約キー, 順位をつけるカラム) のリスト。カラムが None なら行の順で順位をつける
+        '''
+        self.specs = specs
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.transform(df)
+
+    def fit(self, X: pd.DataFrame) -> 'GroupRankTransform':
+        return self
+
+    @property
+    def columns(self) -> List[str]:
+        return [
+            '_'.join([stat, by or 'row', 'groupby'] + keys)
+            for keys, by in self.specs for stat in RANK_STATS
+        ]
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Returns:
+          index が df と同じで、self.columns を持つ DataFrame
+        '''
+        columns = iter(self.columns)
+        output = {}
+        for ranks in self.ranks(df):
+            for stat in RANK_STATS:
+                output[next(columns)] = getattr(ranks, stat)
+        return pd.DataFrame(output, index=df.index)
+
+    def ranks(self, df: pd.DataFrame) -> List[GroupRanks]:
+        '''
+        spec ごとの GroupRanks を返す。同じ spec と DataFrame で計算済みならそれを返す。
+        '''
+        output = []
+        for keys, by in self.specs:
+            columns = keys + ([by] if by is not None else [])
+            key = (id(df), tuple(keys), by)
+            # 比較はハッシュや並べ替えよりずっと速い (100 万行で 5ms ほど、並べ替えは 250-400ms)
+            # id が別の DataFrame に使い回されたり、カラムが書き換えられたりしていれば計算し直す
+            data, ranks = _computed_ranks.get(key, lambda: self._compute(df, keys, by))
+            if not df.loc[:, columns].equals(data):
+                data, ranks = self._compute(df, keys, by)
+                _computed_ranks.put(key, (data, ranks))
+            output.append(ranks)
+        return output
+
+    def _compute(self, df: pd.DataFrame, keys: List[str], by: Optional[str]) -> Tuple[pd.DataFrame, GroupRanks]:
+        data = df.loc[:, keys + ([by] if by is not None else [])].copy()
+        return data, compute_group_ranks(df, keys, by)
@@ -0,0 +1,143 @@
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from mykaggle.transform.groupby import BasicGroupByTransform, factorize_keys
+
+# fold ごとの和, 件数, 偏差の二乗和から out-of-fold の値を求められる集約
+SUPPORTED_AGGS = ['mean', 'sum', 'count', 'std', 'var']
+
+
+class OOFTargetEncoder(BasicGroupByTransform):
+    '''
+    fold ごとの target encoding を全 fold 分まとめて計算する GroupByTransform.
+    (fold, key) ごとの和と件数を一度だけ集約し、全体から fold k の分を引くことで
+    「fold k 以外の行で集約した値」を全 fold について求める。
+    fold ごとに groupby と merge をやり直す必要がなくなる。
+    '''
+
+    def __init__(self, keys: List[str], targets: List[str], aggs: List[str] = ['mean']) -> None:
+        '''
+        Args:
+          keys: 集約キー
+          targets: 集約後に計算を行うカラム
+          aggs: 集約後に行う演算、mean/sum/count/std/var のみ
+        '''
+        unsupported = [a for a in aggs if a not in SUPPORTED_AGGS]
+        if len(unsupported) > 0:
+            raise ValueError(f'OOFTargetEncoder supports only {SUPPORTED_AGGS}, but got {unsupported}')
+        super().__init__(keys, targets, aggs)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._prepare_aggregated_columns(self.keys, self.targets, self.aggs)
+
+    def encode(self, df: pd.DataFrame, folds: np.ndarray, df_to: Optional[pd.DataFrame] = None) -> np.ndarray:
+        '''
+        全 fold 分の out-of-fold な集約値を df_to の各行に割り当てて返す。
+        Args:
+          df: 集約に使う DataFrame
+          folds: df の各行の fold 番号 (0 始まり)、集約に使わない行は -1
+          df_to: 値を割り当てる DataFrame、指定しなければ df
+        Returns:
+          (fold 数, df_to の行数, len(self.columns)) の C-contiguous な配列。
+          [k] は fold k 以外の行で集約した値で、fold k の学習時の train, valid どちらにもそのまま使える。
+        '''
+        folds = np.asarray(folds)
+        n_folds = int(folds.max()) + 1
+        moments, codes_to = self._moments(df, folds, n_folds, df_to)
+        return self._assign([self._out_of_fold(m) for m in moments], codes_to)
+
+    def encode_full(self, df: pd.DataFrame, df_to: Optional[pd.DataFrame] = None) -> np.ndarray:
+        '''
+        df の全行で集約した値を df_to の各行に割り当てて返す。test の特徴を作るときに使う。
+        Returns:
+          (df_to の行数, len(self.columns)) の C-contiguous な配列
+        '''
+        folds = np.zeros(df.shape[0], dtype=np.int64)
+        moments, codes_to = self._moments(df, folds, 1, df_to)
+        return self._assign(moments, codes_to)[0]
+
+    def _moments(
+        self,
+        df: pd.DataFrame,
+        folds: np.ndarray,
+        n_folds: int,
+        df_to: Optional[pd.DataFrame]
+    ) -> Tuple[List[np.ndarray], np.ndarray]:
+        '''
+        target ごとに (行数, 非 NaN の件数, 和, 平均からの偏差の二乗和) を (fold, グループ) 単位で一度に集約する。
+        Returns:
+          target ごとの (4, fold 数, グループ数) の配列のリストと、df_to の各行のグループコード
+        '''
+        if df_to is None:
+            df_to = df
+        (codes, codes_to), n_groups = factorize_keys([df, df_to], self.keys)
+        used = (codes >= 0) & (folds >= 0)
+        index = folds[used] * n_groups + codes[used]
+        size = n_folds * n_groups
+
+        # target が全部 NaN でもグループ自体は存在するので、行数は別に数える
+        num_rows = np.bincount(index, minlength=size).astype(np.float64)
+        moments = []
+        for target in self.targets:
+            y = df.loc[:, target].values.astype(np.float64)[used]
+            notna = ~np.isnan(y)
+            count = np.bincount(index[notna], minlength=size).astype(np.float64)
+            total = np.bincount(index[notna], weights=y[notna], minlength=size)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = np.where(count > 0, total / count, 0)
+            # 二乗和から引き算すると target が大きく散らばりが小さいときに桁落ちするので、中心化して集約する
+            m2 = np.bincount(index[notna], weights=(y[notna] - mean[index[notna]]) ** 2, minlength=size)
+            moments.append(np.stack([num_rows, count, total, m2]).reshape(4, n_folds, n_groups))
+        return moments, codes_to
+
+    def _out_of_fold(self, moments: np.ndarray) -> np.ndarray:
+        '''
+        (fold, グループ) ごとの moments から、fold k 以外の行をまとめた moments を全 fold について求める。
+        行数, 件数, 和は全体から引き、偏差の二乗和は Chan らの方法で fold k 以外の fold をマージする。
+        '''
+        num_rows, count, total, m2 = moments
+        oof_count = count.sum(axis=0, keepdims=True) - count
+        oof_total = total.sum(axis=0, keepdims=True) - total
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, total / count, 0)
+            oof_mean = np.where(oof_count > 0, oof_total / oof_count, 0)
+        oof_m2 = np.zeros_like(m2)
+        for k in range(m2.shape[0]):
+            others = np.arange(m2.shape[0]) != k
+            oof_m2[k] = (m2[others] + count[others] * (mean[others] - oof_mean[k]) ** 2).sum(axis=0)
+        return np.stack([num_rows.sum(axis=0, keepdims=True) - num_rows, oof_count, oof_total, oof_m2])
+
+    def _assign(self, moments: List[np.ndarray], codes_to: np.ndarray) -> np.ndarray:
+        n_folds = moments[0].shape[1]
+        output = np.full((n_folds, len(codes_to), len(self.columns)), np.nan)
+        found = codes_to >= 0
+        j = 0
+        for target_moments in moments:
+            for agg in self.aggs:
+                values = self._compute(agg, *target_moments)
+                output[:, found, j] = values[:, codes_to[found]]
+                j += 1
+        return output
+
+    def _compute(
+        self,
+        agg: str,
+        num_rows: np.ndarray,
+        count: np.ndarray,
+        total: np.ndarray,
+        m2: np.ndarray
+    ) -> np.ndarray:
+        # pandas の groupby と同じく、グループがない場合は NaN, mean/std/var は NaN を除いて計算する
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if agg == 'mean':
+                return np.where(count > 0, total / count, np.nan)
+            if agg == 'sum':
+                return np.where(num_rows > 0, total, np.nan)
+            if agg == 'count':
+                return np.where(num_rows > 0, count, np.nan)
+            var = np.where(count > 1, m2 / (count - 1), np.nan)
+            if agg == 'var':
+                return var
+            return np.sqrt(var)
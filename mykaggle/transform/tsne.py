@@ -0,0 +1,77 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+from sklearn.manifold import TSNE
+from sklearn.neighbors import NearestNeighbors
+
+from mykaggle.transform.base import BaseTransform
+
+
+class TSNETransform(BaseTransform):
+    '''
+    疎行列を TruncatedSVD で svd_components 次元に落としてから Barnes-Hut の t-SNE で埋め込む Transform.
+    密な BoW に exact な t-SNE をかけるのと違い、メモリは非ゼロ要素の数と svd_components にしか比例しない。
+    t-SNE 自体は新しい行を埋め込めないので、transform では SVD の空間で fit した行の近傍を探し、
+    その埋め込みを距離の逆数で重み付けした平均を返す。fit し直さずに新しいテキストを埋め込める。
+    '''
+
+    def __init__(
+        self,
+        n_components: int = 2,
+        svd_components: int = 50,
+        n_neighbors: int = 10,
+        perplexity: float = 30.0,
+        random_state: int = 1019
+    ) -> None:
+        '''
+        Args:
+          n_components: 埋め込みの次元数、Barnes-Hut なので 3 以下
+          svd_components: t-SNE の前に落とす次元数
+          n_neighbors: transform で使う近傍の数
+          perplexity: t-SNE の perplexity, 行数が少なければ行数 - 1 にする
+          random_state: TruncatedSVD と t-SNE のシード
+        '''
+        if n_components > 3:
+            raise ValueError(f'n_components must be at most 3 for Barnes-Hut t-SNE, but got {n_components}')
+        self.n_components = n_components
+        self.svd_components = svd_components
+        self.n_neighbors = n_neighbors
+        self.perplexity = perplexity
+        self.random_state = random_state
+
+    def fit(self, X: sp.spmatrix) -> 'TSNETransform':
+        self.fit_transform(X)
+        return self
+
+    def fit_transform(self, X: sp.spmatrix) -> np.ndarray:
+        X = sp.csr_matrix(X, dtype=np.float64)
+        n_svd = min(self.svd_components, X.shape[1] - 1)
+        if n_svd >= self.n_components:
+            self.svd_ = TruncatedSVD(n_svd, random_state=self.random_state).fit(X)
+        else:
+            self.svd_ = None
+        reduced = self._reduce(X)
+        tsne = TSNE(
+            self.n_components, perplexity=min(self.perplexity, X.shape[0] - 1),
+            init='pca', random_state=self.random_state
+        )
+        self.embedding_ = tsne.fit_transform(reduced)
+        self.neighbors_ = NearestNeighbors(n_neighbors=min(self.n_neighbors, X.shape[0])).fit(reduced)
+        return self.embedding_
+
+    def transform(self, X: sp.spmatrix) -> np.ndarray:
+        '''
+        fit した行の埋め込みから、X の各行の埋め込みを近傍の平均で求める。fit した行と同じ行はほぼ同じ埋め込みになる。
+        '''
+        X = sp.csr_matrix(X, dtype=np.float64)
+        if X.shape[0] == 0:
+            return np.empty((0, self.n_components))
+        distances, indices = self.neighbors_.kneighbors(self._reduce(X))
+        weights = 1.0 / np.maximum(distances, 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum('ij,ijk->ik', weights, self.embedding_[indices])
+
+    def _reduce(self, X: sp.csr_matrix) -> np.ndarray:
+        if self.svd_ is None:
+            return X.toarray()
+        return self.svd_.transform(X)
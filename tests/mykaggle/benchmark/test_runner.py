@@ -0,0 +1,34 @@
+import json
+
+from mykaggle.benchmark.data import make_atmacup_data
+from mykaggle.benchmark.runner import RESULT_COLUMNS, find_features, run_benchmark, save_report
+from mykaggle.feature.ce import CE
+
+
+class TestBenchmark:
+
+    def test_make_atmacup_data(self):
+        df_train, df_test = make_atmacup_data(1000, test_ratio=0.3)
+        assert df_train.shape[0] + df_test.shape[0] == 1000
+        assert 'target' in df_train.columns and 'target' not in df_test.columns
+        assert 'Global_Sales' not in df_test.columns
+        assert (df_train.loc[:, 'User_Score'] == 'tbd').any()
+        assert df_train.loc[:, 'Name'].duplicated().any()
+
+    def test_find_features(self):
+        assert find_features(['ce']) == [CE]
+
+    def test_run_benchmark(self, tmp_path):
+        df_result = run_benchmark([300], ['ce'], trace_alloc=True, workdir=tmp_path)
+        assert df_result.columns.tolist() == RESULT_COLUMNS
+        assert df_result.loc[:, 'phase'].tolist() == ['train', 'test']
+        assert (df_result.loc[:, 'status'] == 'ok').all()
+        assert (df_result.loc[:, 'traced_peak_mb'] > 0).all()
+        # 返り値の特徴の分は少なくとも確保している
+        assert (df_result.loc[:, 'allocated_blocks'] > 0).all()
+        assert (df_result.loc[:, 'allocated_mb'] * 1024 ** 2 >= df_result.loc[:, 'n_rows'] * 8).all()
+
+        save_report(df_result, tmp_path / 'report')
+        report = json.load(open(tmp_path / 'report.json'))
+        assert len(report['results']) == 2
+        assert (tmp_path / 'report.csv').exists()
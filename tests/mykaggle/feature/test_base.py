@@ -0,0 +1,151 @@
+from typing import Optional, Dict
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature import base
+from mykaggle.feature.base import Feature
+
+
+class RenamedFeature(Feature):
+    def __init__(self, train: bool = True, factor: int = 1) -> None:
+        super().__init__(name='renamed', train=train)
+        self._factor = factor
+
+    def create(self, base, others=None, *args, **kwargs):
+        return others['main'].loc[:, ['x']] * self._factor
+
+
+class DummyFeature(Feature):
+    def __init__(self, train: bool = True, scale: int = 1) -> None:
+        super().__init__(name='dummy', train=train)
+        self.scale = scale
+        self.num_created = 0
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        self.num_created += 1
+        df_main = others['main'].copy()
+        df_main['scaled_x'] = df_main.loc[:, 'x'] * self.scale
+        return df_main.loc[:, ['scaled_x']]
+
+
+class LabelFeature(Feature):
+    def __init__(self, train: bool = True) -> None:
+        super().__init__(name='label', train=train)
+        self.num_created = 0
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        self.num_created += 1
+        # small は train では 0/1 だけ、test では 2 もある
+        df_main = others['main']
+        return pd.DataFrame({'label': df_main.loc[:, 'label'], 'small': df_main.loc[:, 'id'] // 2}, index=df_main.index)
+
+
+@pytest.fixture
+def feature_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(base, 'FEATURE_DIR', tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def others():
+    return {
+        'main': pd.DataFrame({'id': [0, 1, 2], 'x': [1.0, 2.0, 3.0]}),
+        'another': pd.DataFrame({'id': [3, 4], 'x': [4.0, 5.0]}),
+    }
+
+
+class TestFeature:
+
+    def test_cache_hit_skips_create(self, feature_dir, others):
+        df_base = others['main'].loc[:, ['id']]
+        DummyFeature(scale=2)(df_base, others, save_cache=True)
+
+        feature = DummyFeature(scale=2)
+        output = feature(df_base, others, use_cache=True)
+
+        assert feature.num_created == 0
+        assert output['scaled_x'].tolist() == [2.0, 4.0, 6.0]
+
+    def test_stale_params_are_recreated(self, feature_dir, others):
+        df_base = others['main'].loc[:, ['id']]
+        DummyFeature(scale=2)(df_base, others, save_cache=True)
+
+        feature = DummyFeature(scale=3)
+        output = feature(df_base, others, use_cache=True)
+
+        assert feature.num_created == 1
+        assert output['scaled_x'].tolist() == [3.0, 6.0, 9.0]
+
+    def test_stale_data_is_recreated(self, feature_dir, others):
+        df_base = others['main'].loc[:, ['id']]
+        DummyFeature()(df_base, others, save_cache=True)
+
+        others['another'].loc[0, 'x'] = 10.0
+        feature = DummyFeature()
+        feature(df_base, others, use_cache=True)
+
+        assert feature.num_created == 1
+
+    def test_cache_key(self, others):
+        assert DummyFeature().cache_key(others) == DummyFeature().cache_key(others)
+        assert DummyFeature().cache_key(others) != DummyFeature(train=False).cache_key(others)
+        assert DummyFeature().params == {'train': True, 'scale': 1}
+
+    def test_params_without_same_attribute(self, others):
+        # 引数を別名の属性で持っていても、渡された値がキャッシュキーに入る
+        assert RenamedFeature(factor=2).params == {'train': True, 'factor': 2}
+        assert RenamedFeature(factor=2).cache_key(others) != RenamedFeature(factor=3).cache_key(others)
+
+    def test_source_includes_dependencies(self):
+        source = DummyFeature()._source()
+        assert 'class DummyFeature' in source
+        assert 'def apply_dtype_policy' in source
+
+    def test_dtype_policy(self, feature_dir, others):
+        df_base = others['main'].loc[:, ['id']]
+        feature = DummyFeature()
+        feature.dtype_policy = 'compact'
+        output = feature(df_base, others, save_cache=True)
+        assert output['scaled_x'].dtype == np.float32
+        assert feature.cache_key(others) != DummyFeature().cache_key(others)
+
+        cached = DummyFeature()
+        cached.dtype_policy = 'compact'
+        output = cached(df_base, others, use_cache=True)
+        assert cached.num_created == 0
+        assert output['scaled_x'].dtype == np.float32
+
+    def test_dtype_policy_same_for_train_and_test(self, feature_dir):
+        others = {
+            'main': pd.DataFrame({'id': [0, 1, 2], 'x': [1.0, 2.0, 3.0], 'label': ['a', 'b', 'b']}),
+            'another': pd.DataFrame({'id': [3, 4, 5], 'x': [4.0, 5.0, 6.0], 'label': ['b', 'c', 'c']}),
+        }
+        others_test = {'main': others['another'], 'another': others['main']}
+        outputs = []
+        for train, feature_others in [(True, others), (False, others_test)]:
+            feature = LabelFeature(train=train)
+            feature.dtype_policy = 'compact'
+            outputs.append(feature.get_feature(feature_others['main'], feature_others, save_cache=True))
+        for output in outputs:
+            assert output.loc[:, 'label'].cat.categories.tolist() == ['a', 'b', 'c']
+            assert output.loc[:, 'small'].dtype == np.int8
+        assert outputs[0].loc[:, 'label'].cat.codes.tolist() == [0, 1, 1]
+        assert outputs[1].loc[:, 'label'].cat.codes.tolist() == [1, 2, 2]
+
+        # キャッシュから読んでも同じカテゴリになる
+        cached = LabelFeature(train=True)
+        cached.dtype_policy = 'compact'
+        output = cached.get_feature(others['main'], others, use_cache=True)
+        assert cached.num_created == 0
+        pd.testing.assert_frame_equal(output, outputs[0])
@@ -0,0 +1,72 @@
+from typing import Optional, Dict
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature.base import Feature
+from mykaggle.feature.builder import FeatureMatrixBuilder
+
+
+class SquareFeature(Feature):
+    def __init__(self, train: bool = True, column: str = 'squared_x', with_id: bool = False) -> None:
+        super().__init__(name='square', train=train)
+        self.column = column
+        self.with_id = with_id
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        df_main = others['main']
+        df_output = pd.DataFrame({'id': df_main.loc[:, 'id'], self.column: df_main.loc[:, 'x'] ** 2})
+        return df_output if self.with_id else df_output.drop('id', axis=1)
+
+
+@pytest.fixture
+def others():
+    return {'main': pd.DataFrame({'id': [0, 1, 2], 'x': [1.0, 2.0, 3.0]})}
+
+
+class TestFeatureMatrixBuilder:
+    def test_equals_concat(self, others):
+        base = others['main'].loc[:, ['id']]
+        expected = SquareFeature(column='b')(SquareFeature(column='a')(base, others), others)
+
+        builder = FeatureMatrixBuilder(base)
+        builder = SquareFeature(column='a')(builder, others)
+        builder = SquareFeature(column='b')(builder, others)
+        assert builder.columns == ['id', 'a', 'b']
+        pd.testing.assert_frame_equal(builder.build(), expected)
+
+    def test_duplicated_columns(self, others):
+        builder = FeatureMatrixBuilder(others['main'])
+        with pytest.raises(ValueError, match='base'):
+            SquareFeature(column='x')(builder, others)
+
+    def test_merge(self, others):
+        base = others['main'].loc[[2, 0, 1], ['id']]
+        builder = SquareFeature(with_id=True)(FeatureMatrixBuilder(base), others, merge=True)
+        output = builder.build()
+        assert output.index.tolist() == [2, 0, 1]
+        assert output.loc[:, 'squared_x'].tolist() == [9.0, 1.0, 4.0]
+
+    def test_dtype_policy(self, others):
+        builder = FeatureMatrixBuilder(others['main'].loc[:, ['id']], dtype_policy='float32')
+        builder = SquareFeature()(builder, others)
+        output = builder.build()
+        assert output.loc[:, 'squared_x'].dtype == np.float32
+        assert output.loc[:, 'id'].dtype == np.int64
+
+    def test_dtype_policy_with_another(self):
+        others = {'main': pd.DataFrame({'id': [0, 1, 2], 'x': [0.0, 1.0, 1.0]})}
+        others_test = {'main': pd.DataFrame({'id': [3, 4], 'x': [1.0, 1e200]})}
+        builder = FeatureMatrixBuilder(others['main'].loc[:, ['id']], 'float32')
+        builder = SquareFeature()(builder, others)
+        builder_test = FeatureMatrixBuilder(others_test['main'].loc[:, ['id']], 'float32')
+        builder_test = SquareFeature(train=False)(builder_test, others_test)
+        # test に float32 に収まらない値があるので、train も float64 のままにする
+        assert builder.build().loc[:, 'squared_x'].dtype == np.float32
+        assert builder.build(builder_test).loc[:, 'squared_x'].dtype == np.float64
+        assert builder_test.build(builder).loc[:, 'squared_x'].dtype == np.float64
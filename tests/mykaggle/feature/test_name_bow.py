@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature.name_bow4 import NameBOW4
+from mykaggle.feature.name_bow5 import NameBOW5
+
+
+@pytest.fixture
+def others():
+    rng = np.random.RandomState(1019)
+    words = ['super', 'mario', 'world', 'final', 'fantasy', 'soccer', 'pro', 'star', 'wars', 'racing']
+    names = [' '.join(rng.choice(words, 3)) for _ in range(60)]
+    df = pd.DataFrame({
+        'id': np.arange(150),
+        'Name': rng.choice(names, 150),
+        'Platform': rng.choice(['PS2', 'DS', 'Wii'], 150),
+        'Genre': rng.choice(['Action', 'Sports'], 150),
+    })
+    return {'main': df.iloc[:100].reset_index(drop=True), 'another': df.iloc[100:].reset_index(drop=True)}
+
+
+@pytest.mark.parametrize('feature_class, keys, n_columns', [
+    (NameBOW4, ['Name', 'Platform'], 4),
+    (NameBOW5, ['Name'], 3),
+])
+def test_same_name_has_same_embedding(others, feature_class, keys, n_columns):
+    feature = feature_class(word_count_th1=1, word_count_th2=1)
+    output = feature.create(others['main'], others)
+    assert output.shape == (100, n_columns)
+    assert not output.isna().any().any()
+    # 同じ名前の行は同じ値になる
+    df = pd.concat([others['main'].loc[:, keys], output], axis=1)
+    assert (df.groupby(keys).nunique() == 1).all().all()
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature import name_tsne
+from mykaggle.lib.memo import Memo
+from mykaggle.feature.name_tsne import NameTSNE
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(NameTSNE, 'model_dir', tmp_path)
+    monkeypatch.setattr(name_tsne, '_fitted_embeddings', Memo(name_tsne.MAX_FITTED_EMBEDDINGS))
+    return tmp_path
+
+
+@pytest.fixture
+def others():
+    rng = np.random.RandomState(1019)
+    words = ['super', 'mario', 'world', 'final', 'fantasy', 'soccer', 'pro', 'star', 'wars', 'racing']
+    names = [' '.join(rng.choice(words, 3)) + f' {i % 7}' for i in range(120)]
+    df = pd.DataFrame({'id': np.arange(120), 'Name': names})
+    return {'main': df.iloc[:80].reset_index(drop=True), 'another': df.iloc[80:].reset_index(drop=True)}
+
+
+class TestNameTSNE:
+
+    def test_train_and_test_share_model(self, model_dir, others):
+        params = dict(word_count_th1=1, word_count_th2=1, svd_components=5)
+        output_train = NameTSNE(train=True, **params).create(others['main'], others)
+        others_test = {'main': others['another'], 'another': others['main']}
+        output_test = NameTSNE(train=False, **params).create(others['another'], others_test)
+        assert len(list(model_dir.iterdir())) == 1
+        assert output_train.shape == (80, 2) and output_test.shape == (40, 2)
+        assert output_train.columns.tolist() == ['tsne_0_name_bow_gt_count_1_1', 'tsne_1_name_bow_gt_count_1_1']
+
+        # 保存したモデルを読んでも同じ
+        name_tsne._fitted_embeddings.clear()
+        pd.testing.assert_frame_equal(NameTSNE(train=True, **params).create(others['main'], others), output_train)
+
+    def test_transform_unseen_names(self, model_dir, others):
+        feature = NameTSNE(tfidf=True, word_count_th1=0, word_count_th2=0, svd_components=5)
+        df_whole = pd.concat([others['main'], others['another']])
+        model = feature.fit(df_whole.loc[:, 'Name'].str.lower().unique())
+        names = pd.Series(['super mario world 1', 'unknown title', 'super mario world 1'])
+        output = model.transform(names)
+        assert output.shape == (3, 2)
+        assert not output.isna().any().any()
+        np.testing.assert_allclose(output.iloc[0], output.iloc[2])
+
+    def test_no_model_saved_by_default(self, others, tmp_path, monkeypatch):
+        # FEATURE_DIR は '../data/feature/' なので、一つ下のディレクトリから動かす
+        (tmp_path / 'work').mkdir()
+        monkeypatch.chdir(tmp_path / 'work')
+        monkeypatch.setattr(name_tsne, '_fitted_embeddings', Memo(name_tsne.MAX_FITTED_EMBEDDINGS))
+        NameTSNE(word_count_th1=1, word_count_th2=1, svd_components=5).create(others['main'], others)
+        assert [p.name for p in tmp_path.rglob('*')] == ['work']
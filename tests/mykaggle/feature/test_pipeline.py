@@ -0,0 +1,120 @@
+from typing import Dict, Optional
+import pandas as pd
+import pytest
+
+from mykaggle.feature.base import Feature
+from mykaggle.feature.ce import CE
+from mykaggle.feature.le import LE
+from mykaggle.feature.pub_to_category import PubToCategory
+from mykaggle.feature.platform_time_diff import PlatformTimeDiff
+from mykaggle.feature.year_rank5 import YearRank5
+from mykaggle.feature.pipeline import FeaturePipeline
+from mykaggle.feature.scheduler import ParallelFeaturePipeline
+
+
+class MutatingFeature(Feature):
+    '''
+    others を書き換えてしまう古い書き方の特徴
+    '''
+    def __init__(self, train: bool = True) -> None:
+        super().__init__(name='mutating', train=train)
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        df_main = others['main']
+        df_main.loc[:, 'Year_of_Release'] = df_main.loc[:, 'Year_of_Release'].fillna(0.0) + 1
+        return df_main.loc[:, ['Year_of_Release']].rename(columns={'Year_of_Release': 'year_plus_one'})
+
+
+@pytest.fixture
+def data():
+    df_train = pd.DataFrame({
+        'id': [0, 1, 2, 3],
+        'Platform': ['PS2', 'PS2', 'Wii', 'DS'],
+        'Genre': ['Action', 'Sports', 'Action', None],
+        'Developer': ['A', 'B', 'A', 'C'],
+        'Publisher': ['X', 'X', 'Y', 'Z'],
+        'Rating': ['E', 'E', 'T', None],
+        'Year_of_Release': [2001.0, 2002.0, 2001.0, None],
+    })
+    df_test = pd.DataFrame({
+        'id': [4, 5, 6],
+        'Platform': ['PS2', 'DS', 'PS3'],
+        'Genre': ['Action', 'Action', 'Puzzle'],
+        'Developer': ['B', 'C', 'D'],
+        'Publisher': ['X', 'Y', 'Y'],
+        'Rating': ['T', 'E', 'E'],
+        'Year_of_Release': [2001.0, 2003.0, 2001.0],
+    })
+    return df_train, df_test
+
+
+class TestFeaturePipeline:
+
+    def test_run_equals_manual_calls(self, data):
+        df_train, df_test = data
+        pipeline = FeaturePipeline([CE, (PubToCategory, {})])
+        df_f_train, df_f_test = pipeline.run(df_train, df_test)
+
+        train_others = {'main': df_train, 'another': df_test}
+        test_others = {'main': df_test, 'another': df_train}
+        expected_train = df_train.loc[:, ['id']]
+        expected_test = df_test.loc[:, ['id']]
+        for feature_class in [CE, PubToCategory]:
+            expected_train = feature_class(train=True)(expected_train, others=train_others)
+            expected_test = feature_class(train=False)(expected_test, others=test_others)
+
+        pd.testing.assert_frame_equal(df_f_train, expected_train)
+        pd.testing.assert_frame_equal(df_f_test, expected_test)
+
+    def test_whole_is_shared(self, data):
+        df_train, df_test = data
+        train_others, test_others = FeaturePipeline([]).build_others(df_train, df_test)
+        assert train_others['whole'] is test_others['whole']
+        assert train_others['whole'].shape[0] == df_train.shape[0] + df_test.shape[0]
+
+    def test_vocabulary_is_shared(self, data):
+        df_train, df_test = data
+        train_others, test_others = FeaturePipeline([]).build_others(df_train, df_test)
+        assert train_others['vocabulary'] is test_others['vocabulary']
+        for train, others in [(True, train_others), (False, test_others)]:
+            # vocabulary がなくても、その場で作って同じ特徴になる
+            others_without = {'main': others['main'], 'another': others['another']}
+            expected = LE(train=train).create(others['main'], others_without)
+            pd.testing.assert_frame_equal(LE(train=train).create(others['main'], others), expected)
+
+    def test_dependencies_are_created_first(self, data):
+        df_train, df_test = data
+        pipeline = FeaturePipeline([PlatformTimeDiff])
+        nodes = pipeline.build_graph()
+        assert [n.feature_class for n in nodes] == [PlatformTimeDiff, YearRank5]
+        assert [n.emit for n in nodes] == [True, False]
+        assert pipeline.sort_graph(nodes) == [1, 0]
+
+        df_f_train, df_f_test = pipeline.run(df_train, df_test)
+        expected_train = PlatformTimeDiff(train=True)(
+            df_train.loc[:, ['id']], others={'main': df_train, 'another': df_test})
+        pd.testing.assert_frame_equal(df_f_train, expected_train)
+        assert df_f_test.columns.tolist() == ['id', 'diff_platform_min']
+
+    def test_parallel_equals_sequential(self, data):
+        df_train, df_test = data
+        features = [CE, PlatformTimeDiff, PubToCategory]
+        expected_train, expected_test = FeaturePipeline(features).run(df_train, df_test)
+        df_f_train, df_f_test = ParallelFeaturePipeline(features, n_workers=2).run(df_train, df_test)
+        pd.testing.assert_frame_equal(df_f_train, expected_train)
+        pd.testing.assert_frame_equal(df_f_test, expected_test)
+
+    def test_parallel_with_mutating_feature(self, data):
+        df_train, df_test = data
+        expected_train, expected_test = FeaturePipeline([CE, PlatformTimeDiff]).run(df_train, df_test)
+        # 同じワーカーで MutatingFeature の後に作る特徴も、書き換えられていない元データを使う
+        pipeline = ParallelFeaturePipeline([MutatingFeature, CE, PlatformTimeDiff], n_workers=1)
+        df_f_train, df_f_test = pipeline.run(df_train, df_test)
+        assert df_f_train.loc[:, 'year_plus_one'].tolist() == [2002.0, 2003.0, 2002.0, 1.0]
+        pd.testing.assert_frame_equal(df_f_train.drop(columns='year_plus_one'), expected_train)
+        pd.testing.assert_frame_equal(df_f_test.drop(columns='year_plus_one'), expected_test)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature import pivot_embedding
+from mykaggle.lib.memo import Memo
+from mykaggle.feature.pivot_embedding import PivotEmbedding
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(PivotEmbedding, 'model_dir', tmp_path)
+    monkeypatch.setattr(pivot_embedding, '_fitted_embeddings', Memo(pivot_embedding.MAX_FITTED_EMBEDDINGS))
+    return tmp_path
+
+
+@pytest.fixture
+def others():
+    rng = np.random.RandomState(1019)
+
+    def make(n, offset):
+        return pd.DataFrame({
+            'id': np.arange(offset, offset + n),
+            'Publisher': rng.choice([f'p{i}' for i in range(12)] + [None], n),
+            'Genre': rng.choice(['Action', 'Sports', 'Misc', None], n),
+            'Platform': rng.choice(['PS2', 'DS', 'Wii', 'X360', 'PC'], n),
+        })
+    df_train, df_test = make(200, 0), make(100, 200)
+    return {'main': df_train, 'another': df_test}
+
+
+class TestPivotEmbedding:
+
+    @pytest.mark.parametrize('method', ['pca', 'svd', 'kmeans'])
+    @pytest.mark.parametrize('combine', [True, False])
+    def test_train_and_test_share_model(self, model_dir, others, method, combine):
+        params = dict(categories=['Genre', 'Platform'], method=method, n_components=2, n_clusters=3, combine=combine)
+        feature_train = PivotEmbedding(train=True, **params)
+        feature_test = PivotEmbedding(train=False, **params)
+        others_test = {'main': others['another'], 'another': others['main']}
+        output_train = feature_train.create(others['main'], others)
+        output_test = feature_test.create(others_test['main'], others_test)
+
+        assert len(list(model_dir.iterdir())) == 1
+        n_columns = 1 if method == 'kmeans' else 2
+        assert output_train.shape == (200, n_columns * (1 if combine else 2))
+        assert output_test.shape == (100, output_train.shape[1])
+        # 同じ Publisher なら train と test で同じ埋め込みになる
+        df = pd.concat([
+            pd.concat([others['main'].loc[:, ['Publisher']], output_train], axis=1),
+            pd.concat([others['another'].loc[:, ['Publisher']], output_test], axis=1),
+        ]).dropna(subset=['Publisher'])
+        assert (df.groupby('Publisher').nunique() <= 1).all().all()
+        assert output_train.loc[others['main'].loc[:, 'Publisher'].isna()].isna().all().all()
+
+    def test_load_saved_model(self, model_dir, others):
+        feature = PivotEmbedding(categories=['Genre', 'Platform'], n_components=2)
+        expected = feature.create(others['main'], others)
+        pivot_embedding._fitted_embeddings.clear()
+        output = PivotEmbedding(categories=['Genre', 'Platform'], n_components=2).create(others['main'], others)
+        pd.testing.assert_frame_equal(output, expected)
+
+    def test_no_model_saved_by_default(self, others, tmp_path, monkeypatch):
+        # FEATURE_DIR は '../data/feature/' なので、一つ下のディレクトリから動かす
+        (tmp_path / 'work').mkdir()
+        monkeypatch.chdir(tmp_path / 'work')
+        monkeypatch.setattr(pivot_embedding, '_fitted_embeddings', Memo(pivot_embedding.MAX_FITTED_EMBEDDINGS))
+        PivotEmbedding(categories=['Genre', 'Platform'], n_components=2).create(others['main'], others)
+        assert [p.name for p in tmp_path.rglob('*')] == ['work']
+
+    def test_unsupported_method(self):
+        with pytest.raises(ValueError):
+            PivotEmbedding(method='tsne')
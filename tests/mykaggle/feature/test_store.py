@@ -0,0 +1,70 @@
+from typing import Optional, Dict
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.feature import base
+from mykaggle.feature.base import Feature
+from mykaggle.feature.store import FeatureStore
+
+
+class NumericFeature(Feature):
+    def __init__(self, train: bool = True) -> None:
+        super().__init__(name='numeric', train=train)
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        return pd.DataFrame({'x': [0.5, 1.5, np.nan], 'i': [1, 2, 3]}, index=[10, 11, 12])
+
+
+class CategoryFeature(Feature):
+    def __init__(self, train: bool = True) -> None:
+        super().__init__(name='category', train=train)
+
+    def create(
+        self,
+        base: pd.DataFrame,
+        others: Optional[Dict[str, pd.DataFrame]] = None,
+        *args, **kwargs
+    ) -> pd.DataFrame:
+        return pd.DataFrame({'c': pd.Categorical(['u', None, 'v']), 'b': [True, False, True], 's': ['p', 'q', 'r']})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(base, 'FEATURE_DIR', tmp_path)
+    for feature_class in [NumericFeature, CategoryFeature]:
+        feature_class().get_feature(pd.DataFrame(), {}, save_cache=True)
+    return FeatureStore(tmp_path)
+
+
+class TestFeatureStore:
+    def test_columns(self, store):
+        assert store.names() == ['category', 'numeric']
+        assert store.columns() == {'category': ['c', 'b', 's'], 'numeric': ['x', 'i']}
+
+    def test_load_columns(self, store):
+        df = store.load(columns=['x', 'c'])
+        assert df.columns.tolist() == ['x', 'c']
+        assert df.loc[:, 'x'].tolist()[:2] == [0.5, 1.5]
+        assert df.loc[:, 'c'].tolist()[0] == 'u'
+
+    def test_load_matrix(self, store):
+        matrix, columns = store.load_matrix(columns=['i', 'x', 'c', 'b'])
+        assert columns == ['i', 'x', 'c', 'b']
+        assert matrix.dtype == np.float32
+        assert matrix.flags['F_CONTIGUOUS']
+        expected = np.array([[1, 0.5, 0, 1], [2, 1.5, np.nan, 0], [3, np.nan, 1, 1]], dtype=np.float32)
+        np.testing.assert_array_equal(matrix, expected)
+
+    def test_load_matrix_rejects_strings(self, store):
+        with pytest.raises(ValueError):
+            store.load_matrix(['category'])
+
+    def test_missing_column(self, store):
+        with pytest.raises(KeyError):
+            store.load(columns=['unknown'])
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.lib.aho_corasick import AhoCorasick
+
+
+@pytest.fixture
+def texts():
+    rng = np.random.RandomState(1019)
+    return pd.Series([''.join(rng.choice(list('ab c'), rng.randint(0, 12))) for _ in range(200)])
+
+
+class TestAhoCorasick:
+
+    @pytest.mark.parametrize('patterns', [['a', 'ab', 'b c', 'c'], ['ab a', 'b', 'abab', ''], []])
+    def test_equals_pandas_loop(self, texts, patterns):
+        matcher = AhoCorasick(patterns)
+        expected_prefix = np.full(len(texts), -1)
+        expected_substring = np.full(len(texts), -1)
+        for i, pattern in enumerate(patterns):
+            expected_prefix[texts.str.startswith(pattern).values] = i
+            expected_substring[texts.str.contains(pattern, regex=False).values] = i
+
+        np.testing.assert_array_equal(matcher.last_prefix_match(texts), expected_prefix)
+        np.testing.assert_array_equal(matcher.last_substring_match(texts), expected_substring)
+
+    def test_substring_through_failure_link(self):
+        matcher = AhoCorasick(['super mario', 'mario kart'])
+        matched = matcher.last_substring_match(pd.Series(['super mario kart', 'super marix', 'new mario kart ds']))
+        np.testing.assert_array_equal(matched, [1, -1, 1])
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from mykaggle.lib.arrow_util import read_arrow, write_arrow
+
+
+def test_read_arrow_zero_copy(tmp_path):
+    df = pd.DataFrame({
+        'id': np.arange(1000),
+        'x': np.where(np.arange(1000) % 3 == 0, np.nan, 0.5),
+        'name': [f'n{i % 7}' if i % 5 else None for i in range(1000)],
+    })
+    path = write_arrow(df, tmp_path / 'df.arrow')
+    allocated = pa.total_allocated_bytes()
+    output = read_arrow(path, zero_copy=True)
+    # NaN のある float も含めて、コピーせずにメモリマップしたファイルを指す
+    assert pa.total_allocated_bytes() - allocated < df.loc[:, 'x'].nbytes
+    assert not output.loc[:, 'x'].values.flags.writeable
+    pd.testing.assert_frame_equal(output, df)
+    pd.testing.assert_frame_equal(read_arrow(path), df)
+
+    # 浅いコピーなら書き換えられて、元の DataFrame は変わらない
+    copied = output.copy(deep=False)
+    copied.loc[:, 'x'] = 1.0
+    assert (copied.loc[:, 'x'] == 1.0).all()
+    assert output.loc[:, 'x'].isna().sum() == 334
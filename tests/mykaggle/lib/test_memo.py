@@ -0,0 +1,27 @@
+from mykaggle.lib.memo import Memo
+
+
+class TestMemo:
+
+    def test_lru(self):
+        memo = Memo(2)
+        calls = []
+
+        def compute(x):
+            calls.append(x)
+            return x * 10
+
+        assert memo.get('a', lambda: compute(1)) == 10
+        assert memo.get('b', lambda: compute(2)) == 20
+        assert memo.get('a', lambda: compute(3)) == 10
+        memo.get('c', lambda: compute(4))
+        # 'a' を使ったので、最も長く使われていない 'b' が捨てられる
+        assert 'a' in memo and 'b' not in memo and len(memo) == 2
+        assert calls == [1, 2, 4]
+
+    def test_load_saved(self, tmp_path):
+        path = tmp_path / 'model' / 'value.pkl'
+        assert Memo(2).get('a', lambda: [1, 2], path) == [1, 2]
+        assert path.exists()
+        # 別のプロセスのように覚えていない Memo でも、保存したものを読んで計算し直さない
+        assert Memo(2).get('a', lambda: [3], path) == [1, 2]
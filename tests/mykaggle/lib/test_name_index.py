@@ -0,0 +1,18 @@
+import numpy as np
+
+from mykaggle.lib.name_index import NameIndex
+
+
+def test_name_index():
+    codes = np.array([1, 0, 1, -1, 2, 1])
+    index = NameIndex.from_codes(codes, 4)
+    np.testing.assert_array_equal(index.sizes, [1, 3, 1, 0])
+    np.testing.assert_array_equal(index.rows_of(1), [0, 2, 5])
+    np.testing.assert_array_equal(index.rows_of(3), [])
+
+
+def test_name_index_nunique():
+    index = NameIndex.from_codes(np.array([1, 0, 1, -1, 2, 1]), 4)
+    values = np.array([0, 1, 0, 2, -1, 2])
+    np.testing.assert_array_equal(index.nunique(values, 3), [1, 2, 0, 0])
+    np.testing.assert_array_equal(index.incidence(values, 3).toarray()[1], [1, 0, 1])
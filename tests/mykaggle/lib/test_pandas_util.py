@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.lib.pandas_util import apply_dtype_policy, decide_dtypes
+
+
+def test_apply_dtype_policy_compact():
+    df = pd.DataFrame({
+        'binary': np.array([0, 1, 1], dtype=np.int64),
+        'small': np.array([0, 1, -1], dtype=np.int64),
+        'large': np.array([0, 1, 100_000], dtype=np.int64),
+        'float': [0.5, np.nan, 1.5],
+        'huge': [0.0, 1e300, 1.0],
+        'name': ['a', 'b', None],
+        'mixed': pd.Series([1, 'a', None], dtype=object),
+        'flag': [True, False, True],
+    })
+    output = apply_dtype_policy(df, 'compact')
+    assert output.dtypes.to_dict() == {
+        'binary': bool,
+        'small': np.int8,
+        'large': np.int32,
+        'float': np.float32,
+        'huge': np.float64,
+        'name': 'category',
+        'mixed': object,
+        'flag': bool,
+    }
+    assert output.loc[:, 'name'].isna().tolist() == [False, False, True]
+    assert df.loc[:, 'small'].dtype == np.int64
+
+
+def test_apply_dtype_policy():
+    df = pd.DataFrame({'x': np.array([1, 2]), 'y': [1.0, 2.0]})
+    assert apply_dtype_policy(df, None) is df
+    assert apply_dtype_policy(df, 'float32').dtypes.tolist() == [np.int64, np.float32]
+    with pytest.raises(ValueError):
+        apply_dtype_policy(df, 'float16')
+
+
+def test_decide_dtypes_from_train_and_test():
+    df_train = pd.DataFrame({'name': ['a', 'b', 'b'], 'flag': [0, 1, 1], 'x': [0.5, 1.0, 1.5]})
+    df_test = pd.DataFrame({'name': ['b', 'c', 'c'], 'flag': [0, 2, 1], 'x': [0.5, 1e300, 1.5]})
+    dtypes = decide_dtypes([df_train, df_test], 'compact')
+    output_train = apply_dtype_policy(df_train, 'compact', dtypes)
+    output_test = apply_dtype_policy(df_test, 'compact', dtypes)
+    assert output_train.dtypes.equals(output_test.dtypes)
+    assert output_train.loc[:, 'flag'].dtype == np.int8
+    assert output_train.loc[:, 'x'].dtype == np.float64
+    # 同じ値は train と test で同じコードになる
+    assert output_train.loc[:, 'name'].cat.categories.tolist() == ['a', 'b', 'c']
+    assert output_train.loc[:, 'name'].cat.codes.tolist() == [0, 1, 1]
+    assert output_test.loc[:, 'name'].cat.codes.tolist() == [1, 2, 2]
+    with pytest.raises(ValueError):
+        decide_dtypes([df_train, df_test.rename(columns={'x': 'y'})], 'compact')
@@ -0,0 +1,51 @@
+import numpy as np
+
+from mykaggle.lib.sketch import GroupedHyperLogLog, GroupedQuantileSketch
+
+
+class TestGroupedHyperLogLog:
+    def test_estimate(self):
+        rng = np.random.RandomState(0)
+        groups = np.repeat([0, 1, 2], [10, 1000, 100000])
+        values = np.concatenate([np.arange(10), rng.randint(0, 500, 1000), np.arange(100000) % 30000])
+        hll = GroupedHyperLogLog(3, precision=12)
+        hll.add(groups, values)
+        np.testing.assert_allclose(hll.estimate(), [10, len(np.unique(values[10:1010])), 30000], rtol=0.05)
+
+    def test_merge(self):
+        values = np.arange(2000)
+        whole = GroupedHyperLogLog(1)
+        whole.add(np.zeros(2000, dtype=np.int64), values)
+        left, right = GroupedHyperLogLog(1), GroupedHyperLogLog(1)
+        left.add(np.zeros(1200, dtype=np.int64), values[:1200])
+        right.add(np.zeros(1000, dtype=np.int64), values[1000:])
+        left.merge(right)
+        np.testing.assert_array_equal(left.registers, whole.registers)
+
+    def test_same_value_in_different_dtypes(self):
+        # チャンクの途中で int64 が float64 に変わっても同じ値として数える
+        groups = np.zeros(100, dtype=np.int64)
+        hll = GroupedHyperLogLog(1)
+        hll.add(groups, np.arange(100))
+        hll.add(groups, np.arange(100).astype(np.float64))
+        hll.add(groups, np.arange(100).astype(object))
+        expected = GroupedHyperLogLog(1)
+        expected.add(groups, np.arange(100))
+        np.testing.assert_array_equal(hll.registers, expected.registers)
+
+
+class TestGroupedQuantileSketch:
+    def test_quantile(self):
+        rng = np.random.RandomState(0)
+        values = np.concatenate([rng.lognormal(size=1001), -rng.lognormal(size=1000), [0.0, 0.0, 3.0]])
+        groups = np.repeat([0, 1, 3], [1001, 1000, 3])
+        sketch = GroupedQuantileSketch(relative_accuracy=0.01)
+        for i in range(0, len(values), 300):
+            part = GroupedQuantileSketch(relative_accuracy=0.01)
+            part.add(groups[i:i + 300], values[i:i + 300])
+            sketch.merge(part)
+        result = sketch.quantile(4, 0.5)
+        expected = [np.median(values[groups == g]) for g in [0, 1]]
+        np.testing.assert_allclose(result[:2], expected, rtol=0.02)
+        assert np.isnan(result[2])
+        assert result[3] == 0.0
@@ -0,0 +1,15 @@
+import numpy as np
+
+from mykaggle.lib.sparse_util import incidence_matrix
+
+
+def test_incidence_matrix():
+    rows = np.array([0, 0, 1, 2, -1, 0])
+    cols = np.array([1, 1, 0, -1, 2, 2])
+    matrix = incidence_matrix(rows, cols, 3, 3)
+    expected = np.array([
+        [0, 1, 1],
+        [1, 0, 0],
+        [0, 0, 0],
+    ])
+    np.testing.assert_array_equal(matrix.toarray(), expected)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from mykaggle.lib.vocabulary import build_vocabulary, label_encode
+from mykaggle.transform.groupby import factorize_column
+
+
+def _whole():
+    return pd.DataFrame({
+        'Platform': ['PS2', 'Wii', 'DS', 'PS2', 'Wii'],
+        'Rating': ['T', None, 'E', 'M', None],
+        'Year_of_Release': [2001.0, 2002.0, 2001.0, None, 2003.0],
+    })
+
+
+def test_build_vocabulary():
+    vocabulary = build_vocabulary(_whole())
+    assert list(vocabulary.columns) == ['Platform', 'Rating']
+    assert list(vocabulary.loc[:, 'Platform'].cat.categories) == ['DS', 'PS2', 'Wii']
+    assert vocabulary.loc[:, 'Platform'].cat.codes.dtype == np.int8
+    np.testing.assert_array_equal(vocabulary.loc[:, 'Rating'].cat.codes.values, [2, -1, 0, 1, -1])
+
+
+def test_label_encode_equals_label_encoder():
+    df_whole = _whole()
+    vocabulary = build_vocabulary(df_whole)
+    for c in ['Platform', 'Rating']:
+        expected = LabelEncoder().fit_transform(df_whole.loc[:, c].fillna('NaN'))
+        actual = label_encode(vocabulary.loc[:, c], vocabulary.loc[:, c])
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_factorize_column_uses_vocabulary_codes():
+    vocabulary = build_vocabulary(_whole())
+    codes, n_codes = factorize_column([vocabulary.iloc[:3], vocabulary.iloc[3:]], 'Rating')
+    np.testing.assert_array_equal(codes, [2, -1, 0, 1, -1])
+    assert n_codes == 3
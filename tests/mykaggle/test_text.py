@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from mykaggle.text import clean_text, preprocess_text
+
+
+class TestText:
+
+    def test_clean_text(self):
+        names = pd.Series(
+            ['Pokémon Red!', None, 'FIFA 2005: World', 'Tom Clancy\'s\xa0Rainbow  Six', 'R-Type', 'Pokémon Red!'],
+            index=[3, 1, 4, 1, 5, 9]
+        )
+        expected = ['pokemon red', '', 'fifa world', 'tom clancy s rainbow six', 'r type', 'pokemon red']
+        output = clean_text(names)
+        assert output.tolist() == expected
+        assert output.index.tolist() == [3, 1, 4, 1, 5, 9]
+
+    def test_preprocess_text(self):
+        names = pd.Series(['Mario\'s Party: 64!', 'A, B', np.nan], dtype=object)
+        assert preprocess_text(names).tolist() == ['mario party 64 ', 'a b', 'nan']
+
+    def test_cached_result_is_not_shared(self):
+        names = pd.Series(['Halo 3', 'Halo 3'])
+        output = clean_text(names)
+        output.iloc[0] = 'changed'
+        assert clean_text(names).tolist() == ['halo', 'halo']
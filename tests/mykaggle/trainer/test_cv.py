@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import KFold
+
+from mykaggle.trainer.cv import CVRunner
+
+PARAMS = {'objective': 'regression', 'verbose': -1, 'seed': 1019, 'deterministic': True, 'learning_rate': 0.1}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(1019)
+    x = rng.rand(400, 4)
+    y = x[:, 0] * 2 + rng.rand(400) * 0.1
+    x_test = rng.rand(50, 4)
+    splits = list(KFold(4, shuffle=True, random_state=1019).split(x))
+    return x, y, x_test, splits
+
+
+class TestCVRunner:
+
+    def test_run(self, data, tmp_path):
+        x, y, x_test, splits = data
+        runner = CVRunner(PARAMS, num_rounds=50, early_stopping_rounds=10, num_threads=1)
+        result = runner.run(x, y, splits, x_test, ckptdir=tmp_path)
+
+        assert result.oof_pred.shape == (400,)
+        assert result.test_pred.shape == (4, 50)
+        assert len(result.models) == len(result.scores) == 4
+        assert result.score < np.std(y)
+        assert sorted(p.name for p in tmp_path.iterdir()) == [f'model_{i}.txt' for i in range(4)]
+        valid_idx = splits[2][1]
+        np.testing.assert_allclose(result.models[2].predict(x[valid_idx]), result.oof_pred[valid_idx])
+
+    def test_parallel_equals_serial(self, data):
+        x, y, x_test, splits = data
+        expected = CVRunner(PARAMS, num_rounds=30, num_threads=2).run(x, y, splits, x_test)
+        runner = CVRunner(PARAMS, num_rounds=30, n_workers=2, num_threads=2)
+        assert runner.fold_params['num_threads'] == 1
+        result = runner.run(x, y, splits, x_test)
+        np.testing.assert_allclose(result.oof_pred, expected.oof_pred)
+        np.testing.assert_allclose(result.test_pred, expected.test_pred)
+
+    def test_oof_columns(self, data):
+        x, y, x_test, splits = data
+        oof = np.stack([np.c_[y + i] for i in range(len(splits))])
+        result = CVRunner(PARAMS, num_rounds=30).run(x, y, splits, x_test, oof=oof, oof_test=np.c_[np.zeros(50)])
+        assert result.models[0].num_feature() == 5
+        assert result.score < 0.1
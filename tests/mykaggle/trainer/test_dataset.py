@@ -0,0 +1,58 @@
+import numpy as np
+import lightgbm as lgb
+import pytest
+
+from mykaggle.trainer.dataset import FoldDatasets
+
+PARAMS = {'objective': 'regression', 'verbose': -1, 'seed': 1019, 'deterministic': True, 'num_threads': 1}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(1019)
+    x = rng.rand(500, 4)
+    oof = rng.rand(500, 2)
+    y = x[:, 0] * 2 + oof[:, 1] + rng.rand(500) * 0.1
+    return x, y, oof
+
+
+def train(train_data, valid_data):
+    evals = {}
+    model = lgb.train(
+        PARAMS, train_data, num_boost_round=20, valid_sets=[valid_data], valid_names=['valid'],
+        callbacks=[lgb.record_evaluation(evals)]
+    )
+    return model, evals['valid']['l2']
+
+
+class TestFoldDatasets:
+
+    def test_fold_with_oof(self, data):
+        x, y, oof = data
+        train_idx, valid_idx = np.arange(100, 500), np.arange(100)
+        datasets = FoldDatasets(x, y, params=PARAMS, feature_name=['a', 'b', 'c', 'd'])
+        train_data, valid_data = datasets.fold(train_idx, valid_idx, oof, ['oof_a', 'oof_b'])
+        assert train_data.num_data() == 400 and valid_data.num_data() == 100
+        assert train_data.get_feature_name() == ['a', 'b', 'c', 'd', 'oof_a', 'oof_b']
+
+        model, l2 = train(train_data, valid_data)
+        pred = model.predict(datasets.matrix(valid_idx, oof))
+        assert np.mean((pred - y[valid_idx]) ** 2) == pytest.approx(l2[-1])
+        # fold ごとの特徴も学習に使われている
+        assert model.feature_importance()[-1] > 0
+
+    def test_load_binary(self, data, tmp_path):
+        x, y, _ = data
+        train_idx, valid_idx = np.arange(100, 500), np.arange(100)
+        expected, _ = train(*FoldDatasets(x, y, params=PARAMS, cache_dir=tmp_path).fold(train_idx, valid_idx))
+        assert len(list(tmp_path.glob('lgb_dataset_*.bin'))) == 1
+
+        datasets = FoldDatasets(x, y, params=PARAMS, cache_dir=tmp_path)
+        model, _ = train(*datasets.fold(train_idx, valid_idx))
+        np.testing.assert_allclose(model.predict(x), expected.predict(x))
+        assert FoldDatasets(x, y * 2, params=PARAMS).key != datasets.key
+
+    def test_wrong_oof_rows(self, data):
+        x, y, oof = data
+        with pytest.raises(ValueError):
+            FoldDatasets(x, y).fold(np.arange(10, 500), np.arange(10), oof[:10])
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import pytest
+
+from mykaggle.trainer.predict import FoldPredictor
+
+
+@pytest.fixture
+def models():
+    rng = np.random.RandomState(1019)
+    x = rng.rand(300, 3).astype(np.float32)
+    y = np.log1p(x[:, 0] * 10)
+    params = {'objective': 'regression', 'verbose': -1, 'seed': 1019}
+    return [
+        lgb.train({**params, 'bagging_fraction': 0.8, 'bagging_freq': 1, 'bagging_seed': i}, lgb.Dataset(x, y), 10)
+        for i in range(3)
+    ]
+
+
+class TestFoldPredictor:
+
+    @pytest.mark.parametrize('n_workers', [1, 3])
+    def test_predict_folds(self, models, n_workers):
+        x = pd.DataFrame(np.random.RandomState(0).rand(250, 3), columns=['a', 'b', 'c'])
+        expected = np.array([m.predict(x.values.astype(np.float32)) for m in models])
+        preds = FoldPredictor(models, chunk_size=100, n_workers=n_workers).predict_folds(x)
+        np.testing.assert_allclose(preds, expected)
+
+    def test_average(self, models):
+        x = np.random.RandomState(0).rand(20, 3)
+        preds = np.array([m.predict(x.astype(np.float32)) for m in models])
+        np.testing.assert_allclose(FoldPredictor(models, average='linear').predict(x), np.expm1(preds).mean(axis=0))
+        np.testing.assert_allclose(FoldPredictor(models, average='log').predict(x), np.expm1(preds.mean(axis=0)))
+        with pytest.raises(ValueError):
+            FoldPredictor(models, average='median')
+
+    def test_from_dir(self, models, tmp_path):
+        for i, model in enumerate(models):
+            model.save_model(str(tmp_path / f'model_{i}.txt'))
+        x = np.random.RandomState(0).rand(20, 3)
+        np.testing.assert_allclose(FoldPredictor.from_dir(tmp_path).predict(x), FoldPredictor(models).predict(x))
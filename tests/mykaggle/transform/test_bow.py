@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.decomposition import PCA
+from sklearn.feature_extraction.text import CountVectorizer
+
+from mykaggle.transform.bow import BOWTransform, get_bow, sparse_pca
+
+
+@pytest.fixture
+def texts():
+    rng = np.random.RandomState(1019)
+    words = [f'w{i}' for i in range(30)]
+    return np.array([' '.join(rng.choice(words, rng.randint(1, 6))) for _ in range(300)], dtype=object)
+
+
+class TestBOWTransform:
+
+    def test_fit_transform_equals_dense_filter(self, texts):
+        transform = BOWTransform((1, 2), min_count=3, max_count=50)
+        bow = transform.fit_transform(texts)
+
+        dense = CountVectorizer(ngram_range=(1, 2)).fit_transform(texts).toarray()
+        word_count = dense.sum(axis=0)
+        expected = dense[:, (word_count > 3) & (word_count < 50)]
+        assert sp.isspmatrix_csr(bow)
+        np.testing.assert_array_equal(bow.toarray(), expected)
+
+    def test_transform_uses_fitted_vocabulary(self, texts):
+        transform = BOWTransform((1, 1), min_count=3).fit(texts[:200])
+        bow = transform.transform(texts[200:])
+        assert bow.shape == (100, len(transform.columns_))
+
+    def test_get_bow_reuses_fitted(self, texts):
+        transform, bow = get_bow(texts, (1, 1), 3)
+        transform_again, bow_again = get_bow(texts.copy(), (1, 1), 3)
+        assert transform is transform_again
+        assert bow is bow_again
+        assert get_bow(texts, (1, 1), 4)[0] is not transform
+
+
+def test_sparse_pca_equals_dense_pca(texts):
+    bow = BOWTransform((1, 1)).fit_transform(texts)
+    np.testing.assert_allclose(sparse_pca(bow, 4), PCA(4).fit_transform(bow.toarray()), atol=1e-8)
@@ -1,7 +1,11 @@
+import numpy as np
 from pytest import approx
 import pandas as pd
+import pytest
 
-from mykaggle.transform.groupby import BaseGroupByTransform, BasicGroupByTransform
+from mykaggle.transform.groupby import (
+    MULTI_AGGS, BaseGroupByTransform, BasicGroupByTransform, ChunkedGroupByTransform, MultiGroupByTransform
+)
 
 
 class TestBaseGroupByTransform:
@@ -19,6 +23,25 @@ class TestBaseGroupByTransform:
 
         assert expected_columns == columns
 
+    @pytest.mark.parametrize('keys', [['a'], ['a', 'b']])
+    def test_transform_to_equals_merge(self, keys):
+        df = pd.DataFrame({
+            'a': ['x', 'y', 'x', None, 'z', 'y'],
+            'b': [1.0, 2.0, 1.0, 2.0, np.nan, 2.0],
+            'target': [0.1, 0.2, 0.3, 0.4, 0.5, np.nan],
+        })
+        df_to = pd.DataFrame({
+            'a': ['y', 'w', 'x', None, 'x'],
+            'b': [2.0, 1.0, 1.0, 1.0, 2.0],
+        }, index=[10, 11, 12, 13, 14])
+        transform = BasicGroupByTransform(keys, ['target'], ['mean', 'count'])
+        output = transform.transform_to(df, df_to)
+
+        columns = transform._prepare_aggregated_columns(keys, ['target'], ['mean', 'count'])
+        expected = pd.merge(df_to, transform(df), how='left', on=keys).loc[:, columns]
+        expected.index = df_to.index
+        pd.testing.assert_frame_equal(output, expected)
+
 
 class TestBasicGroupByTransform:
 
@@ -45,3 +68,145 @@ class TestBasicGroupByTransform:
         assert df_output.loc[1, 'mean_x_groupby_a_b'] == approx(expected_mean_x_groupby_a_b_2)
         assert df_output.loc[0, 'sum_x_groupby_a_b'] == approx(sum_y_groupby_a_b_1)
         assert df_output.loc[1, 'sum_x_groupby_a_b'] == approx(sum_y_groupby_a_b_2)
+
+    def test_kernel_aggs(self):
+        df = pd.DataFrame({
+            'a': ['x', 'x', 'x', 'x', 'x', 'y', 'y', 'y', None],
+            'v': [3.0, 1.0, 3.0, 1.0, 2.0, 5.0, np.nan, np.nan, 1.0],
+        })
+        aggs = ['mode', 'top2', 'top3', 'nunique', 'count_distinct_pairs', 'size']
+        output = BasicGroupByTransform(['a'], ['v'], aggs).transform(df)
+
+        assert output.loc[:, 'a'].tolist() == ['x', 'y']
+        # 同数の値は小さい方が先
+        assert output.loc[:, 'mode_v_groupby_a'].tolist() == [1.0, 5.0]
+        assert output.loc[:, 'top2_v_groupby_a'].tolist() == [3.0, approx(np.nan, nan_ok=True)]
+        assert output.loc[0, 'top3_v_groupby_a'] == 2.0
+        assert output.loc[:, 'nunique_v_groupby_a'].tolist() == [3, 1]
+        assert output.loc[:, 'count_distinct_pairs_v_groupby_a'].tolist() == [3, 2]
+        assert output.loc[:, 'size_v_groupby_a'].tolist() == [5, 3]
+
+    def test_mode_equals_value_counts(self):
+        rng = np.random.RandomState(1019)
+        df = pd.DataFrame({'a': rng.choice(['x', 'y', 'z'], 500), 's': rng.choice(['p', 'q', 'r', 's'], 500)})
+        output = BasicGroupByTransform(['a'], ['s'], ['mode']).transform(df)
+
+        def mode(x):
+            counts = x.value_counts()
+            return counts.loc[counts == counts.max()].index.min()
+        expected = df.groupby('a')['s'].agg(mode)
+        assert output.loc[:, 'mode_s_groupby_a'].tolist() == expected.tolist()
+
+
+class TestMultiGroupByTransform:
+
+    @pytest.mark.parametrize('keys', [['a'], ['a', 'b']])
+    def test_transform_to_equals_basic(self, keys):
+        rng = np.random.RandomState(1019)
+        n = 300
+        df = pd.DataFrame({
+            'a': rng.choice(['x', 'y', 'z', None], n),
+            'b': rng.choice([1.0, 2.0, np.nan], n),
+            'f': rng.normal(size=n),
+            'f32': rng.normal(size=n).astype(np.float32),
+            'i': rng.randint(0, 5, n),
+            'bool': rng.rand(n) > 0.5,
+            's': rng.choice(['p', 'q', None], n),
+        })
+        df.loc[rng.rand(n) < 0.2, 'f'] = np.nan
+        df.loc[df.loc[:, 'a'] == 'z', 'f'] = np.nan
+        df_to = df.sample(100, random_state=0)
+        df_to.loc[df_to.index[:5], 'a'] = 'unseen'
+
+        specs = [(keys, ['f', 'f32', 'i', 'bool'], MULTI_AGGS), (keys, ['s'], ['count', 'nunique'])]
+        transform = MultiGroupByTransform(specs)
+        output = transform.transform_to(df, df_to)
+        expected = pd.concat([BasicGroupByTransform(*spec).transform_to(df, df_to) for spec in specs], axis=1)
+        assert output.columns.tolist() == transform.columns
+        pd.testing.assert_frame_equal(output, expected, rtol=1e-5)
+
+    @pytest.mark.parametrize('keys', [['a'], ['a', 'b']])
+    def test_transform_equals_basic(self, keys):
+        rng = np.random.RandomState(1019)
+        n = 300
+        df = pd.DataFrame({
+            'a': rng.choice(['x', 'y', 'z', None], n),
+            'b': rng.choice([1.0, 2.0, np.nan], n),
+            'f': rng.normal(size=n),
+            's': rng.choice(['p', 'q', None], n),
+        })
+        specs = [(keys, ['f'], ['mean', 'std', 'max']), (keys, ['s'], ['count', 'nunique'])]
+        transform = MultiGroupByTransform(specs)
+        for output, spec in zip(transform.aggregate(df), specs):
+            pd.testing.assert_frame_equal(output, BasicGroupByTransform(*spec).transform(df), check_dtype=False)
+        output = transform.transform(df)
+        assert output.shape[0] == df.dropna(subset=keys).groupby(keys).ngroups
+        assert output.columns.tolist() == keys + transform.columns
+
+        with pytest.raises(ValueError):
+            MultiGroupByTransform([(['a'], ['f'], ['mean']), (['b'], ['f'], ['mean'])]).transform(df)
+
+    def test_unsupported_aggs(self):
+        with pytest.raises(ValueError):
+            MultiGroupByTransform([(['a'], ['x'], ['first'])])
+
+
+class TestChunkedGroupByTransform:
+    EXACT_AGGS = ['count', 'sum', 'mean', 'std', 'var', 'min', 'max']
+
+    def _make_df(self, n=500):
+        rng = np.random.RandomState(1019)
+        df = pd.DataFrame({
+            'a': rng.choice(['x', 'y', 'z', None], n),
+            'b': rng.choice([1.0, 2.0, np.nan], n),
+            'f': rng.lognormal(size=n),
+            'i': rng.randint(0, 50, n),
+        })
+        df.loc[rng.rand(n) < 0.2, 'f'] = np.nan
+        df.loc[df.loc[:, 'a'] == 'z', 'f'] = np.nan
+        return df
+
+    @pytest.mark.parametrize('keys', [['a'], ['a', 'b']])
+    def test_exact_aggs_equal_basic(self, keys):
+        df = self._make_df()
+        expected = BasicGroupByTransform(keys, ['f', 'i'], self.EXACT_AGGS).transform(df)
+        transform = ChunkedGroupByTransform(keys, ['f', 'i'], self.EXACT_AGGS)
+        output = transform.aggregate_chunks(df.iloc[i:i + 37] for i in range(0, len(df), 37))
+        pd.testing.assert_frame_equal(output, expected)
+
+    @pytest.mark.parametrize('suffix', ['.csv', '.parquet', '.feather'])
+    def test_aggregate_file(self, tmp_path, suffix):
+        df = self._make_df()
+        path = tmp_path / f'data{suffix}'
+        if suffix == '.csv':
+            df.to_csv(path, index=False)
+        elif suffix == '.parquet':
+            df.to_parquet(path)
+        else:
+            df.to_feather(path)
+        expected = BasicGroupByTransform(['a'], ['f'], self.EXACT_AGGS).transform(df)
+        output = ChunkedGroupByTransform(['a'], ['f'], self.EXACT_AGGS).aggregate_file(path, chunksize=100)
+        pd.testing.assert_frame_equal(output, expected)
+
+    def test_sketch_aggs(self):
+        df = self._make_df(3000)
+        expected = BasicGroupByTransform(['a'], ['f', 'i'], ['median', 'nunique']).transform(df)
+        transform = ChunkedGroupByTransform(['a'], ['f', 'i'], ['median', 'nunique'], relative_accuracy=0.01)
+        output = transform.aggregate(df, ['a'], ['f', 'i'], ['median', 'nunique'], chunksize=250)
+        assert output.columns.tolist() == expected.columns.tolist()
+        for column in expected.columns[1:]:
+            assert output.loc[:, column].values == approx(expected.loc[:, column].values, rel=0.05, nan_ok=True)
+
+    def test_nunique_when_chunk_dtype_changes(self, tmp_path):
+        # 後ろのチャンクにだけ空欄があると、read_csv でそのチャンクの i が int64 から float64 になる
+        df = pd.DataFrame({'a': ['x', 'y'] * 200, 'i': np.arange(400) % 20})
+        df.loc[df.index[-10:], 'i'] = np.nan
+        path = tmp_path / 'data.csv'
+        df.to_csv(path, index=False, float_format='%.0f')
+        expected = BasicGroupByTransform(['a'], ['i'], ['nunique']).transform(df)
+        output = ChunkedGroupByTransform(['a'], ['i'], ['nunique']).aggregate_file(path, chunksize=100)
+        assert output.iloc[:, -1].tolist() == expected.iloc[:, -1].tolist()
+
+    def test_unsupported_aggs(self):
+        with pytest.raises(ValueError):
+            ChunkedGroupByTransform(['a'], ['x'], ['first'])
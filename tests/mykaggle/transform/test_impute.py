@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.transform.impute import GroupMomentImputer
+
+
+def test_group_moment_imputer():
+    df = pd.DataFrame({
+        'key': ['a', 'a', 'a', 'b', 'b', 'b', 'c', None],
+        'target': [1.0, 3.0, np.nan, 10.0, 20.0, np.nan, np.nan, np.nan],
+        'source': [2.0, 4.0, 5.0, 1.0, 2.0, 3.0, 1.0, 1.0],
+    })
+    output = GroupMomentImputer(['key'], 'target', 'source').transform(df)
+
+    stats = df.groupby('key').agg(['mean', 'std'])
+    z = (5.0 - stats.loc['a', ('source', 'mean')]) / stats.loc['a', ('source', 'std')]
+    expected_a = stats.loc['a', ('target', 'mean')] + z * stats.loc['a', ('target', 'std')]
+    assert output.iloc[2] == expected_a
+    # b: source の z-score が 1 なので target の平均 + 標準偏差
+    assert output.iloc[5] == pytest.approx(15.0 + 50 ** 0.5)
+    # 欠損していない行はそのまま、集約できないグループとキーが NaN の行は NaN
+    assert output.iloc[[0, 1, 3, 4]].tolist() == [1.0, 3.0, 10.0, 20.0]
+    assert output.iloc[[6, 7]].isna().all()
+
+
+def test_group_moment_imputer_transform_to():
+    df = pd.DataFrame({'key': ['a', 'a', 'b', 'b'], 'target': [1.0, 3.0, 0.0, 2.0], 'source': [0.0, 2.0, 0.0, 4.0]})
+    df_to = pd.DataFrame(
+        {'key': ['b', 'a', 'c'], 'target': [np.nan, 5.0, np.nan], 'source': [6.0, 0.0, 1.0]}, index=[5, 6, 7]
+    )
+    output = GroupMomentImputer(['key'], 'target', 'source').transform_to(df, df_to)
+    assert output.index.tolist() == [5, 6, 7]
+    np.testing.assert_allclose(output.values, [3.0, 5.0, np.nan])
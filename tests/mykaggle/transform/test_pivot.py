@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.transform.pivot import PivotTransform, SparsePivotTransform, hstack_pivots
+
+
+def _make_df(n=300):
+    rng = np.random.RandomState(1019)
+    df = pd.DataFrame({
+        'a': rng.choice(['x', 'y', 'z', 'w', None], n),
+        'c': rng.choice([2001.0, 1999.0, 2005.0, np.nan], n),
+        'd': rng.choice(['p', 'q', None], n),
+        'target': rng.normal(size=n),
+    })
+    df.loc[rng.rand(n) < 0.2, 'target'] = np.nan
+    # 'w' は c が全部 NaN なので pivot_table には出てこない
+    df.loc[df.loc[:, 'a'] == 'w', 'c'] = np.nan
+    return df
+
+
+class TestSparsePivotTransform:
+
+    @pytest.mark.parametrize('agg', ['count', 'sum'])
+    def test_equals_pivot_table(self, agg):
+        df = _make_df()
+        expected = PivotTransform(['a'], 'c', 'target', [agg], fillna=0)(df)
+        pivot = SparsePivotTransform(['a'], 'c', 'target', agg)(df).drop_empty_rows()
+        output = pd.concat([pivot.index, pd.DataFrame(pivot.matrix.toarray(), columns=pivot.columns)], axis=1)
+        pd.testing.assert_frame_equal(output, expected, check_dtype=False)
+
+    def test_hstack_and_rows_for(self):
+        df = _make_df()
+        pivots = [SparsePivotTransform(['a'], c, 'target')(df) for c in ['c', 'd']]
+        pivot = hstack_pivots(pivots, drop_empty_rows=True)
+        assert pivot.matrix.shape == (len(pivot.index), len(pivot.columns))
+
+        df_to = pd.DataFrame({'a': ['z', 'unseen', None, 'x']})
+        rows = pivot.rows_for(df_to)
+        assert rows[1] == -1 and rows[2] == -1
+        assert pivot.index.loc[rows[0], 'a'] == 'z'
+        assert pivot.index.loc[rows[3], 'a'] == 'x'
+
+    def test_hstack_keeps_rows_of_first_pivot(self):
+        # 'w' は c が全部 NaN なので、c の pivot_table に d の pivot_table を left merge すると消える
+        df = pd.DataFrame({
+            'id': range(5),
+            'a': ['x', 'x', 'y', 'w', 'w'],
+            'c': ['p', 'q', 'p', None, None],
+            'd': ['s', None, 't', 's', 't'],
+        })
+        expected = PivotTransform(['a'], 'c', 'id', ['count'], fillna=0)(df)
+        expected = pd.merge(expected, PivotTransform(['a'], 'd', 'id', ['count'], fillna=0)(df), how='left', on='a')
+        pivots = [SparsePivotTransform(['a'], c, 'id')(df) for c in ['c', 'd']]
+        pivot = hstack_pivots(pivots, drop_empty_rows=True)
+        output = pd.concat([pivot.index, pd.DataFrame(pivot.matrix.toarray(), columns=pivot.columns)], axis=1)
+        pd.testing.assert_frame_equal(output, expected.fillna(0), check_dtype=False)
+        # drop_empty_rows しなければ 'w' も残る
+        assert hstack_pivots(pivots).index.loc[:, 'a'].tolist() == ['w', 'x', 'y']
+
+    def test_unsupported_agg(self):
+        with pytest.raises(ValueError):
+            SparsePivotTransform(['a'], 'c', 'target', 'mean')
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from mykaggle.transform.rank import GroupRankTransform, compute_group_ranks
+
+
+def _data():
+    rng = np.random.default_rng(1019)
+    n_rows = 200
+    return pd.DataFrame({
+        'key1': rng.choice(['a', 'b', 'c', None], n_rows),
+        'key2': rng.choice([1.0, 2.0, np.nan], n_rows),
+        'value': rng.choice([1.0, 2.0, 3.0, np.nan], n_rows),
+    })
+
+
+def test_group_ranks_equal_pandas():
+    df = _data()
+    for keys in [['key1'], ['key1', 'key2']]:
+        grouped = df.groupby(keys)
+        ranks = compute_group_ranks(df, keys, 'value')
+        np.testing.assert_allclose(ranks.rank, grouped['value'].rank().values)
+        np.testing.assert_allclose(ranks.count, grouped['value'].transform('count').values)
+        np.testing.assert_allclose(ranks.pct, (grouped['value'].rank() / grouped['value'].transform('count')).values)
+        ranks = compute_group_ranks(df, keys)
+        np.testing.assert_allclose(ranks.cumcount, grouped.cumcount().values)
+        np.testing.assert_allclose(ranks.size, grouped['key1'].transform('size').reindex(df.index).values)
+
+
+def test_group_rank_transform_is_memoized():
+    df = _data()
+    specs = [(['key1'], 'value'), (['key1', 'key2'], None)]
+    first = GroupRankTransform(specs).ranks(df)
+    second = GroupRankTransform(specs[::-1]).ranks(df)
+    assert first[0] is second[1] and first[1] is second[0]
+    # 別の DataFrame は中身が同じでも計算し直す
+    copied = GroupRankTransform(specs).ranks(df.copy())
+    assert copied[0] is not first[0]
+    np.testing.assert_array_equal(copied[0].rank, first[0].rank)
+
+    # 書き換えた DataFrame は計算し直す
+    df.loc[:, 'value'] = -df.loc[:, 'value']
+    mutated = GroupRankTransform(specs).ranks(df)
+    assert mutated[0] is not first[0] and mutated[1] is first[1]
+    np.testing.assert_array_equal(mutated[0].rank, compute_group_ranks(df, ['key1'], 'value').rank)
+
+    output = GroupRankTransform(specs).transform(df)
+    assert output.columns[0] == 'rank_value_groupby_key1'
+    assert output.columns[-1] == 'pct_row_groupby_key1_key2'
+    np.testing.assert_array_equal(output.loc[:, 'cumcount_row_groupby_key1_key2'].values, first[1].cumcount)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mykaggle.transform.groupby import BasicGroupByTransform
+from mykaggle.transform.target_encoding import OOFTargetEncoder
+
+
+@pytest.fixture
+def df():
+    rng = np.random.RandomState(1019)
+    n = 200
+    df = pd.DataFrame({
+        'a': rng.choice(['x', 'y', 'z', None], n),
+        'b': rng.choice([2000.0, 2001.0, np.nan], n),
+        'target': rng.normal(size=n),
+    })
+    df.loc[rng.choice(n, 20), 'target'] = np.nan
+    return df
+
+
+class TestOOFTargetEncoder:
+
+    @pytest.mark.parametrize('keys', [['a'], ['a', 'b']])
+    def test_encode_equals_per_fold_groupby(self, df, keys):
+        aggs = ['mean', 'sum', 'count', 'std']
+        folds = np.arange(df.shape[0]) % 4
+        encoder = OOFTargetEncoder(keys, ['target'], aggs)
+        encoded = encoder.encode(df, folds)
+
+        assert encoded.shape == (4, df.shape[0], len(aggs))
+        assert encoded.flags['C_CONTIGUOUS']
+        for k in range(4):
+            agg = BasicGroupByTransform(keys, ['target'], aggs)(df.loc[folds != k])
+            expected = pd.merge(df, agg, how='left', on=keys).loc[:, encoder.columns].values
+            np.testing.assert_allclose(encoded[k], expected)
+
+    def test_std_of_large_targets(self, df):
+        # 大きい値の小さな散らばりでも、二乗和の引き算のような桁落ちをしない
+        df = df.assign(target=1e9 + df.loc[:, 'target'])
+        folds = np.arange(df.shape[0]) % 4
+        encoded = OOFTargetEncoder(['a'], ['target'], ['std']).encode(df, folds)
+        for k in range(4):
+            agg = BasicGroupByTransform(['a'], ['target'], ['std'])(df.loc[folds != k])
+            expected = pd.merge(df, agg, how='left', on=['a']).iloc[:, -1].values
+            np.testing.assert_allclose(encoded[k, :, 0], expected, rtol=1e-6)
+
+    def test_encode_full(self, df):
+        df_test = df.iloc[:50].copy()
+        df_test.loc[0, 'a'] = 'unseen'
+        encoder = OOFTargetEncoder(['a'], ['target'], ['mean'])
+        encoded = encoder.encode_full(df, df_test)
+
+        agg = BasicGroupByTransform(['a'], ['target'], ['mean'])(df)
+        expected = pd.merge(df_test, agg, how='left', on='a').loc[:, encoder.columns].values
+        np.testing.assert_allclose(encoded, expected)
+        assert np.isnan(encoded[0, 0])
+
+    def test_unsupported_aggs(self):
+        with pytest.raises(ValueError):
+            OOFTargetEncoder(['a'], ['target'], ['median'])
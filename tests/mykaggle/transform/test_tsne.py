@@ -0,0 +1,38 @@
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+from mykaggle.transform.tsne import TSNETransform
+
+
+@pytest.fixture
+def bow():
+    rng = np.random.RandomState(1019)
+    # 2 つのクラスタに分かれる疎行列
+    dense = np.zeros((80, 30))
+    dense[:40, :15] = rng.rand(40, 15) > 0.6
+    dense[40:, 15:] = rng.rand(40, 15) > 0.6
+    return sp.csr_matrix(dense)
+
+
+class TestTSNETransform:
+
+    def test_fit_transform(self, bow):
+        transform = TSNETransform(n_components=2, svd_components=5, perplexity=10)
+        embedding = transform.fit_transform(bow)
+        assert embedding.shape == (80, 2)
+        # fit した行はほぼ同じ埋め込みになる
+        np.testing.assert_allclose(transform.transform(bow[:5]), embedding[:5], atol=1e-6)
+
+    def test_out_of_sample(self, bow):
+        transform = TSNETransform(n_components=2, svd_components=5, perplexity=10)
+        embedding = transform.fit_transform(bow)
+        new = sp.csr_matrix(np.r_[np.ones(15), np.zeros(15)])
+        output = transform.transform(new)
+        # 近いクラスタの方に埋め込まれる
+        center0, center1 = embedding[:40].mean(axis=0), embedding[40:].mean(axis=0)
+        assert np.linalg.norm(output[0] - center0) < np.linalg.norm(output[0] - center1)
+
+    def test_n_components(self):
+        with pytest.raises(ValueError):
+            TSNETransform(n_components=4)